@@ -0,0 +1,218 @@
+"""Batched reorder alerts.
+
+Stock changes (orders, PATCH /items) record `stock.low` / `stock.restocked` outbox
+events when an item crosses its reorder point. One worker sends the alerts: on
+PostgreSQL the one holding an advisory lock (another takes over when it goes
+away); elsewhere every process, since SQLite deployments run a single one.
+
+That worker reads the `stock.low` events dispatched by any worker (through the
+order_events.dispatched_at index), collects them for LOW_STOCK_ALERT_INTERVAL_S
+and then sends one `stock.reorder_alert` WebSocket event listing those items that
+are still low, plus one notifier call if the store has low_stock_reminders on.
+"Still low" and the most-short-first order come from the ix_items_low_stock query,
+so items restocked within the window drop out whichever worker handled the
+restock. Nothing scans the catalogue. Crossings dispatched by this worker's own
+dispatcher start the window at once; others are noticed within one interval.
+
+The notifier is `LOW_STOCK_NOTIFIER=package.module:callable` (or set_notifier()),
+called with the list of item dicts. Coroutine functions are awaited, anything else
+runs in a thread. The default logs the alert. Failed notifications are logged and
+counted, not retried.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+from sqlalchemy import select
+from . import models
+from .database import SessionLocal, get_engine
+from .outbox import dispatcher
+from .settings_service import settings_service
+from .websocket import manager
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_S = float(os.getenv("LOW_STOCK_ALERT_INTERVAL_S", "30"))
+# Events are read by dispatched_at with this overlap (deduplicated by id), so
+# a dispatch that committed late is still seen
+_OVERLAP = timedelta(seconds=5)
+# pg_try_advisory_lock key held by the alerting worker
+_LEADER_LOCK_ID = 0x4C4F5753  # "LOWS"
+
+
+def log_notifier(items: List[dict]):
+    logger.warning("Low stock: %s", ", ".join(
+        f"{i['sku']} ({i['stock']} <= {i['reorder_point']})" for i in items
+    ))
+
+
+def _load_notifier(path: Optional[str]) -> Callable[[List[dict]], object]:
+    if not path:
+        return log_notifier
+    module, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+class LowStockAlerter:
+    def __init__(self, interval: float = INTERVAL_S, notifier: Optional[Callable] = None):
+        self.interval = interval
+        self.notifier = notifier or _load_notifier(os.getenv("LOW_STOCK_NOTIFIER"))
+        self.pending: Set[int] = set()
+        self.stats = {"alerts": 0, "items_alerted": 0, "notifier_errors": 0}
+        self._since = datetime.utcnow()
+        self._seen: Set[int] = set()
+        self.leader = False
+        self._leader_conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def set_notifier(self, notifier: Callable[[List[dict]], object]):
+        self.notifier = notifier
+
+    async def start(self):
+        """Run on the current event loop (one per worker) unless already running on one."""
+        if self._loop is not None and not self._loop.is_closed() and self._loop.is_running():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._loop is not asyncio.get_running_loop():
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.pending:
+            await self.flush()
+        await asyncio.to_thread(self._resign)
+        self._task = None
+        self._loop = None
+
+    def collect(self, rows: List[models.OrderEvent]):
+        """Outbox handler: start the window as soon as this worker dispatches a crossing."""
+        if self._wake is not None and any(row.type == "stock.low" for row in rows):
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                if not await asyncio.to_thread(self._elect):
+                    continue
+                if await asyncio.to_thread(self.collect_crossings):
+                    # Let further crossings accumulate into the same alert
+                    await asyncio.sleep(self.interval)
+                    await self.flush()
+            except Exception:
+                logger.exception("Low-stock alert failed")
+
+    def _elect(self) -> bool:
+        """Whether this worker sends the alerts (holds the PostgreSQL advisory lock)."""
+        if get_engine().dialect.name != "postgresql":
+            self.leader = True
+            return True
+        try:
+            if self._leader_conn is not None:
+                # Still connected, so still holding the lock
+                self._leader_conn.cursor().execute("SELECT 1")
+                return True
+            conn = get_engine().raw_connection()
+            conn.driver_connection.autocommit = True
+            cur = conn.cursor()
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (_LEADER_LOCK_ID,))
+            if not cur.fetchone()[0]:
+                conn.close()
+                return False
+            self._leader_conn, self.leader = conn, True
+            # Crossings from before this worker took over were the previous leader's
+            self._since, self._seen = datetime.utcnow(), set()
+            return True
+        except Exception:
+            logger.warning("Low-stock alert leader election failed", exc_info=True)
+            self._resign()
+        return False
+
+    def _resign(self):
+        self.leader = False
+        conn, self._leader_conn = self._leader_conn, None
+        if conn is not None:
+            try:
+                # Session-level lock: released when the connection goes
+                conn.invalidate()
+            except Exception:
+                pass
+
+    def collect_crossings(self) -> bool:
+        """Add items with `stock.low` events dispatched since the last look to `pending`."""
+        now = datetime.utcnow()
+        E = models.OrderEvent
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(E.id, E.payload)
+                .where(E.dispatched_at >= self._since - _OVERLAP, E.type == "stock.low")
+            ).all()
+        finally:
+            db.close()
+        fresh = [payload for event_id, payload in rows if event_id not in self._seen]
+        self._since, self._seen = now, {event_id for event_id, _ in rows}
+        self.pending.update(json.loads(payload)["item_id"] for payload in fresh)
+        return bool(self.pending)
+
+    def _still_low(self, item_ids: Set[int]) -> List[dict]:
+        I = models.Item
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(I.id, I.sku, I.name, I.stock, I.reorder_point)
+                .where(I.stock <= I.reorder_point, I.id.in_(item_ids))
+                .order_by((I.stock - I.reorder_point).asc(), I.id)
+            ).all()
+        finally:
+            db.close()
+        return [
+            {"item_id": r.id, "sku": r.sku, "name": r.name, "stock": r.stock, "reorder_point": r.reorder_point}
+            for r in rows
+        ]
+
+    async def flush(self):
+        """Send one alert for the pending items that are still low (most short first)."""
+        await asyncio.to_thread(self.collect_crossings)
+        item_ids, self.pending = self.pending, set()
+        if not item_ids:
+            return
+        items = await asyncio.to_thread(self._still_low, item_ids)
+        if not items:
+            return
+        self.stats["alerts"] += 1
+        self.stats["items_alerted"] += len(items)
+        manager.publish_event("stock", "stock.reorder_alert", {"items": items})
+        if not (await asyncio.to_thread(settings_service.get)).low_stock_reminders:
+            return
+        try:
+            if asyncio.iscoroutinefunction(self.notifier):
+                await self.notifier(items)
+            else:
+                await asyncio.to_thread(self.notifier, items)
+        except Exception:
+            self.stats["notifier_errors"] += 1
+            logger.exception("Low-stock notifier failed")
+
+    def metrics(self) -> dict:
+        return {**self.stats, "pending": len(self.pending), "leader": self.leader}
+
+
+alerter = LowStockAlerter()
+dispatcher.add_handler(alerter.collect)
@@ -2,11 +2,13 @@ import os
 import time
 from typing import Optional
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from .database import get_db
+from .cache import TieredCache
+from .tokens import TokenVerifier
 from . import models
 
 # Modes:
@@ -18,15 +20,21 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-# Set auto_error=False so we can optionally bypass auth in dev without 403 from the security dependency
-security = HTTPBearer(auto_error=False)
+# Keys are parsed once here; verified tokens are memoized until they expire
+token_verifier = TokenVerifier.from_env(SECRET_KEY, ALGORITHM, mode=AUTH_MODE)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# Active user principals keyed by token `sub` (email), so authenticated requests
+# skip the users lookup. Entries are invalidated when the users router's writes commit;
+# other workers' local copies age out after the TTL.
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+_PRINCIPAL_FIELDS = ("id", "name", "email", "role", "is_active")
+user_cache = TieredCache(
+    "auth:user", maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, redis_url=os.getenv("REDIS_URL"),
+)
 
-def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+# Set auto_error=False so we can optionally bypass auth in dev without 403 from the security dependency
+security = HTTPBearer(auto_error=False)
 
 def create_access_token(sub: str, extra: Optional[dict] = None, expires_minutes: Optional[int] = None) -> str:
     to_encode = {"sub": sub, "iat": int(time.time())}
@@ -36,6 +44,34 @@ def create_access_token(sub: str, extra: Optional[dict] = None, expires_minutes:
     to_encode["exp"] = int(time.time()) + (exp_mins * 60)
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def invalidate_user(db, *emails: Optional[str]):
+    """Drop the cached principals for `emails` once `db`'s transaction commits.
+
+    Invalidating earlier would let a concurrent request re-cache the old row
+    (e.g. a user that is being deactivated) for the whole TTL.
+    """
+    emails = {email for email in emails if email}
+    if not emails:
+        return
+
+    def _committed(session):
+        for email in emails:
+            user_cache.invalidate(email)
+
+    event.listen(getattr(db, "sync_session", db), "after_commit", _committed, once=True)
+
+
+def _load_principal(db: Session, email: str) -> Optional[models.User]:
+    cached = user_cache.get(email)
+    if cached is not None:
+        # Detached stand-in for the row; routes only read identity fields
+        return models.User(**cached)
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user and user.is_active:
+        user_cache.set(email, {f: getattr(user, f) for f in _PRINCIPAL_FIELDS})
+    return user
+
+
 def get_current_user(
     cred: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
@@ -48,7 +84,8 @@ def get_current_user(
         # Create a default active user if none exist
         user = models.User(name="Dev User", email="dev@example.com", role="admin", is_active=True)
         db.add(user)
-        db.flush()
+        # Commit right away so routes on the async session don't wait on this write
+        db.commit()
         db.refresh(user)
         return user
 
@@ -57,14 +94,14 @@ def get_current_user(
 
     token = cred.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.verify(token)
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = _load_principal(db, email)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or missing user")
     return user
@@ -0,0 +1,317 @@
+"""Streaming CSV / JSON-lines helpers for bulk import and export endpoints.
+
+Uploads are read straight from the request body (no multipart buffering) and
+parsed as they arrive; exports stream rows from a server-side cursor through a
+`StreamingResponse` without materializing the table.
+"""
+import codecs
+import collections
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Iterable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset
+from . import schemas
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON = "application/x-ndjson"
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": NDJSON,
+}
+
+
+def detect_format(request: Request, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    content_type = request.headers.get("content-type", "")
+    if "json" in content_type:
+        return "jsonl"
+    return "csv"
+
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    async for chunk in request.stream():
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf.rstrip("\r")
+
+
+class _LineFeed:
+    """Lines handed to a csv.reader as the upload arrives (see iter_records)."""
+
+    def __init__(self):
+        self.lines = collections.deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field (csv's default dialect rules).
+
+    `quoted` says whether the line starts inside one. A quote opens a field only
+    at its start; elsewhere it is literal, as in csv.reader's non-strict mode.
+    """
+    state = "quoted" if quoted else "start"
+    for ch in line:
+        if state == "quoted":
+            if ch == '"':
+                state = "quote"  # closes the field unless doubled
+        elif state == "quote" and ch == '"':
+            state = "quoted"
+        elif ch == ",":
+            state = "start"
+        elif state == "start" and ch == '"':
+            state = "quoted"
+        else:
+            state = "field"
+    return state == "quoted"
+
+
+async def iter_records(request: Request, fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, record, error) for each non-blank data row of the upload.
+
+    CSV uploads need a header row; empty cells are left out of the record so the
+    schema defaults apply. One csv.reader parses the whole body, so quoted fields
+    may span lines: lines are buffered until one ends outside a quoted field,
+    then the reader consumes them as one row.
+    """
+    header: Optional[List[str]] = None
+    row = 0
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    in_quotes = False
+    async for line in iter_lines(request):
+        if fmt == "csv":
+            if not in_quotes and not line.strip():
+                continue
+            feed.lines.append(line + "\n")
+            in_quotes = _ends_quoted(line, in_quotes)
+            if in_quotes:
+                continue
+            try:
+                values = next(reader)
+            except csv.Error as exc:
+                feed.lines.clear()
+                row += 1
+                yield row, None, f"Malformed CSV: {exc}"
+                continue
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            row += 1
+            if len(values) > len(header):
+                yield row, None, "More values than header columns"
+                continue
+            yield row, {k: v for k, v in zip(header, values) if v != ""}, None
+        else:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row, None, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "Expected a JSON object"
+                continue
+            yield row, record, None
+    if in_quotes:
+        yield row + 1, None, "Malformed CSV: unterminated quoted field"
+
+
+def add_error(result, row: int, error: str):
+    """Count a failed row on an ImportResult, keeping at most MAX_REPORTED_ERRORS details."""
+    result.failed += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(schemas.ImportRowError(row=row, error=error))
+
+
+def describe_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def upsert_rows(db: Session, model, rows: List[dict], key: str, update_cols: Sequence[str]):
+    """INSERT rows, updating `update_cols` when `key` already exists.
+
+    Uses ON CONFLICT on PostgreSQL/SQLite; other databases fall back to one set-based
+    lookup followed by executemany UPDATE and INSERT statements.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={c: getattr(stmt.excluded, c) for c in update_cols},
+        )
+        db.execute(stmt, rows)
+        return
+    column = getattr(model, key)
+    existing = set(db.scalars(select(column).where(column.in_([r[key] for r in rows]))))
+    updates = [r for r in rows if r[key] in existing]
+    inserts = [r for r in rows if r[key] not in existing]
+    if updates:
+        stmt = (
+            update(model.__table__)
+            .where(model.__table__.c[key] == bindparam("_key"))
+            .values({c: bindparam(c) for c in update_cols})
+        )
+        db.execute(stmt, [{"_key": r[key], **{c: r[c] for c in update_cols}} for r in updates])
+    if inserts:
+        db.execute(insert(model), inserts)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):  # enums
+        return value.value
+    return str(value)
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def encode_rows(rows: Iterable[Sequence], columns: Sequence[str], fmt: str) -> str:
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerows([_csv_cell(v) for v in row] for row in rows)
+        return out.getvalue()
+    return "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
+
+
+def stream_rows(stmt, columns: Sequence[str], fmt: str, filename: Optional[str] = None) -> StreamingResponse:
+    """Stream the rows of a Core select as CSV or NDJSON.
+
+    The generator opens its own session: request-scoped dependencies are torn down
+    before a StreamingResponse body is sent.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {fmt}")
+
+    def generate():
+        db = SessionLocal()
+        try:
+            if fmt == "csv":
+                yield encode_rows([columns], columns, fmt)
+            result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for partition in result.partitions():
+                yield encode_rows(partition, columns, fmt)
+        finally:
+            db.close()
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return StreamingResponse(generate(), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def stream_format(request: Request, fmt: Optional[str] = None) -> Optional[str]:
+    """Streaming format requested by a list call (?format=csv|jsonl or Accept: NDJSON), or None."""
+    if fmt and fmt != "json":
+        return fmt
+    if fmt is None and NDJSON in request.headers.get("accept", ""):
+        return "jsonl"
+    return None
+
+
+def stream_entities(stmt, schema, fmt: str) -> StreamingResponse:
+    """Stream ORM rows of `stmt` serialized through `schema`, one batch of rows at a time.
+
+    NDJSON lines match the regular JSON list items; CSV drops nested list fields.
+    """
+    columns = [
+        name for name, field in schema.model_fields.items()
+        if fmt != "csv" or getattr(field.annotation, "__origin__", None) is not list
+    ]
+
+    def generate():
+        db = SessionLocal()
+        try:
+            if fmt == "csv":
+                yield encode_rows([columns], columns, fmt)
+            result = db.scalars(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for partition in result.partitions():
+                dumped = [schema.model_validate(obj).model_dump(mode="json") for obj in partition]
+                if fmt == "csv":
+                    yield encode_rows([[d[c] for c in columns] for d in dumped], columns, fmt)
+                else:
+                    yield "".join(json.dumps(d) + "\n" for d in dumped)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=MEDIA_TYPES[fmt])
+
+
+def stream_list(query, model, schema, fmt: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Streaming counterpart of pagination.paginate for a filtered ORM query or select().
+
+    With `limit`, the keys of rows limit and limit + 1 are looked up first, so that
+    X-Next-Cursor goes out with the headers as it does for paginate. The stream then
+    runs up to and including that last key, so rows committed in between are not
+    skipped by the next page.
+    """
+    stmt = keyset(getattr(query, "statement", query), model, cursor)
+    headers = {}
+    if limit is not None:
+        db = SessionLocal()
+        try:
+            keys = db.execute(stmt.with_only_columns(model.created_at, model.id).offset(limit - 1).limit(2)).all()
+        finally:
+            db.close()
+        if len(keys) > 1:
+            last_created_at, last_id = keys[0]
+            stmt = stmt.where(or_(
+                model.created_at > last_created_at,
+                and_(model.created_at == last_created_at, model.id >= last_id),
+            ))
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last_created_at, last_id)
+        else:
+            stmt = stmt.limit(limit)
+    response = stream_entities(stmt, schema, fmt)
+    response.headers.update(headers)
+    return response
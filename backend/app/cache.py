@@ -0,0 +1,119 @@
+"""Small in-process caches with an optional shared Redis tier."""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+class TieredCache:
+    """TTLCache in front of an optional Redis tier shared by all workers.
+
+    Values must be JSON-serializable. Redis failures are logged and treated as
+    misses so the caller always falls back to the database.
+    """
+
+    def __init__(self, prefix: str, maxsize: int = 1024, ttl: float = 60.0, redis_url: Optional[str] = None):
+        self.prefix = prefix
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared_hits = 0
+        self._redis = None
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+            except Exception:
+                logger.exception("Redis cache tier disabled for %s", prefix)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or self._redis is None:
+            return value
+        try:
+            raw = self._redis.get(self._key(key))
+        except Exception:
+            logger.warning("Redis get failed for %s", self.prefix, exc_info=True)
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.shared_hits += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.set(self._key(key), json.dumps(value), ex=max(1, int(self.local.ttl)))
+            except Exception:
+                logger.warning("Redis set failed for %s", self.prefix, exc_info=True)
+
+    def invalidate(self, key: str):
+        self.local.pop(key)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._key(key))
+            except Exception:
+                logger.warning("Redis delete failed for %s", self.prefix, exc_info=True)
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> dict:
+        return {**self.local.stats(), "shared_hits": self.shared_hits, "shared_tier": self._redis is not None}
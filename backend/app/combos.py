@@ -0,0 +1,169 @@
+"""Combo (bundle) items.
+
+A combo's components live in `item_combo_components` and may themselves be combos.
+Ordering only needs the flattened bill of materials, which is kept precomputed in
+`item_combo_leaves` (per combo: every stock-keeping item and the units one combo
+consumes). Orders reserve those leaf items instead of the combo's own `stock`, and
+`Item.combo_available` reads the same table. `set_components` refreshes the rows of
+the changed combo and of every combo containing it; `rebuild` recomputes the table
+from `item_combo_components`:
+
+    python -m app.combos rebuild
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, aliased
+from . import models
+
+MAX_DEPTH = int(os.getenv("COMBO_MAX_DEPTH", "8"))
+
+BillOfMaterials = Dict[int, Dict[int, int]]
+
+
+class ComboError(ValueError):
+    pass
+
+
+def _edges(db: Session) -> Dict[int, List[Tuple[int, int]]]:
+    edges: Dict[int, List[Tuple[int, int]]] = {}
+    for combo_id, component_id, qty in db.execute(select(
+        models.ItemComboComponent.combo_item_id,
+        models.ItemComboComponent.component_item_id,
+        models.ItemComboComponent.qty,
+    )):
+        edges.setdefault(combo_id, []).append((component_id, qty))
+    return edges
+
+
+def _flatten(edges: Dict[int, List[Tuple[int, int]]], combo_id: int, path: Tuple[int, ...] = ()) -> Dict[int, int]:
+    if combo_id in path:
+        raise ComboError(f"Combo {combo_id} contains itself")
+    if len(path) >= MAX_DEPTH:
+        raise ComboError(f"Combos nest deeper than {MAX_DEPTH} levels")
+    leaves: Dict[int, int] = {}
+    for component_id, qty in edges[combo_id]:
+        if component_id in edges:
+            for leaf_id, leaf_qty in _flatten(edges, component_id, path + (combo_id,)).items():
+                leaves[leaf_id] = leaves.get(leaf_id, 0) + qty * leaf_qty
+        else:
+            leaves[component_id] = leaves.get(component_id, 0) + qty
+    return leaves
+
+
+def _refresh(db: Session, edges: Dict[int, List[Tuple[int, int]]], combo_ids: Iterable[int]):
+    combo_ids = set(combo_ids)
+    rows = [
+        {"combo_item_id": combo_id, "leaf_item_id": leaf_id, "qty": qty}
+        for combo_id in combo_ids if combo_id in edges
+        for leaf_id, qty in _flatten(edges, combo_id).items()
+    ]
+    db.execute(delete(models.ItemComboLeaf).where(models.ItemComboLeaf.combo_item_id.in_(combo_ids)))
+    if rows:
+        db.execute(insert(models.ItemComboLeaf), rows)
+    # combo_available changed with them (delta sync reads updated_at)
+    db.execute(
+        update(models.Item).where(models.Item.id.in_(combo_ids)).values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _ancestors(edges: Dict[int, List[Tuple[int, int]]], item_id: int) -> Set[int]:
+    parents: Dict[int, Set[int]] = {}
+    for combo_id, components in edges.items():
+        for component_id, _ in components:
+            parents.setdefault(component_id, set()).add(combo_id)
+    found: Set[int] = set()
+    pending = [item_id]
+    while pending:
+        for parent in parents.get(pending.pop(), ()):
+            if parent not in found:
+                found.add(parent)
+                pending.append(parent)
+    return found
+
+
+def set_components(db: Session, combo_id: int, components: Dict[int, int]):
+    """Replace a combo's components (component id -> qty; empty makes it a plain item).
+
+    Raises ComboError if the change would make a combo contain itself.
+    """
+    edges = _edges(db)
+    edges.pop(combo_id, None)
+    if components:
+        edges[combo_id] = list(components.items())
+    affected = {combo_id} | _ancestors(edges, combo_id)
+    for affected_id in affected:
+        if affected_id in edges:
+            _flatten(edges, affected_id)
+    db.execute(delete(models.ItemComboComponent).where(models.ItemComboComponent.combo_item_id == combo_id))
+    if components:
+        db.execute(insert(models.ItemComboComponent), [
+            {"combo_item_id": combo_id, "component_item_id": component_id, "qty": qty}
+            for component_id, qty in components.items()
+        ])
+    _refresh(db, edges, affected)
+
+
+def rebuild(db: Session):
+    """Recompute item_combo_leaves from item_combo_components."""
+    edges = _edges(db)
+    db.execute(delete(models.ItemComboLeaf))
+    _refresh(db, edges, edges)
+
+
+def load(db: Session, item_ids: Iterable[int]) -> Tuple[BillOfMaterials, Dict[int, models.Item]]:
+    """Bills of materials of the combos among `item_ids`, and their leaf items, in one query."""
+    bom: BillOfMaterials = {}
+    leaves: Dict[int, models.Item] = {}
+    rows = db.execute(
+        select(models.ItemComboLeaf.combo_item_id, models.ItemComboLeaf.qty, models.Item)
+        .join(models.Item, models.Item.id == models.ItemComboLeaf.leaf_item_id)
+        .where(models.ItemComboLeaf.combo_item_id.in_(set(item_ids)))
+    )
+    for combo_id, qty, leaf in rows:
+        bom.setdefault(combo_id, {})[leaf.id] = qty
+        leaves[leaf.id] = leaf
+    return bom, leaves
+
+
+def demand(bom: BillOfMaterials, quantities: Dict[int, int]) -> Dict[int, int]:
+    """Stock to reserve per item for ordered `quantities`, with combos replaced by their leaves."""
+    needed: Dict[int, int] = {}
+    for item_id, qty in quantities.items():
+        for leaf_id, per_unit in bom.get(item_id, {item_id: 1}).items():
+            needed[leaf_id] = needed.get(leaf_id, 0) + qty * per_unit
+    return needed
+
+
+def updated_via_leaves(since: datetime):
+    """Clause matching combos whose combo_available may have moved since `since` (a leaf item changed)."""
+    leaf = aliased(models.Item)
+    return models.Item.id.in_(
+        select(models.ItemComboLeaf.combo_item_id)
+        .join(leaf, leaf.id == models.ItemComboLeaf.leaf_item_id)
+        .where(leaf.updated_at > since)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.combos", description="Manage combo bills of materials")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="Recompute item_combo_leaves from item_combo_components")
+    parser.parse_args(argv)
+
+    from .database import SessionLocal, check_schema
+    check_schema()
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print("combo bills of materials rebuilt")
+
+
+if __name__ == "__main__":
+    main()
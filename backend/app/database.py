@@ -1,19 +1,159 @@
+import logging
 import os
+from typing import Optional
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from dotenv import load_dotenv, find_dotenv
+from . import db_profiling
+
+logger = logging.getLogger(__name__)
 
 # Load env (works no matter where you run uvicorn from)
 load_dotenv(find_dotenv())
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL not set")
+    return url
+
+
+def _async_url(url: str) -> str:
+    """Async driver URL for DATABASE_URL (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg takes `ssl` rather than libpq's sslmode and has no channel_binding
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def async_database_url() -> str:
+    return os.getenv("ASYNC_DATABASE_URL") or _async_url(database_url())
+
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine() keyword arguments from the DB_* environment variables.
+
+    DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT (seconds to wait for a free
+    connection) / DB_POOL_RECYCLE (seconds) size the QueuePool; DB_POOL_PRE_PING=false
+    skips the liveness round trip on checkout (pair it with a DB_POOL_RECYCLE below the
+    server's idle timeout); DB_POOL_LIFO reuses the most recent connection so idle ones
+    can be reaped. DB_STATEMENT_TIMEOUT_MS sets PostgreSQL's statement_timeout.
+    Async SQLite engines don't pool: aiosqlite connections are cheap and each test
+    client runs its own event loop.
+    """
+    options = {
+        "future": True,
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+    backend = make_url(url).get_backend_name()
+    in_memory = backend == "sqlite" and make_url(url).database in (None, "", ":memory:")
+    if is_async and backend == "sqlite":
+        options["poolclass"] = NullPool
+    elif not in_memory:
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "-1")),
+            pool_use_lifo=os.getenv("DB_POOL_LIFO", "false").lower() in ("1", "true", "yes"),
+        )
+        if db_profiling.ENABLED and not is_async:
+            options["poolclass"] = db_profiling.TimedQueuePool
+    statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout and backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(int(statement_timeout))}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout)}"}
+    return options
+
+
 Base = declarative_base()
 
+# Engines are created on first use: importing the app needs neither DATABASE_URL
+# nor a database connection, so cold starts only pay for what a request touches
+_engine: Optional[Engine] = None
+_SessionLocal = sessionmaker(autocommit=False, autoflush=False, future=True)
+
+
+def get_engine() -> Engine:
+    if _engine is None:
+        url = database_url()
+        new_engine = create_engine(url, **_engine_options(url))
+        if db_profiling.ENABLED:
+            db_profiling.instrument(new_engine)
+        set_engine(new_engine)
+    return _engine
+
+
+def set_engine(new_engine: Engine):
+    """Use `new_engine` for sync sessions (benchmarks wrap the DBAPI connection)."""
+    global _engine
+    _engine = new_engine
+    _SessionLocal.configure(bind=new_engine)
+
+
+def SessionLocal() -> Session:
+    get_engine()
+    return _SessionLocal()
+
+
+def __getattr__(name):
+    # `database.engine` still reads as the (lazily created) sync engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Async engine for the order hot path, created on first use so deployments without
+# an async driver installed keep working on the sync routes
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **_engine_options(url, is_async=True))
+        if db_profiling.ENABLED:
+            db_profiling.instrument(_async_engine.sync_engine)
+        # Objects stay usable after commit: attribute refreshes would need an await
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+# (table, column) pairs searched with ILIKE / similarity by routes/search.py
+# (created by migrations 0001 and 0003 on PostgreSQL)
+TRIGRAM_INDEXES = [
+    ("customers", "name"),
+    ("customers", "phone_norm"),
+    ("customers", "email_norm"),
+    ("items", "name"),
+    ("items", "sku"),
+    ("items", "category"),
+    ("users", "name"),
+    ("users", "email"),
+    ("users", "role"),
+]
+
 def get_db():
     db = SessionLocal()
     try:
@@ -25,18 +165,60 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
 def init_db():
+    """Create every table on a new throwaway database (tests, benchmarks).
+
+    Real databases are migrated with Alembic: `python -m app.migrate upgrade`.
+    """
     from . import models  # noqa: F401
-    Base.metadata.create_all(bind=engine)
-    # Lightweight, idempotent DDL patches for existing databases (no Alembic yet)
+    Base.metadata.create_all(bind=get_engine())
+
+
+# Newest revision in backend/migrations (test_migrations keeps them in step). Boot
+# compares it to alembic_version with one query instead of importing Alembic.
+SCHEMA_REVISION = "0005"
+# error: refuse to start on another revision; warn: log it; migrate: upgrade to
+# SCHEMA_REVISION at startup (single-process dev / SQLite); off: skip the check
+SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "error")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def schema_revision(conn) -> Optional[str]:
+    """The database's Alembic revision, or None if it has never been migrated."""
     try:
-        with engine.begin() as conn:
-            # Add gst_rate to items if missing (PostgreSQL IF NOT EXISTS supported)
-            conn.execute(text("ALTER TABLE items ADD COLUMN IF NOT EXISTS gst_rate INTEGER NOT NULL DEFAULT 18"))
-            # Add store phone and gstin to settings if missing
-            conn.execute(text("ALTER TABLE settings ADD COLUMN IF NOT EXISTS phone VARCHAR(64)"))
-            conn.execute(text("ALTER TABLE settings ADD COLUMN IF NOT EXISTS email VARCHAR(255)"))
-            conn.execute(text("ALTER TABLE settings ADD COLUMN IF NOT EXISTS gstin VARCHAR(64)"))
-    except Exception:
-        # Don't block startup if DDL fails; app can still run for fresh DBs
-        pass
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        return None
+
+
+def check_schema(mode: str = SCHEMA_CHECK):
+    if mode == "off":
+        return
+    with get_engine().connect() as conn:
+        current = schema_revision(conn)
+    if current == SCHEMA_REVISION:
+        return
+    if mode == "migrate":
+        from .migrate import upgrade
+        upgrade()
+        return
+    message = (
+        f"Database schema is at revision {current or '(none)'}, this code needs {SCHEMA_REVISION}; "
+        "run `python -m app.migrate upgrade`"
+    )
+    if mode == "warn":
+        logger.error(message)
+        return
+    raise SchemaOutOfDate(message)
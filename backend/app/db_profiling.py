@@ -0,0 +1,142 @@
+"""Opt-in SQL instrumentation for sizing the connection pool.
+
+Enabled with `DB_PROFILE=true`. Engine events then record, per HTTP request,
+the number of queries, time spent in the database and time spent waiting for a
+pooled connection; totals are reported by `/metrics` under `db`. Statements slower
+than `DB_SLOW_QUERY_MS` are logged. With `DB_DEBUG_HEADERS=true` each response also
+carries `X-DB-Queries`, `X-DB-Time-Ms` and `X-DB-Pool-Wait-Ms`.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+ENABLED = _env_flag("DB_PROFILE")
+DEBUG_HEADERS = _env_flag("DB_DEBUG_HEADERS")
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+
+class QueryStats:
+    __slots__ = ("queries", "db_time", "pool_wait", "slow_queries")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.slow_queries = 0
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+class _Totals:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_waits = 0
+        self.pool_wait = 0.0
+        self.max_pool_wait = 0.0
+        self.slow_queries = 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": round(self.queries / self.requests, 2) if self.requests else None,
+            "db_time_ms": round(self.db_time * 1000, 1),
+            "pool_checkouts": self.pool_waits,
+            "pool_wait_ms": round(self.pool_wait * 1000, 1),
+            "max_pool_wait_ms": round(self.max_pool_wait * 1000, 1),
+            "slow_queries": self.slow_queries,
+        }
+
+
+totals = _Totals()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with totals.lock:
+                totals.pool_waits += 1
+                totals.pool_wait += waited
+                totals.max_pool_wait = max(totals.max_pool_wait, waited)
+            current = _current.get()
+            if current is not None:
+                current.pool_wait += waited
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    if slow:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+    with totals.lock:
+        totals.queries += 1
+        totals.db_time += elapsed
+        totals.slow_queries += slow
+    current = _current.get()
+    if current is not None:
+        current.queries += 1
+        current.db_time += elapsed
+        current.slow_queries += slow
+
+
+def instrument(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware scoping QueryStats to each HTTP request."""
+
+    def __init__(self, app, headers: bool = DEBUG_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and self.headers:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-queries", str(stats.queries).encode()),
+                    (b"x-db-time-ms", f"{stats.db_time * 1000:.2f}".encode()),
+                    (b"x-db-pool-wait-ms", f"{stats.pool_wait * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            with totals.lock:
+                totals.requests += 1
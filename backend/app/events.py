@@ -0,0 +1,91 @@
+"""Typed delta events pushed to /ws/orders subscribers.
+
+Every event is `{"seq", "topic", "type", "data"}`; `seq` is assigned when the event
+is published (see websocket.ConnectionManager) and increases across the deployment.
+Routes don't publish directly: record() adds the events to the order_events outbox
+in the caller's transaction and app.outbox publishes them once committed. Delivery
+is at-least-once; `data.event_id` (the outbox id) identifies redeliveries.
+
+    orders  order.created / order.completed / order.canceled   (order with lines)
+    stock   stock.changed                                     (item stock moved)
+            stock.low / stock.restocked                       (reorder point crossed)
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event as sa_event
+from . import models
+from .outbox import dispatcher
+
+ORDERS = "orders"
+STOCK = "stock"
+TOPICS = (ORDERS, STOCK)
+
+_ORDER_EVENT_TYPES = {
+    models.OrderStatus.pending: "order.created",
+    models.OrderStatus.completed: "order.completed",
+    models.OrderStatus.canceled: "order.canceled",
+}
+
+
+def order_event(order: models.Order, type_: Optional[str] = None) -> dict:
+    """Event for an order (lines loaded); the type defaults to its current status."""
+    return {
+        "topic": ORDERS,
+        "type": type_ or _ORDER_EVENT_TYPES[order.status],
+        "data": {
+            "order_id": order.id,
+            "customer_id": order.customer_id,
+            "status": order.status.value,
+            "total": str(order.total),
+            "created_at": order.created_at.isoformat() if order.created_at else None,
+            "items": [
+                {"item_id": line.item_id, "qty": line.qty, "price": str(line.price)}
+                for line in order.items
+            ],
+        },
+    }
+
+
+def stock_events(changes: Iterable[Tuple[models.Item, int, int]],
+                 reorder_points: Optional[Dict[int, int]] = None) -> List[dict]:
+    """Events for (item, stock before, stock after) changes, including reorder-point crossings.
+
+    `reorder_points` holds the previous reorder point of items where it changed too.
+    """
+    reorder_points = reorder_points or {}
+    events = []
+    for item, before, after in changes:
+        point_before = reorder_points.get(item.id, item.reorder_point)
+        data = {"item_id": item.id, "sku": item.sku, "name": item.name, "stock": after, "previous": before,
+                "reorder_point": item.reorder_point}
+        if before != after:
+            events.append({"topic": STOCK, "type": "stock.changed", "data": data})
+        was_low, is_low = before <= point_before, after <= item.reorder_point
+        if is_low and not was_low:
+            events.append({"topic": STOCK, "type": "stock.low", "data": data})
+        elif was_low and not is_low:
+            events.append({"topic": STOCK, "type": "stock.restocked", "data": data})
+    return events
+
+
+def reserved_stock_events(items_map: Dict[int, models.Item], quantities: Dict[int, int],
+                          remaining: Dict[int, int]) -> List[dict]:
+    """Stock events for a reserve_stock() call."""
+    return stock_events(
+        (items_map[item_id], remaining[item_id] + qty, remaining[item_id])
+        for item_id, qty in quantities.items()
+    )
+
+
+def record(db, events: List[dict]):
+    """Add `events` to the outbox in `db`'s transaction (a Session or AsyncSession)."""
+    if not events:
+        return
+    db.add_all([
+        models.OrderEvent(topic=ev["topic"], type=ev["type"], payload=json.dumps(ev["data"], default=str),
+                          worker_id=dispatcher.owner)
+        for ev in events
+    ])
+    # Wake this worker's dispatcher as soon as the rows are visible; others poll
+    session = getattr(db, "sync_session", db)
+    sa_event.listen(session, "after_commit", lambda _: dispatcher.notify(), once=True)
@@ -0,0 +1,108 @@
+"""Opt-in fast path for large list responses.
+
+Normally a list endpoint returns ORM objects that FastAPI validates into the
+response_model one row at a time (from_attributes) and then encodes with the
+stdlib JSON encoder. With `FAST_LIST_JSON=true` the items, customers and orders
+lists instead select only the response model's columns as row tuples and encode
+them with orjson. The routes keep their response_model, so the OpenAPI schema
+is unchanged, and the bodies are byte-for-byte the same JSON values: Decimals as
+strings, datetimes in ISO 8601 and enums as their values.
+
+Without orjson installed the stdlib encoder is used with the same conversions.
+"""
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Type
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from . import models, schemas
+from .pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+ENABLED = os.getenv("FAST_LIST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class RowsResponse(Response):
+    """JSON response for plain dicts/lists of DB values, encoded without pydantic."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def scalar_fields(schema: Type[BaseModel]) -> List[str]:
+    """Fields of `schema` read straight from a column (everything but nested lists)."""
+    return [
+        name for name, field in schema.model_fields.items()
+        if getattr(field.annotation, "__origin__", None) is not list
+    ]
+
+
+def _page(rows: Sequence, names: Sequence[str], limit: Optional[int]):
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(names, rows[-1]))
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+    return [dict(zip(names, row)) for row in rows], headers
+
+
+def list_rows(
+    query, model, schema: Type[BaseModel], limit: Optional[int] = None, cursor: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> RowsResponse:
+    """Fast `pagination.paginate` for a filtered legacy Query over `model`."""
+    names = scalar_fields(schema)
+    query = keyset(query.with_entities(*[getattr(model, n) for n in names]), model, cursor)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows, page_headers = _page(query.all(), names, limit)
+    return RowsResponse(rows, headers={**(headers or {}), **page_headers})
+
+
+async def list_orders(db, stmt, limit: Optional[int] = None, cursor: Optional[str] = None) -> RowsResponse:
+    """Fast `pagination.paginate_async` for a filtered select(Order): two column-only queries."""
+    names = scalar_fields(schemas.OrderOut)
+    stmt = keyset(stmt.with_only_columns(*[getattr(models.Order, n) for n in names]), models.Order, cursor)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    orders, headers = _page((await db.execute(stmt)).all(), names, limit)
+
+    line_names = scalar_fields(schemas.OrderItemOut)
+    lines: Dict[int, List[dict]] = {}
+    for order in orders:
+        order["items"] = lines.setdefault(order["id"], [])
+    if orders:
+        rows = await db.execute(
+            select(models.OrderItem.order_id, *[getattr(models.OrderItem, n) for n in line_names])
+            .where(models.OrderItem.order_id.in_(list(lines)))
+            .order_by(models.OrderItem.order_id, models.OrderItem.item_id)
+        )
+        for order_id, *values in rows:
+            lines[order_id].append(dict(zip(line_names, values)))
+    return RowsResponse(orders, headers=headers)
@@ -4,9 +4,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Local imports (keep existing structure)
-from .database import init_db
-from .routes import customers, items, orders, users, settings
-from .websocket import orders_ws
+from .database import check_schema, get_engine
+from .routes import customers, items, orders, users, settings, reports, search
+from .websocket import orders_ws, manager as ws_manager
+from .outbox import dispatcher as outbox_dispatcher
+from .alerts import alerter as low_stock_alerter
+from .pagination import NEXT_CURSOR_HEADER
+from .auth import user_cache, token_verifier
+from .settings_service import settings_service
+from .passwords import hasher as password_hasher
+from . import db_profiling
 
 app = FastAPI(title="BillFinity Backend")
 logger = logging.getLogger(__name__)
@@ -31,18 +38,47 @@ app.add_middleware(
     allow_credentials=_allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"] + (
+        ["X-DB-Queries", "X-DB-Time-Ms", "X-DB-Pool-Wait-Ms"] if db_profiling.DEBUG_HEADERS else []
+    ),
 )
 
+# --- Opt-in per-request SQL profiling (DB_PROFILE / DB_DEBUG_HEADERS) ---
+if db_profiling.ENABLED:
+    app.add_middleware(db_profiling.ProfilingMiddleware)
+
 
 # --- Lifespan hooks ---
 @app.on_event("startup")
 def _on_startup():
+    # One query against alembic_version; migrations run at deploy (python -m app.migrate upgrade)
+    check_schema()
     try:
-        init_db()
+        # Warm the settings snapshot (creates the singleton row on first boot)
+        settings_service.snapshot()
     except Exception:
-        logger.exception("DB init failed")
-        # Don't crash app if DB migrations fail on first boot
-        pass
+        logger.exception("Settings warm-up failed")
+    settings_service.start()
+
+
+@app.on_event("startup")
+async def _start_ws_fanout():
+    await ws_manager.start()
+    await outbox_dispatcher.start()
+    await low_stock_alerter.start()
+
+
+@app.on_event("shutdown")
+def _on_shutdown():
+    settings_service.stop()
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def _stop_ws_fanout():
+    await low_stock_alerter.stop()
+    await outbox_dispatcher.stop()
+    await ws_manager.stop()
 
 
 # --- Health / Root ---
@@ -51,6 +87,20 @@ def health():
     return {"ok": True, "service": "BillFinity API"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "auth_user_cache": user_cache.stats(),
+        "jwt_verification_cache": token_verifier.cache.stats(),
+        "settings_cache": settings_service.stats(),
+        "websocket": ws_manager.metrics(),
+        "outbox": outbox_dispatcher.metrics(),
+        "low_stock_alerts": low_stock_alerter.metrics(),
+        "password_hashing": password_hasher.metrics(),
+        "db": {"pool": get_engine().pool.status(), **(db_profiling.totals.stats() if db_profiling.ENABLED else {})},
+    }
+
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "service": "BillFinity API"}
@@ -62,6 +112,8 @@ app.include_router(items.router)
 app.include_router(orders.router)
 app.include_router(users.router)
 app.include_router(settings.router)
+app.include_router(reports.router)
+app.include_router(search.router)
 
 
 # --- WebSocket endpoint ---
@@ -0,0 +1,113 @@
+"""Schema migrations (Alembic; scripts in backend/migrations).
+
+    python -m app.migrate upgrade     # to the newest revision
+    python -m app.migrate current     # revision the database is at
+
+Run `upgrade` once per deploy, before starting workers: workers only check
+that the database is at database.SCHEMA_REVISION. A database created by the
+old create_all-at-boot startup has tables but no `alembic_version`. `upgrade`
+first adds whatever columns and indexes it is missing, then stamps it with the
+baseline revision. Other Alembic commands (`revision --autogenerate`,
+`downgrade`, ...) work as usual with `alembic -c backend/alembic.ini`.
+"""
+import argparse
+import logging
+import pathlib
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from . import database
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = pathlib.Path(__file__).resolve().parents[1] / "alembic.ini"
+BASELINE = "0001"
+# Tables created by migrations after the baseline, left for them to create
+_POST_BASELINE_TABLES = {"table_versions"}
+
+# Columns added to existing tables by hand before migrations existed (PostgreSQL)
+_LEGACY_PATCHES = [
+    "ALTER TABLE items ADD COLUMN IF NOT EXISTS gst_rate INTEGER NOT NULL DEFAULT 18",
+    "ALTER TABLE settings ADD COLUMN IF NOT EXISTS phone VARCHAR(64)",
+    "ALTER TABLE settings ADD COLUMN IF NOT EXISTS email VARCHAR(255)",
+    "ALTER TABLE settings ADD COLUMN IF NOT EXISTS gstin VARCHAR(64)",
+    "ALTER TABLE settings ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE orders ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(100)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_orders_idempotency_key ON orders (idempotency_key)",
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS phone_norm VARCHAR(20)",
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS email_norm VARCHAR(255)",
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS gstin_norm VARCHAR(32)",
+    # Backfill the normalized lookup keys (see models.Customer)
+    "UPDATE customers SET "
+    "phone_norm = NULLIF(RIGHT(regexp_replace(COALESCE(phone, ''), '\\D', '', 'g'), 10), ''), "
+    "email_norm = NULLIF(lower(trim(COALESCE(email, ''))), ''), "
+    "gstin_norm = NULLIF(upper(regexp_replace(COALESCE(gstin, ''), '\\s', '', 'g')), '') "
+    "WHERE phone_norm IS NULL AND email_norm IS NULL AND gstin_norm IS NULL "
+    "AND (phone IS NOT NULL OR email IS NOT NULL OR gstin IS NOT NULL)",
+]
+
+
+def _config(connection=None):
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    # Keep the app's logging setup when migrating from inside it
+    config.attributes["configure_logger"] = connection is None
+    return config
+
+
+def head() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_config()).get_current_head()
+
+
+def _adopt(conn):
+    """Bring a pre-Alembic (create_all) database up to the baseline schema."""
+    from . import models  # noqa: F401
+
+    logger.warning("Adopting a database created before migrations; stamping it at %s", BASELINE)
+    baseline_tables = [
+        t for t in database.Base.metadata.sorted_tables if t.name not in _POST_BASELINE_TABLES
+    ]
+    database.Base.metadata.create_all(bind=conn, tables=baseline_tables)
+    if conn.dialect.name == "postgresql":
+        for statement in _LEGACY_PATCHES:
+            conn.execute(text(statement))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, column in database.TRIGRAM_INDEXES:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)"
+            ))
+    # create_all only builds indexes for new tables
+    for table in baseline_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def upgrade(revision: str = "head"):
+    from alembic import command
+
+    with database.get_engine().begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        if "alembic_version" not in tables and "items" in tables:
+            _adopt(conn)
+            command.stamp(_config(conn), BASELINE)
+        command.upgrade(_config(conn), revision)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.migrate", description="Migrate the database schema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("upgrade", help="Upgrade to the newest revision (adopting pre-migration databases)")
+    sub.add_parser("current", help="Print the database's revision")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        upgrade()
+    with database.get_engine().connect() as conn:
+        print(f"database at {database.schema_revision(conn) or '(none)'}, code expects {database.SCHEMA_REVISION}")
+
+
+if __name__ == "__main__":
+    main()
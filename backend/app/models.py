@@ -1,12 +1,14 @@
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, Enum, Numeric, Boolean, UniqueConstraint
+    Column, Integer, String, Text, Date, DateTime, ForeignKey, Enum, Numeric, Boolean, UniqueConstraint, Index, text,
+    func, select,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import aliased, column_property, relationship, validates
 from sqlalchemy import UniqueConstraint
 from .database import Base
 import enum
+import re
 
 class TimestampMixin:
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -17,8 +19,26 @@ class OrderStatus(str, enum.Enum):
     completed = "completed"
     canceled = "canceled"
 
+def normalize_phone(value):
+    """Digits only, keeping the last 10 (drops +91 / leading 0 prefixes)."""
+    digits = re.sub(r"\D", "", value or "")
+    return digits[-10:] or None
+
+def normalize_email(value):
+    return (value or "").strip().lower() or None
+
+def normalize_gstin(value):
+    return re.sub(r"\s", "", value or "").upper() or None
+
+_CENTS = Decimal("0.01")
+
+def line_gst(price, qty, gst_rate):
+    """GST on an order line: the rate applied to the line amount, both rounded to paise."""
+    return ((price * qty).quantize(_CENTS) * gst_rate / 100).quantize(_CENTS)
+
 class User(Base, TimestampMixin):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(120), nullable=False)
@@ -29,6 +49,11 @@ class User(Base, TimestampMixin):
 
 class Customer(Base, TimestampMixin):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_created_at_id", "created_at", "id"),
+        # Collection version and ?updated_since= delta sync (app.sync)
+        Index("ix_customers_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(120), nullable=False)
@@ -37,12 +62,35 @@ class Customer(Base, TimestampMixin):
     gstin = Column(String(32), nullable=True)
     company_name = Column(String(255), nullable=True)
     address = Column(String(500), nullable=True)
+    # Normalized lookup keys (checkout / search), kept in sync by the validator below
+    phone_norm = Column(String(20), index=True, nullable=True)
+    email_norm = Column(String(255), index=True, nullable=True)
+    gstin_norm = Column(String(32), index=True, nullable=True)
 
     orders = relationship("Order", back_populates="customer")
 
+    _NORMALIZERS = {"phone": normalize_phone, "email": normalize_email, "gstin": normalize_gstin}
+
+    @staticmethod
+    def lookup_keys(data: dict) -> dict:
+        """Normalized key columns for a dict of customer fields (for Core inserts)."""
+        return {f"{f}_norm": fn(data.get(f)) for f, fn in Customer._NORMALIZERS.items()}
+
+    @validates("phone", "email", "gstin")
+    def _sync_lookup_key(self, key, value):
+        setattr(self, f"{key}_norm", self._NORMALIZERS[key](value))
+        return value
+
 class Item(Base, TimestampMixin):
     __tablename__ = "items"
-    __table_args__ = (UniqueConstraint("sku", name="uq_item_sku"),)
+    __table_args__ = (
+        UniqueConstraint("sku", name="uq_item_sku"),
+        # Keyset pagination (created_at, id) and category-filtered listing
+        Index("ix_items_created_at_id", "created_at", "id"),
+        Index("ix_items_category_created_at_id", "category", "created_at", "id"),
+        # Collection version and ?updated_since= delta sync (app.sync)
+        Index("ix_items_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -71,11 +119,19 @@ class Item(Base, TimestampMixin):
 
 class Order(Base, TimestampMixin):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination (created_at, id), optionally narrowed by status or customer
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_customer_created_at_id", "customer_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id", ondelete="RESTRICT"), nullable=False)
     total = Column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
     status = Column(Enum(OrderStatus), nullable=False, default=OrderStatus.pending)
+    # Client-supplied key for replayed POS/offline submissions (see POST /orders/bulk)
+    idempotency_key = Column(String(100), nullable=True, unique=True)
 
     customer = relationship("Customer", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -87,10 +143,19 @@ class OrderItem(Base):
     item_id = Column(Integer, ForeignKey("items.id", ondelete="RESTRICT"), primary_key=True)
     qty = Column(Integer, nullable=False)
     price = Column(Numeric(12, 2), nullable=False)  # unit price at time of order
+    # GST rate and amount at time of order; rollups and receipts use these, not items.gst_rate
+    gst_rate = Column(Integer, nullable=False)
+    gst = Column(Numeric(12, 2), nullable=False)
 
     order = relationship("Order", back_populates="items")
     item = relationship("Item", back_populates="order_items")
 
+    @classmethod
+    def line(cls, item_id, qty, price, gst_rate, **kwargs):
+        """A line priced and taxed at the item's current price and GST rate."""
+        return cls(item_id=item_id, qty=qty, price=price, gst_rate=gst_rate,
+                   gst=line_gst(price, qty, gst_rate), **kwargs)
+
 class Setting(Base, TimestampMixin):
     __tablename__ = "settings"
 
@@ -104,6 +169,8 @@ class Setting(Base, TimestampMixin):
     email_updates = Column(Boolean, default=True, nullable=False)
     sms_alerts = Column(Boolean, default=False, nullable=False)
     low_stock_reminders = Column(Boolean, default=True, nullable=False)
+    # Bumped on every update; cached copies compare versions (see settings_service)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 
 class ItemComboComponent(Base):
@@ -115,3 +182,99 @@ class ItemComboComponent(Base):
 
     combo_item = relationship("Item", foreign_keys=[combo_item_id], back_populates="components")
     component_item = relationship("Item", foreign_keys=[component_item_id], back_populates="used_in_combos")
+
+
+class ItemComboLeaf(Base):
+    """Flattened bill of materials of a combo: stock-keeping items consumed per unit.
+
+    Nested combos are expanded, so ordering never walks item_combo_components;
+    maintained by app.combos.
+    """
+    __tablename__ = "item_combo_leaves"
+    __table_args__ = (Index("ix_item_combo_leaves_leaf", "leaf_item_id"),)
+
+    combo_item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    leaf_item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    qty = Column(Integer, nullable=False)
+
+
+# Units of a combo its components can currently cover (NULL for plain items)
+_LeafItem = aliased(Item)
+Item.combo_available = column_property(
+    select(func.min(_LeafItem.stock // ItemComboLeaf.qty))
+    .where(ItemComboLeaf.combo_item_id == Item.id, _LeafItem.id == ItemComboLeaf.leaf_item_id)
+    .correlate_except(ItemComboLeaf, _LeafItem)
+    .scalar_subquery()
+)
+
+# Items at or below their reorder point, most short first (GET /items/low-stock);
+# partial, so it only holds the handful of items that need reordering
+Index(
+    "ix_items_low_stock", Item.stock - Item.reorder_point, Item.id,
+    postgresql_where=Item.stock <= Item.reorder_point, sqlite_where=Item.stock <= Item.reorder_point,
+)
+
+
+class OrderEvent(Base):
+    """Transactional outbox: events written with the change, published by app.outbox."""
+    __tablename__ = "order_events"
+    __table_args__ = (
+        # Only undispatched rows are scanned by the dispatcher
+        Index("ix_order_events_pending", "id",
+              postgresql_where=text("dispatched_at IS NULL"), sqlite_where=text("dispatched_at IS NULL")),
+        Index("ix_order_events_dispatched_at", "dispatched_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(String(32), nullable=False)
+    type = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON-encoded event data
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    dispatched_at = Column(DateTime, nullable=True)
+    # Writing worker when events only reach that worker's clients (no REDIS_URL)
+    worker_id = Column(String(64), nullable=True)
+
+
+class Tombstone(Base):
+    """A deleted catalogue row, so ?updated_since= delta syncs can report it (see app.sync)."""
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_table_deleted_at", "table_name", "deleted_at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TableVersion(Base):
+    """Write counter per synced table, bumped in the writing transaction (see app.sync)."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# ---------- Reporting rollups ----------
+# Maintained incrementally by app.rollup inside the order transactions;
+# `python -m app.rollup rebuild` recomputes them from orders/order_items.
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)  # orders containing this item
+    qty = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+    gst = Column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+
+class DailyOrderStats(Base):
+    """Order-level counterpart of DailySales (order counts can't be summed across items)."""
+    __tablename__ = "daily_order_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+    gst = Column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
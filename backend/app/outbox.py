@@ -0,0 +1,203 @@
+"""Dispatcher for the order_events transactional outbox.
+
+Routes write events with events.record() in the same transaction as the order or
+stock change, so an event exists exactly when its change committed and request
+latency no longer depends on the number of listeners. OutboxDispatcher runs on
+each worker's event loop: it reads pending rows in id order, OUTBOX_BATCH_SIZE at
+a time, publishes them through the WebSocket manager (waiting for the backbone to
+accept them) and only then marks them dispatched. A crash or publish failure in
+between republishes the batch, i.e. delivery is at-least-once.
+
+Commits on this worker wake the dispatcher immediately; everything else is picked
+up by polling every OUTBOX_POLL_MS. On PostgreSQL batches are claimed with
+`FOR UPDATE SKIP LOCKED`, so several workers can dispatch without publishing the
+same row twice. Dispatched rows are deleted after OUTBOX_RETENTION_HOURS.
+
+Without REDIS_URL a worker's publishes reach only its own clients, so events
+are tagged with the writing worker (`worker_id`) and each dispatcher claims its
+own, untagged ones (written outside a worker) and those left undispatched for
+OUTBOX_ORPHAN_AFTER_S by a worker that has gone away.
+
+Legacy clients still get one `order_update` message per batch of created orders
+(the `{"bulk": true, ...}` form when a batch holds several). In-process consumers
+(e.g. app.alerts) register with `add_handler` and see each batch once it is marked.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from sqlalchemy import delete, func, or_, select, update
+from . import models
+from .database import AsyncSessionLocal, SessionLocal
+from .websocket import LocalBackbone, manager
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+POLL_MS = int(os.getenv("OUTBOX_POLL_MS", "500"))
+RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+PURGE_INTERVAL_S = 300
+MAX_BACKOFF_S = 10.0
+ORPHAN_AFTER_S = float(os.getenv("OUTBOX_ORPHAN_AFTER_S", "60"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _envelope(row: models.OrderEvent) -> str:
+    # The payload is already JSON: splice in the outbox id instead of re-encoding it
+    payload = row.payload
+    data = '{"event_id":%d%s%s' % (row.id, "," if payload != "{}" else "", payload[1:])
+    return '{"topic":%s,"type":%s,"data":%s}' % (json.dumps(row.topic), json.dumps(row.type), data)
+
+
+def _legacy_update(rows: List[models.OrderEvent]) -> Optional[str]:
+    summaries = []
+    for row in rows:
+        if row.type == "order.created":
+            data = json.loads(row.payload)
+            data.pop("items", None)
+            summaries.append(data)
+    if not summaries:
+        return None
+    if len(summaries) == 1:
+        return json.dumps({"type": "order_update", "data": summaries[0]})
+    return json.dumps({"type": "order_update", "data": {"bulk": True, "count": len(summaries), "orders": summaries}})
+
+
+class OutboxDispatcher:
+    def __init__(self, batch_size: int = BATCH_SIZE, poll_ms: int = POLL_MS):
+        self.batch_size = batch_size
+        self.poll = poll_ms / 1000
+        self.stats = {"dispatched": 0, "batches": 0, "errors": 0, "last_lag_ms": None, "max_lag_ms": 0.0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+        self._handlers: List[Callable[[List[models.OrderEvent]], None]] = []
+
+    @property
+    def owner(self) -> Optional[str]:
+        """worker_id for events written here: set only when publishes stay in this process."""
+        return WORKER_ID if isinstance(manager.backbone, LocalBackbone) else None
+
+    def add_handler(self, handler: Callable[[List[models.OrderEvent]], None]):
+        """Call `handler(rows)` with every dispatched batch (on the dispatcher's loop)."""
+        self._handlers.append(handler)
+
+    async def start(self):
+        """Run on the current event loop (one per worker) unless already running on one."""
+        if self._loop is not None and not self._loop.is_closed() and self._loop.is_running():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._loop is not asyncio.get_running_loop():
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+
+    def notify(self):
+        """Wake the dispatcher (callable from any thread, e.g. a session's after_commit)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake.set()
+        else:
+            loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        backoff = self.poll
+        while True:
+            try:
+                while await self.dispatch_batch() == self.batch_size:
+                    pass
+                await self._maybe_purge()
+                backoff = self.poll
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                logger.warning("Outbox dispatch failed; retrying in %.1fs", backoff, exc_info=True)
+                backoff = min(backoff * 2, MAX_BACKOFF_S)
+            try:
+                await asyncio.wait_for(self._wake.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def dispatch_batch(self) -> int:
+        """Publish and mark one batch of pending events; returns how many were dispatched."""
+        pending = select(models.OrderEvent).where(models.OrderEvent.dispatched_at.is_(None))
+        if self.owner is not None:
+            pending = pending.where(or_(
+                models.OrderEvent.worker_id == self.owner,
+                models.OrderEvent.worker_id.is_(None),
+                models.OrderEvent.created_at < datetime.utcnow() - timedelta(seconds=ORPHAN_AFTER_S),
+            ))
+        async with AsyncSessionLocal() as db:
+            rows = (await db.scalars(
+                pending.order_by(models.OrderEvent.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+            for row in rows:
+                await manager.publish_confirmed(_envelope(row), row.topic)
+            legacy = _legacy_update(rows)
+            if legacy is not None:
+                await manager.publish_confirmed(legacy)
+            now = datetime.utcnow()
+            await db.execute(
+                update(models.OrderEvent)
+                .where(models.OrderEvent.id.in_([row.id for row in rows]))
+                .values(dispatched_at=now)
+            )
+            await db.commit()
+        for handler in self._handlers:
+            try:
+                handler(rows)
+            except Exception:
+                logger.exception("Outbox handler %r failed", handler)
+        lag_ms = (now - rows[0].created_at).total_seconds() * 1000
+        self.stats["dispatched"] += len(rows)
+        self.stats["batches"] += 1
+        self.stats["last_lag_ms"] = round(lag_ms, 1)
+        self.stats["max_lag_ms"] = round(max(self.stats["max_lag_ms"], lag_ms), 1)
+        return len(rows)
+
+    async def _maybe_purge(self):
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_S:
+            return
+        self._last_purge = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(hours=RETENTION_HOURS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(models.OrderEvent).where(models.OrderEvent.dispatched_at < cutoff))
+            await db.commit()
+
+    def metrics(self) -> dict:
+        db = SessionLocal()
+        try:
+            pending = db.scalar(
+                select(func.count()).select_from(models.OrderEvent).where(models.OrderEvent.dispatched_at.is_(None))
+            )
+        finally:
+            db.close()
+        return {**self.stats, "pending": pending, "running": self._task is not None and not self._task.done()}
+
+
+dispatcher = OutboxDispatcher()
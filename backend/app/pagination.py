@@ -0,0 +1,64 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+# Keyset pagination over (created_at DESC, id DESC).
+# The cursor is an opaque token carrying the last row's sort key; the next page
+# is handed back in the X-Next-Cursor header so list bodies stay plain arrays.
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset(query, model, cursor: Optional[str] = None):
+    """Order `query` newest first and skip everything up to and including `cursor`."""
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        ts, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < ts,
+            and_(model.created_at == ts, model.id < last_id),
+        ))
+    return query
+
+
+def paginate(query, model, response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    query = keyset(query, model, cursor)
+    if limit is None:
+        # Legacy unpaginated behaviour for existing clients
+        return query.all()
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
+
+
+async def paginate_async(db, stmt, model, response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """`paginate` for a Core/ORM select executed on an AsyncSession."""
+    stmt = keyset(stmt, model, cursor)
+    if limit is None:
+        return (await db.scalars(stmt)).all()
+    rows = (await db.scalars(stmt.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -0,0 +1,110 @@
+"""Password hashing off the request threads.
+
+A bcrypt hash or verify burns 100-300 ms of CPU. Run inline, a burst of logins
+at shift change fills Starlette's threadpool and stalls every sync endpoint, so
+the users routes await `hasher` instead. It runs the work in a dedicated pool
+of PASSWORD_HASH_WORKERS processes (default: min(4, CPUs)). When
+PASSWORD_HASH_QUEUE jobs are already waiting for a worker, new ones fail at
+once with 503 and Retry-After rather than queueing behind them.
+PASSWORD_HASH_WORKERS=0 keeps the same limit but hashes in threads, for hosts
+that can't start processes.
+
+BCRYPT_ROUNDS sets the cost of new hashes (default 12). Successful logins
+rehash passwords stored at any other cost, so raising it upgrades users as they
+sign in.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+RETRY_AFTER_S = 1
+
+_contexts = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    # Built once per process (and per cost); pool workers receive only the rounds
+    if rounds not in _contexts:
+        _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return _contexts[rounds]
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_and_update(password: str, password_hash: str, rounds: int = BCRYPT_ROUNDS) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash if `password_hash` isn't at `rounds`) for a bcrypt hash."""
+    return _context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = WORKERS, queue_limit: int = QUEUE_LIMIT, rounds: int = BCRYPT_ROUNDS):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rounds = rounds
+        self.stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                # spawn: forking a process that runs threads and event loops isn't safe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max(1, os.cpu_count() or 1), thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= max(1, self.workers) + self.queue_limit:
+                self.stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many password checks in progress; retry shortly",
+                    headers={"Retry-After": str(RETRY_AFTER_S)},
+                )
+            self._in_flight += 1
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        self.stats["hashed"] += 1
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        self.stats["verified"] += 1
+        ok, new_hash = await self._run(verify_and_update, password, password_hash, self.rounds)
+        if new_hash:
+            self.stats["rehashed"] += 1
+        return ok, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self) -> dict:
+        return {**self.stats, "in_flight": self._in_flight, "workers": self.workers, "rounds": self.rounds}
+
+
+hasher = PasswordHasher()
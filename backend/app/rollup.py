@@ -0,0 +1,160 @@
+"""Daily sales rollups.
+
+`daily_sales` (per day, item and status) and `daily_order_stats` (per day and
+status) are kept current by `record_order` / `move_order` from within the order
+transactions, so reports read a table that grows with days rather than orders.
+Both sum the GST stored on each order line (see models.line_gst), so they agree
+with each other and don't drift when an item's rate changes. `rebuild`
+recomputes both from history in bulk:
+
+    python -m app.rollup rebuild [--since 2024-01-01]
+"""
+import argparse
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from . import models
+
+_CENTS = Decimal("0.01")
+
+
+def _upsert(db: Session, model, rows: Iterable[dict], keys, counters):
+    """Add `counters` of each row onto the existing rollup row (or insert it)."""
+    rows = list(rows)
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters},
+        )
+        db.execute(stmt)
+        return
+    # Generic fallback: read-modify-write per key
+    for row in rows:
+        existing = db.get(model, tuple(row[k] for k in keys))
+        if existing is None:
+            db.add(model(**row))
+        else:
+            for c in counters:
+                setattr(existing, c, getattr(existing, c) + row[c])
+    db.flush()
+
+
+def _apply(db: Session, entries: Iterable[Tuple[models.Order, models.OrderStatus, int]]):
+    """Fold (order, status, +1/-1) entries into one upsert per rollup table."""
+    per_item: Dict[tuple, dict] = {}
+    per_day: Dict[tuple, dict] = {}
+    for order, status, sign in entries:
+        day = (order.created_at or datetime.utcnow()).date()
+        totals = per_day.setdefault((day, status), {
+            "day": day, "status": status, "orders": 0, "revenue": Decimal("0.00"), "gst": Decimal("0.00"),
+        })
+        totals["orders"] += sign
+        for line in order.items:
+            revenue = (line.price * line.qty).quantize(_CENTS)
+            gst = line.gst
+            row = per_item.setdefault((day, line.item_id, status), {
+                "day": day, "item_id": line.item_id, "status": status,
+                "orders": 0, "qty": 0, "revenue": Decimal("0.00"), "gst": Decimal("0.00"),
+            })
+            row["orders"] += sign
+            row["qty"] += sign * line.qty
+            row["revenue"] += sign * revenue
+            row["gst"] += sign * gst
+            totals["revenue"] += sign * revenue
+            totals["gst"] += sign * gst
+    _upsert(db, models.DailySales, per_item.values(),
+            keys=["day", "item_id", "status"], counters=["orders", "qty", "revenue", "gst"])
+    _upsert(db, models.DailyOrderStats, per_day.values(),
+            keys=["day", "status"], counters=["orders", "revenue", "gst"])
+
+
+def record_orders(db: Session, orders: List[models.Order]):
+    """Count newly created orders (with their lines added) under their current status."""
+    _apply(db, [(order, order.status, 1) for order in orders])
+
+
+def record_order(db: Session, order: models.Order):
+    record_orders(db, [order])
+
+
+def move_order(db: Session, order: models.Order, old_status: models.OrderStatus, new_status: models.OrderStatus):
+    """Move an order's contribution from `old_status` to `new_status`.
+
+    Lines carry the GST charged when the order was placed, so the amount taken off
+    `old_status` is exactly what record_order added even if the rate changed since.
+    """
+    if old_status == new_status:
+        return
+    _apply(db, [(order, old_status, -1), (order, new_status, 1)])
+
+
+def rebuild(db: Session, since: Optional[date] = None):
+    """Recompute the rollups from orders/order_items with two INSERT ... SELECT statements."""
+    Order, OrderItem = models.Order, models.OrderItem
+    day = func.date(Order.created_at)
+    line_revenue = OrderItem.qty * OrderItem.price
+
+    for model in (models.DailySales, models.DailyOrderStats):
+        stmt = delete(model)
+        if since:
+            stmt = stmt.where(model.day >= since)
+        db.execute(stmt)
+
+    per_item = (
+        select(
+            day, OrderItem.item_id, Order.status, func.count(),
+            func.sum(OrderItem.qty), func.sum(line_revenue), func.sum(OrderItem.gst),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .group_by(day, OrderItem.item_id, Order.status)
+    )
+    per_order = (
+        select(
+            day, Order.status, func.count(func.distinct(Order.id)),
+            func.coalesce(func.sum(line_revenue), 0), func.coalesce(func.sum(OrderItem.gst), 0),
+        )
+        .select_from(Order)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .group_by(day, Order.status)
+    )
+    if since:
+        per_item = per_item.where(Order.created_at >= since)
+        per_order = per_order.where(Order.created_at >= since)
+
+    db.execute(insert(models.DailySales).from_select(
+        ["day", "item_id", "status", "orders", "qty", "revenue", "gst"], per_item))
+    db.execute(insert(models.DailyOrderStats).from_select(
+        ["day", "status", "orders", "revenue", "gst"], per_order))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.rollup", description="Manage daily sales rollups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rb = sub.add_parser("rebuild", help="Recompute rollups from order history")
+    rb.add_argument("--since", type=date.fromisoformat, default=None, help="Only rebuild days on/after YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal, check_schema
+    check_schema()
+    db = SessionLocal()
+    try:
+        rebuild(db, since=args.since)
+        db.commit()
+    finally:
+        db.close()
+    print("daily sales rollup rebuilt" + (f" since {args.since}" if args.since else ""))
+
+
+if __name__ == "__main__":
+    main()
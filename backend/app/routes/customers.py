@@ -1,15 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional, Union
 from ..database import get_db
-from .. import models, schemas
+from .. import models, schemas, bulk_io, fast_json, sync
 from ..auth import get_current_user
+from ..pagination import MAX_PAGE_SIZE, paginate
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
-@router.get("/", response_model=List[schemas.CustomerOut])
-def list_customers(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return db.query(models.Customer).order_by(models.Customer.created_at.desc()).all()
+@router.get("/", response_model=Union[List[schemas.CustomerOut], schemas.CustomerDelta])
+def list_customers(
+    request: Request,
+    response: Response,
+    format: Optional[Literal["json", "csv", "jsonl"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Customers, with ETag / Last-Modified (304 when unchanged).
+
+    `?updated_since=` returns a CustomerDelta instead (see app.sync).
+    """
+    q = db.query(models.Customer)
+    if date_from:
+        q = q.filter(models.Customer.created_at >= date_from)
+    if date_to:
+        q = q.filter(models.Customer.created_at < date_to)
+    fmt = bulk_io.stream_format(request, format)
+    if fmt:
+        return bulk_io.stream_list(q, models.Customer, schemas.CustomerOut, fmt, limit, cursor)
+    version = sync.collection_version(db, models.Customer, request)
+    if sync.not_modified(request, version):
+        return Response(status_code=304, headers=version.headers)
+    response.headers.update(version.headers)
+    if updated_since is not None:
+        return sync.delta(db, q, models.Customer, updated_since, version)
+    if fast_json.ENABLED:
+        return fast_json.list_rows(q, models.Customer, schemas.CustomerOut, limit, cursor, headers=version.headers)
+    return paginate(q, models.Customer, response, limit, cursor)
+
+EXPORT_COLUMNS = list(schemas.CustomerOut.model_fields)
+
+
+def _insert_customer_batch(db: Session, batch, result: schemas.ImportResult):
+    now = datetime.utcnow()
+    rows = []
+    for _, c in batch:
+        data = c.dict()
+        rows.append({**data, **models.Customer.lookup_keys(data), "created_at": now, "updated_at": now})
+    try:
+        db.execute(insert(models.Customer), rows)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        for row, _ in batch:
+            bulk_io.add_error(result, row, f"Batch rejected by database: {exc.__class__.__name__}")
+        return
+    result.created += len(rows)
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_customers(
+    request: Request,
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Create customers in batches from a CSV (with header) or JSON-lines request body."""
+    result = schemas.ImportResult()
+    batch = []
+    async for row, record, error in bulk_io.iter_records(request, bulk_io.detect_format(request, format)):
+        if error is None:
+            try:
+                batch.append((row, schemas.CustomerCreate(**record)))
+            except ValidationError as exc:
+                error = bulk_io.describe_validation_error(exc)
+        if error is not None:
+            bulk_io.add_error(result, row, error)
+            continue
+        if len(batch) >= bulk_io.IMPORT_BATCH_SIZE:
+            await run_in_threadpool(_insert_customer_batch, db, batch, result)
+            batch = []
+    if batch:
+        await run_in_threadpool(_insert_customer_batch, db, batch, result)
+    return result
+
+
+@router.get("/export")
+def export_customers(format: Literal["csv", "jsonl"] = "csv", user=Depends(get_current_user)):
+    stmt = select(*[getattr(models.Customer, c) for c in EXPORT_COLUMNS]).order_by(models.Customer.id)
+    return bulk_io.stream_rows(stmt, EXPORT_COLUMNS, format, filename="customers")
+
 
 @router.post("/", response_model=schemas.CustomerOut, status_code=status.HTTP_201_CREATED)
 def create_customer(payload: schemas.CustomerCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
@@ -19,6 +108,28 @@ def create_customer(payload: schemas.CustomerCreate, db: Session = Depends(get_d
     db.refresh(c)
     return c
 
+@router.get("/lookup", response_model=List[schemas.CustomerOut])
+def lookup_customers(
+    phone: Optional[str] = None,
+    gstin: Optional[str] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Exact match on normalized phone / GSTIN / email (index probes, newest first)."""
+    keys = {
+        models.Customer.phone_norm: models.normalize_phone(phone),
+        models.Customer.gstin_norm: models.normalize_gstin(gstin),
+        models.Customer.email_norm: models.normalize_email(email),
+    }
+    filters = [col == value for col, value in keys.items() if value]
+    if not filters:
+        raise HTTPException(status_code=400, detail="Provide phone, gstin or email")
+    q = db.query(models.Customer)
+    for f in filters:
+        q = q.filter(f)
+    return q.order_by(models.Customer.id.desc()).limit(10).all()
+
 @router.get("/{customer_id}", response_model=schemas.CustomerOut)
 def get_customer(customer_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
     c = db.query(models.Customer).get(customer_id)
@@ -49,5 +160,6 @@ def delete_customer(customer_id: int, db: Session = Depends(get_db), user=Depend
     if ref:
         raise HTTPException(status_code=400, detail="Cannot delete customer with existing orders")
     db.delete(c)
+    sync.record_deletion(db, models.Customer, customer_id)
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Literal, Optional, Union
 from ..database import get_db
-from .. import models, schemas
+from .. import combos, events, models, schemas, bulk_io, fast_json, sync
 from ..auth import get_current_user
+from ..pagination import MAX_PAGE_SIZE, paginate
 import logging
 from datetime import datetime
 
@@ -16,9 +20,115 @@ deletion_logger.setLevel(logging.INFO)
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
-@router.get("/", response_model=List[schemas.ItemOut])
-def list_items(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return db.query(models.Item).order_by(models.Item.created_at.desc()).all()
+@router.get("/", response_model=Union[List[schemas.ItemOut], schemas.ItemDelta])
+def list_items(
+    request: Request,
+    response: Response,
+    format: Optional[Literal["json", "csv", "jsonl"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    low_stock: bool = False,
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """The catalogue, with ETag / Last-Modified (304 when unchanged).
+
+    `?updated_since=` returns an ItemDelta instead (see app.sync).
+    """
+    q = db.query(models.Item)
+    if category:
+        q = q.filter(models.Item.category == category)
+    if low_stock:
+        q = q.filter(models.Item.stock <= models.Item.reorder_point)
+    fmt = bulk_io.stream_format(request, format)
+    if fmt:
+        return bulk_io.stream_list(q, models.Item, schemas.ItemOut, fmt, limit, cursor)
+    version = sync.collection_version(db, models.Item, request)
+    if sync.not_modified(request, version):
+        return Response(status_code=304, headers=version.headers)
+    response.headers.update(version.headers)
+    if updated_since is not None:
+        return sync.delta(db, q, models.Item, updated_since, version, also_changed=combos.updated_via_leaves)
+    if fast_json.ENABLED:
+        return fast_json.list_rows(q, models.Item, schemas.ItemOut, limit, cursor, headers=version.headers)
+    return paginate(q, models.Item, response, limit, cursor)
+
+
+@router.get("/low-stock", response_model=List[schemas.ItemOut])
+def list_low_stock_items(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Items at or below their reorder point, most short first (read from ix_items_low_stock)."""
+    return (
+        db.query(models.Item)
+        .filter(models.Item.stock <= models.Item.reorder_point)
+        .order_by((models.Item.stock - models.Item.reorder_point).asc(), models.Item.id)
+        .limit(limit)
+        .all()
+    )
+
+EXPORT_COLUMNS = list(schemas.ItemOut.model_fields)
+_IMPORT_UPDATE_COLUMNS = ("name", "category", "price", "stock", "reorder_point", "gst_rate", "updated_at")
+
+
+def _upsert_item_batch(db: Session, batch, result: schemas.ImportResult):
+    # Last row wins when a SKU repeats within the batch
+    rows = {}
+    now = datetime.utcnow()
+    for _, item in batch:
+        data = item.dict()
+        if data.get("gst_rate") is None:
+            data["gst_rate"] = 18
+        rows[item.sku] = {**data, "created_at": now, "updated_at": now}
+    existing = set(db.scalars(select(models.Item.sku).where(models.Item.sku.in_(rows))))
+    try:
+        bulk_io.upsert_rows(db, models.Item, list(rows.values()), "sku", _IMPORT_UPDATE_COLUMNS)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        for row, _ in batch:
+            bulk_io.add_error(result, row, f"Batch rejected by database: {exc.__class__.__name__}")
+        return
+    result.updated += len(existing)
+    result.created += len(rows) - len(existing)
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_items(
+    request: Request,
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Upsert items by SKU from a CSV (with header) or JSON-lines request body."""
+    result = schemas.ImportResult()
+    batch = []
+    async for row, record, error in bulk_io.iter_records(request, bulk_io.detect_format(request, format)):
+        if error is None:
+            try:
+                batch.append((row, schemas.ItemCreate(**record)))
+            except ValidationError as exc:
+                error = bulk_io.describe_validation_error(exc)
+        if error is not None:
+            bulk_io.add_error(result, row, error)
+            continue
+        if len(batch) >= bulk_io.IMPORT_BATCH_SIZE:
+            await run_in_threadpool(_upsert_item_batch, db, batch, result)
+            batch = []
+    if batch:
+        await run_in_threadpool(_upsert_item_batch, db, batch, result)
+    return result
+
+
+@router.get("/export")
+def export_items(format: Literal["csv", "jsonl"] = "csv", user=Depends(get_current_user)):
+    stmt = select(*[getattr(models.Item, c) for c in EXPORT_COLUMNS]).order_by(models.Item.id)
+    return bulk_io.stream_rows(stmt, EXPORT_COLUMNS, format, filename="items")
+
 
 @router.post("/", response_model=schemas.ItemOut, status_code=status.HTTP_201_CREATED)
 def create_item(payload: schemas.ItemCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
@@ -40,10 +150,34 @@ def update_item_stock(item_id: int, payload: schemas.ItemUpdateStock, db: Sessio
     item = db.query(models.Item).get(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
+    before = item.stock
     item.stock = payload.stock
     db.add(item)
     db.flush()
     db.refresh(item)
+    events.record(db, events.stock_events([(item, before, item.stock)]))
+    return item
+
+
+@router.put("/{item_id}/components", response_model=schemas.ItemOut)
+def set_item_components(item_id: int, payload: List[schemas.ComboComponentIn], db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Make an item a combo of `payload` components (nested combos allowed); [] makes it a plain item."""
+    item = db.query(models.Item).get(item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    components: Dict[int, int] = {}
+    for entry in payload:
+        components[entry.item_id] = components.get(entry.item_id, 0) + entry.qty
+    found = {i for (i,) in db.query(models.Item.id).filter(models.Item.id.in_(components)).all()}
+    missing = next((i for i in components if i not in found), None)
+    if missing is not None:
+        raise HTTPException(status_code=404, detail=f"Item id {missing} not found")
+    try:
+        combos.set_components(db, item_id, components)
+    except combos.ComboError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    db.flush()
+    db.refresh(item)
     return item
 
 
@@ -59,6 +193,7 @@ def update_item(item_id: int, payload: schemas.ItemUpdate, db: Session = Depends
         if exists:
             raise HTTPException(status_code=400, detail="SKU already exists")
 
+    before, reorder_point = item.stock, item.reorder_point
     # Apply updates
     for field in ("name", "sku", "category", "price", "stock", "reorder_point", "gst_rate"):
         val = getattr(payload, field, None)
@@ -68,6 +203,7 @@ def update_item(item_id: int, payload: schemas.ItemUpdate, db: Session = Depends
     db.add(item)
     db.flush()
     db.refresh(item)
+    events.record(db, events.stock_events([(item, before, item.stock)], {item.id: reorder_point}))
     return item
 
 
@@ -83,6 +219,7 @@ def delete_item(item_id: int, db: Session = Depends(get_db), user=Depends(get_cu
         raise HTTPException(status_code=400, detail="Cannot delete item referenced by orders")
 
     db.delete(item)
+    sync.record_deletion(db, models.Item, item_id)
     db.commit()
     # audit log
     try:
@@ -1,31 +1,119 @@
+import os
+from datetime import datetime
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from .. import models, schemas
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Literal, Optional
+from ..database import get_async_db, get_db
+from .. import models, schemas, bulk_io, fast_json
 from ..auth import get_current_user
-from ..websocket import broadcast_order_update
+from ..pagination import MAX_PAGE_SIZE, paginate_async
+from ..http_cache import cached_json
+from ..settings_service import settings_service
+from .. import combos, events, rollup
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# Orders committed per transaction by POST /orders/bulk
+BULK_CHUNK_SIZE = int(os.getenv("BULK_ORDER_CHUNK_SIZE", "200"))
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int], items_map: Dict[int, models.Item]) -> Dict[int, int]:
+    """Atomically decrement stock for all items, or raise 409 if any is short.
+
+    One set-based `UPDATE items SET stock = stock - CASE id ... END WHERE id IN (...)
+    AND stock >= CASE id ... END` covers every item; if it matched fewer rows the 409
+    rolls the caller's transaction back, so concurrent checkouts cannot oversell.
+    Every such statement visits rows in the same (index or physical) order, so
+    competing transactions take their row locks in the same order and never deadlock.
+    Returns the new stock level per item.
+    """
+    if not quantities:
+        return {}
+    qty = case(quantities, value=models.Item.id)
+    stmt = (
+        update(models.Item)
+        .where(models.Item.id.in_(quantities), models.Item.stock >= qty)
+        .values(stock=models.Item.stock - qty)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        remaining = dict(db.execute(stmt.returning(models.Item.id, models.Item.stock)).all())
+    else:
+        current = dict(
+            db.query(models.Item.id, models.Item.stock)
+            .filter(models.Item.id.in_(quantities))
+            .order_by(models.Item.id)
+            .with_for_update()
+            .all()
+        )
+        remaining = {}
+        if all(current[item_id] >= n for item_id, n in quantities.items()):
+            db.execute(stmt)
+            remaining = {item_id: current[item_id] - n for item_id, n in quantities.items()}
+    if len(remaining) != len(quantities):
+        it = items_map[min(set(quantities) - set(remaining))]
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Insufficient stock for item {it.name} (SKU: {it.sku})",
+        )
+    # The in-memory stock values are now stale
+    for item_id in quantities:
+        db.expire(items_map[item_id], ["stock", "combo_available"])
+    return remaining
+
 
 @router.get("/", response_model=List[schemas.OrderOut])
-def list_orders(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    orders = db.query(models.Order).order_by(models.Order.created_at.desc()).all()
-    return orders
+async def list_orders(
+    request: Request,
+    response: Response,
+    format: Optional[Literal["json", "csv", "jsonl"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[schemas.OrderStatus] = None,
+    customer_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+):
+    stmt = select(models.Order)
+    if date_from:
+        stmt = stmt.where(models.Order.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Order.created_at < date_to)
+    if status:
+        stmt = stmt.where(models.Order.status == models.OrderStatus(status.value))
+    if customer_id is not None:
+        stmt = stmt.where(models.Order.customer_id == customer_id)
+    fmt = bulk_io.stream_format(request, format)
+    if fmt:
+        # Sync: looks up the next cursor before streaming (see bulk_io.stream_list)
+        return await run_in_threadpool(
+            bulk_io.stream_list, stmt.options(selectinload(models.Order.items)), models.Order, schemas.OrderOut,
+            fmt, limit, cursor,
+        )
+    if fast_json.ENABLED:
+        return await fast_json.list_orders(db, stmt, limit, cursor)
+    # Load line items for the whole page in one extra SELECT instead of one per order
+    stmt = stmt.options(selectinload(models.Order.items))
+    return await paginate_async(db, stmt, models.Order, response, limit, cursor)
 
 
 @router.post("/", response_model=schemas.OrderOut, status_code=status.HTTP_201_CREATED)
-async def create_order(payload: schemas.OrderCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def create_order(payload: schemas.OrderCreate, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     # validate customer
-    customer = db.query(models.Customer).filter(models.Customer.id == payload.customer_id).first()
+    customer = await db.get(models.Customer, payload.customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
 
     # Build items map (id -> Item)
     item_ids = [entry.item_id for entry in payload.items]
-    items = db.query(models.Item).filter(models.Item.id.in_(item_ids)).all()
+    items = (await db.scalars(select(models.Item).where(models.Item.id.in_(item_ids)))).all()
     items_map = {it.id: it for it in items}
 
     # Ensure all items exist
@@ -33,54 +121,294 @@ async def create_order(payload: schemas.OrderCreate, db: Session = Depends(get_d
         if entry.item_id not in items_map:
             raise HTTPException(status_code=404, detail=f"Item id {entry.item_id} not found")
 
+    # Merge repeated lines for the same item (order_items is keyed by order_id, item_id)
+    quantities: Dict[int, int] = {}
+    for entry in payload.items:
+        quantities[entry.item_id] = quantities.get(entry.item_id, 0) + entry.qty
+
+    # Combos reserve their (flattened) components rather than their own stock
+    bom, leaves = await db.run_sync(combos.load, quantities)
+    needed = combos.demand(bom, quantities)
+    stock_items = {**leaves, **items_map}
+    remaining = await db.run_sync(reserve_stock, needed, stock_items)
+
     total = Decimal("0.00")
-    order = models.Order(customer_id=payload.customer_id, status=models.OrderStatus.pending)
+    order = models.Order(customer_id=payload.customer_id, status=models.OrderStatus.pending, items=[])
     db.add(order)
-    db.flush()  # to get order.id
+    await db.flush()  # to get order.id
 
     # process line items
-    for entry in payload.items:
-        it = items_map[entry.item_id]
-        if it.stock < entry.qty:
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for item {it.name} (SKU: {it.sku})")
+    for item_id, qty in quantities.items():
+        it = items_map[item_id]
         line_price = it.price
-        total += (line_price * entry.qty)
-
-        oi = models.OrderItem(order_id=order.id, item_id=it.id, qty=entry.qty, price=line_price)
-        db.add(oi)
+        total += (line_price * qty)
 
-        # reduce stock
-        it.stock = it.stock - entry.qty
-        db.add(it)
+        oi = models.OrderItem.line(it.id, qty, line_price, it.gst_rate, order_id=order.id)
+        order.items.append(oi)
 
     order.total = total
-    db.add(order)
-    db.commit()
-    db.refresh(order)
-
-    # Broadcast the update (async)
-    try:
-        await broadcast_order_update({
-            "order_id": order.id,
-            "customer_id": order.customer_id,
-            "total": str(order.total),
-            "status": order.status.value,
-            "created_at": order.created_at.isoformat()
-        })
-    except Exception:
-        # Don't fail the request if WS broadcast fails; just continue.
-        pass
+    await db.run_sync(lambda session: rollup.record_order(session, order))
+    events.record(db, [events.order_event(order), *events.reserved_stock_events(stock_items, needed, remaining)])
+    await db.commit()
+    return order
+
+
+def _insert_order_chunk(db: Session, chunk, items_map: Dict[int, models.Item], bom: combos.BillOfMaterials,
+                        prices: Dict[int, Decimal], gst_rates: Dict[int, int], results: dict):
+    """Reserve stock for, insert and record outbox events for one chunk of validated bulk entries."""
+    needs = {idx: combos.demand(bom, quantities) for idx, _, quantities in chunk}
+    demand: Dict[int, int] = {}
+    for needed in needs.values():
+        for item_id, qty in needed.items():
+            demand[item_id] = demand.get(item_id, 0) + qty
+
+    # Lock the chunk's items once (in id order) and allocate stock entry by entry
+    available = dict(
+        db.query(models.Item.id, models.Item.stock)
+        .filter(models.Item.id.in_(demand))
+        .order_by(models.Item.id)
+        .with_for_update()
+        .all()
+    )
+    accepted = []
+    used: Dict[int, int] = {}
+    for idx, entry, quantities in chunk:
+        needed = needs[idx]
+        short = next((i for i in sorted(needed) if available[i] < needed[i]), None)
+        if short is not None:
+            it = items_map[short]
+            results[idx] = schemas.BulkOrderResult(
+                idempotency_key=entry.idempotency_key, status="error",
+                detail=f"Insufficient stock for item {it.name} (SKU: {it.sku})",
+            )
+            continue
+        for item_id, qty in needed.items():
+            available[item_id] -= qty
+            used[item_id] = used.get(item_id, 0) + qty
+        accepted.append((idx, entry, quantities))
+    if not accepted:
+        return
+
+    remaining = reserve_stock(db, used, items_map)
+
+    orders = []
+    for idx, entry, quantities in accepted:
+        lines = [
+            models.OrderItem.line(item_id, qty, prices[item_id], gst_rates[item_id])
+            for item_id, qty in quantities.items()
+        ]
+        orders.append(models.Order(
+            customer_id=entry.customer_id,
+            status=models.OrderStatus.pending,
+            idempotency_key=entry.idempotency_key,
+            total=sum((line.price * line.qty for line in lines), Decimal("0.00")),
+            items=lines,
+        ))
+    db.add_all(orders)
+    db.flush()  # batched INSERTs for orders, then order_items
+    rollup.record_orders(db, orders)
+
+    for (idx, entry, _), order in zip(accepted, orders):
+        results[idx] = schemas.BulkOrderResult(
+            idempotency_key=entry.idempotency_key, status="created", order_id=order.id, total=order.total,
+        )
+    events.record(db, [
+        *(events.order_event(order) for order in orders),
+        *events.reserved_stock_events(items_map, used, remaining),
+    ])
+
+
+@router.post("/bulk", response_model=List[schemas.BulkOrderResult])
+def create_orders_bulk(
+    payload: schemas.BulkOrderCreate,
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Ingest a batch of orders (e.g. an offline POS replay) keyed by client idempotency keys.
+
+    Customers, items and known keys are each resolved with a single query, orders are
+    inserted in chunks of `chunk_size` per transaction together with their outbox
+    events (see app.outbox). Entries that fail validation or stock checks are
+    reported individually without aborting the rest of the batch. A sync route:
+    the chunks run on a threadpool thread, not the event loop.
+    """
+    entries = payload.orders
+    keys = {e.idempotency_key for e in entries}
+    known = dict(
+        db.query(models.Order.idempotency_key, models.Order.id)
+        .filter(models.Order.idempotency_key.in_(keys))
+        .all()
+    )
+    customer_ids = {
+        cid for (cid,) in
+        db.query(models.Customer.id).filter(models.Customer.id.in_({e.customer_id for e in entries})).all()
+    }
+    item_ids = {line.item_id for e in entries for line in e.items}
+    items_map = {it.id: it for it in db.query(models.Item).filter(models.Item.id.in_(item_ids)).all()}
+    bom, leaves = combos.load(db, items_map)
+    # Plain copies survive the per-chunk commits (which expire the ORM objects)
+    prices = {item_id: it.price for item_id, it in items_map.items()}
+    gst_rates = {item_id: it.gst_rate for item_id, it in items_map.items()}
+
+    results: Dict[int, schemas.BulkOrderResult] = {}
+    repeats = []
+    seen = set()
+    valid = []
+    for idx, entry in enumerate(entries):
+        key = entry.idempotency_key
+        if key in known:
+            results[idx] = schemas.BulkOrderResult(idempotency_key=key, status="duplicate", order_id=known[key])
+            continue
+        if key in seen:
+            repeats.append(idx)
+            continue
+        seen.add(key)
+        if entry.customer_id not in customer_ids:
+            results[idx] = schemas.BulkOrderResult(idempotency_key=key, status="error", detail="Customer not found")
+            continue
+        missing = next((line.item_id for line in entry.items if line.item_id not in items_map), None)
+        if missing is not None:
+            results[idx] = schemas.BulkOrderResult(
+                idempotency_key=key, status="error", detail=f"Item id {missing} not found"
+            )
+            continue
+        quantities: Dict[int, int] = {}
+        for line in entry.items:
+            quantities[line.item_id] = quantities.get(line.item_id, 0) + line.qty
+        valid.append((idx, entry, quantities))
 
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        while chunk:
+            try:
+                _insert_order_chunk(db, chunk, {**leaves, **items_map}, bom, prices, gst_rates, results)
+                db.commit()
+            except HTTPException as exc:
+                # Stock moved underneath us between the lock-free read and the update
+                db.rollback()
+                for idx, entry, _ in chunk:
+                    results[idx] = schemas.BulkOrderResult(
+                        idempotency_key=entry.idempotency_key, status="error", detail=exc.detail
+                    )
+            except IntegrityError:
+                # A concurrent replay committed some of these keys after our lookup:
+                # report those as duplicates and retry the rest of the chunk
+                db.rollback()
+                replayed = dict(
+                    db.query(models.Order.idempotency_key, models.Order.id)
+                    .filter(models.Order.idempotency_key.in_([entry.idempotency_key for _, entry, _ in chunk]))
+                    .all()
+                )
+                if not replayed:
+                    raise
+                for idx, entry, _ in chunk:
+                    if entry.idempotency_key in replayed:
+                        results[idx] = schemas.BulkOrderResult(
+                            idempotency_key=entry.idempotency_key, status="duplicate",
+                            order_id=replayed[entry.idempotency_key],
+                        )
+                chunk = [c for c in chunk if c[1].idempotency_key not in replayed]
+                continue
+            break
+
+    # Repeated keys within the batch point at whatever the first occurrence produced
+    first = {r.idempotency_key: r for r in results.values()}
+    for idx in repeats:
+        key = entries[idx].idempotency_key
+        origin = first.get(key)
+        results[idx] = schemas.BulkOrderResult(
+            idempotency_key=key,
+            status="duplicate" if origin and origin.order_id else "error",
+            order_id=origin.order_id if origin else None,
+            detail=None if origin and origin.order_id else "Duplicate idempotency key in batch",
+        )
+
+    return [results[idx] for idx in range(len(entries))]
+
+
+async def _get_order_with_items(db: AsyncSession, order_id: int) -> models.Order:
+    order = (await db.scalars(
+        select(models.Order).options(selectinload(models.Order.items)).where(models.Order.id == order_id)
+    )).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
-@router.post("/{order_id}/complete", response_model=schemas.OrderOut)
-def complete_order(order_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    order = db.query(models.Order).get(order_id)
+_CENTS = Decimal("0.01")
+
+
+def _state_code(gstin: Optional[str]) -> Optional[str]:
+    code = (models.normalize_gstin(gstin) or "")[:2]
+    return code if code.isdigit() else None
+
+
+def order_detail(order: models.Order, store_gstin: Optional[str]) -> schemas.OrderDetail:
+    """Build the receipt view of an order (customer, lines and items loaded).
+
+    Tax is charged on top of the order total: IGST when the store's and the
+    customer's GSTIN state codes differ, otherwise CGST + SGST halves.
+    """
+    store_state, customer_state = _state_code(store_gstin), _state_code(order.customer.gstin)
+    inter_state = bool(store_state and customer_state and store_state != customer_state)
+    lines, by_rate = [], {}
+    for line in sorted(order.items, key=lambda l: l.item_id):
+        amount, tax = (line.price * line.qty).quantize(_CENTS), line.gst
+        lines.append(schemas.OrderLineDetail(
+            item_id=line.item_id, qty=line.qty, price=line.price, name=line.item.name,
+            sku=line.item.sku, gst_rate=line.gst_rate, amount=amount, tax=tax,
+        ))
+        taxable, total_tax = by_rate.get(line.gst_rate, (Decimal("0.00"), Decimal("0.00")))
+        by_rate[line.gst_rate] = (taxable + amount, total_tax + tax)
+
+    breakup = []
+    for rate in sorted(by_rate):
+        taxable, tax = by_rate[rate]
+        if inter_state:
+            cgst = sgst = Decimal("0.00")
+            igst = tax
+        else:
+            cgst = (tax / 2).quantize(_CENTS)
+            sgst, igst = tax - cgst, Decimal("0.00")
+        breakup.append(schemas.TaxBreakup(rate=rate, taxable=taxable, cgst=cgst, sgst=sgst, igst=igst))
+
+    subtotal = sum((l.amount for l in lines), Decimal("0.00"))
+    tax_total = sum((l.tax for l in lines), Decimal("0.00"))
+    return schemas.OrderDetail(
+        id=order.id, customer_id=order.customer_id, total=order.total, status=order.status,
+        created_at=order.created_at, updated_at=order.updated_at,
+        customer=schemas.CustomerOut.model_validate(order.customer), items=lines,
+        inter_state=inter_state, subtotal=subtotal, tax_total=tax_total,
+        grand_total=subtotal + tax_total, tax_breakup=breakup,
+    )
+
+
+@router.get("/{order_id}", response_model=schemas.OrderDetail)
+def get_order(order_id: int, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    # Order, customer, lines and their items in a single joined SELECT
+    order = (
+        db.query(models.Order)
+        .options(
+            joinedload(models.Order.customer),
+            joinedload(models.Order.items).joinedload(models.OrderItem.item),
+        )
+        .filter(models.Order.id == order_id)
+        .first()
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    body = order_detail(order, settings_service.get().gstin).model_dump_json().encode()
+    return cached_json(request, body)
+
+
+@router.post("/{order_id}/complete", response_model=schemas.OrderOut)
+async def complete_order(order_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    order = await _get_order_with_items(db, order_id)
+    previous = order.status
     order.status = models.OrderStatus.completed
-    db.add(order)
-    db.flush()
-    db.refresh(order)
+    await db.run_sync(lambda session: rollup.move_order(session, order, previous, order.status))
+    await db.flush()
+    if previous != order.status:
+        events.record(db, [events.order_event(order)])
     return order
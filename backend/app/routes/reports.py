@@ -0,0 +1,172 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+from ..auth import get_current_user
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+Period = Literal["day", "month"]
+
+# (SQLite strftime format, PostgreSQL to_char format) per bucket size
+_PERIOD_FORMATS = {
+    "day": ("%Y-%m-%d", "YYYY-MM-DD"),
+    "month": ("%Y-%m", "YYYY-MM"),
+}
+
+
+def _bucket(db: Session, column, period: str):
+    """Format a timestamp column as a period label ('2024-05-01' / '2024-05') in SQL."""
+    sqlite_fmt, pg_fmt = _PERIOD_FORMATS[period]
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(sqlite_fmt, column)
+    return func.to_char(column, pg_fmt)
+
+
+def _in_range(query, column, date_from: Optional[datetime], date_to: Optional[datetime]):
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        query = query.filter(column < date_to)
+    return query
+
+
+def _in_day_range(query, column, date_from: Optional[datetime], date_to: Optional[datetime]):
+    """Day-granular range filter for the rollup tables (date_to stays exclusive)."""
+    if date_from:
+        query = query.filter(column >= date_from.date())
+    if date_to:
+        end: date = date_to.date()
+        if date_to.time() != time(0):
+            end += timedelta(days=1)
+        query = query.filter(column < end)
+    return query
+
+
+def _money(value) -> Decimal:
+    return Decimal(value or 0).quantize(Decimal("0.01"))
+
+
+@router.get("/sales", response_model=List[schemas.SalesPoint])
+def sales_by_period(
+    period: Period = "day",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Stats = models.DailyOrderStats
+    bucket = _bucket(db, Stats.day, period).label("period")
+    completed = Stats.status == models.OrderStatus.completed
+    q = db.query(
+        bucket,
+        func.sum(Stats.orders),
+        func.sum(case((completed, Stats.orders), else_=0)),
+        func.sum(case((Stats.status == models.OrderStatus.canceled, Stats.orders), else_=0)),
+        func.sum(Stats.revenue),
+        func.sum(case((completed, Stats.revenue), else_=0)),
+    )
+    q = _in_day_range(q, Stats.day, date_from, date_to).group_by(bucket).having(func.sum(Stats.orders) > 0)
+    q = q.order_by(bucket)
+    return [
+        schemas.SalesPoint(
+            period=str(p), orders=n, completed=c or 0, canceled=x or 0,
+            revenue=_money(rev), completed_revenue=_money(crev),
+        )
+        for p, n, c, x, rev, crev in q.all()
+    ]
+
+
+@router.get("/status-breakdown", response_model=List[schemas.StatusBreakdown])
+def status_breakdown(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Stats = models.DailyOrderStats
+    q = db.query(Stats.status, func.sum(Stats.orders), func.sum(Stats.revenue))
+    q = _in_day_range(q, Stats.day, date_from, date_to).group_by(Stats.status).having(func.sum(Stats.orders) > 0)
+    return [
+        schemas.StatusBreakdown(status=st.value, orders=n, revenue=_money(rev))
+        for st, n, rev in q.all()
+    ]
+
+
+@router.get("/top-items", response_model=List[schemas.TopItem])
+def top_items(
+    limit: int = Query(5, ge=1, le=100),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Item, Sales = models.Item, models.DailySales
+    qty = func.sum(Sales.qty).label("qty")
+    q = (
+        db.query(Item.id, Item.name, Item.sku, Item.category, qty, func.sum(Sales.revenue))
+        .join(Sales, Sales.item_id == Item.id)
+        .filter(Sales.status != models.OrderStatus.canceled)
+    )
+    q = _in_day_range(q, Sales.day, date_from, date_to)
+    q = q.group_by(Item.id, Item.name, Item.sku, Item.category).having(qty > 0)
+    q = q.order_by(qty.desc(), Item.id).limit(limit)
+    return [
+        schemas.TopItem(item_id=i, name=n, sku=s, category=c, qty=qt or 0, revenue=_money(rev))
+        for i, n, s, c, qt, rev in q.all()
+    ]
+
+
+@router.get("/categories", response_model=List[schemas.CategorySales])
+def sales_by_category(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Item, Sales = models.Item, models.DailySales
+    category = func.coalesce(Item.category, "Uncategorized").label("category")
+    q = (
+        db.query(category, func.sum(Sales.qty), func.sum(Sales.revenue))
+        .join(Sales, Sales.item_id == Item.id)
+        .filter(Sales.status != models.OrderStatus.canceled)
+    )
+    q = _in_day_range(q, Sales.day, date_from, date_to).group_by(category).having(func.sum(Sales.qty) > 0)
+    q = q.order_by(category)
+    return [schemas.CategorySales(category=c, qty=qt or 0, revenue=_money(rev)) for c, qt, rev in q.all()]
+
+
+@router.get("/new-customers", response_model=schemas.NewCustomers)
+def new_customers(
+    period: Period = "month",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Customer = models.Customer
+    bucket = _bucket(db, Customer.created_at, period).label("period")
+    q = db.query(bucket, func.count(Customer.id))
+    q = _in_range(q, Customer.created_at, date_from, date_to).group_by(bucket).order_by(bucket)
+    series = [schemas.PeriodCount(period=str(p), count=n) for p, n in q.all()]
+    return schemas.NewCustomers(total=sum(p.count for p in series), series=series)
+
+
+@router.get("/low-stock", response_model=List[schemas.LowStockItem])
+def low_stock(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    Item = models.Item
+    return (
+        db.query(Item)
+        .filter(Item.stock <= Item.reorder_point)
+        .order_by((Item.stock - Item.reorder_point).asc(), Item.id)
+        .limit(limit)
+        .all()
+    )
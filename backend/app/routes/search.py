@@ -0,0 +1,126 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Session, selectinload
+from ..database import get_db
+from .. import models, schemas
+from ..auth import get_current_user
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+SEARCH_TYPES = ("customers", "items", "orders", "users")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class _Matcher:
+    """Builds portable match/rank expressions for one search term.
+
+    Matches are case-insensitive. On PostgreSQL they are ILIKE (plus fuzzy `%`
+    similarity for substring matches) on the bare column, which the pg_trgm GIN
+    indexes in database.TRIGRAM_INDEXES serve: each OR'd predicate of a search
+    query has one, so the planner can BitmapOr them instead of scanning the
+    table. Wrapping the column in lower() would hide it from those indexes. SQLite
+    has no such indexes and compares lower() values. Rank: exact 3, prefix 2,
+    substring 1, plus trigram similarity on PostgreSQL.
+    """
+
+    def __init__(self, db: Session, term: str):
+        self.term = term.strip()
+        self.lower = self.term.lower()
+        self.postgres = db.get_bind().dialect.name == "postgresql"
+
+    def _like(self, column, pattern: str):
+        if self.postgres:
+            return column.ilike(pattern, escape="\\")
+        return func.lower(column).like(pattern.lower(), escape="\\")
+
+    def matches(self, column):
+        cond = self._like(column, f"%{_escape_like(self.term)}%")
+        if self.postgres:
+            cond = or_(cond, column.op("%")(self.term))
+        return cond
+
+    def prefix(self, column):
+        return self._like(column, f"{_escape_like(self.term)}%")
+
+    def equals(self, column):
+        return self._like(column, _escape_like(self.term))
+
+    def rank(self, column):
+        lowered = func.lower(column)
+        score = case(
+            (lowered == self.lower, 3),
+            (lowered.like(f"{_escape_like(self.lower)}%", escape="\\"), 2),
+            else_=1,
+        )
+        if self.postgres:
+            return score + func.similarity(column, self.term)
+        return score
+
+
+@router.get("/", response_model=schemas.SearchResults)
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: Optional[str] = Query(None, description="Comma-separated subset of customers,items,orders,users"),
+    limit: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    wanted = {t.strip() for t in (types or ",".join(SEARCH_TYPES)).split(",")} & set(SEARCH_TYPES)
+    m = _Matcher(db, q)
+    digits = models.normalize_phone(q)
+    results = schemas.SearchResults()
+
+    if "customers" in wanted:
+        C = models.Customer
+        conds = [m.matches(C.name), m.prefix(C.email_norm)]
+        exact_key = [C.email_norm == models.normalize_email(q), C.gstin_norm == models.normalize_gstin(q)]
+        if digits and len(digits) >= 3:
+            conds.append(C.phone_norm.like(f"%{digits}%"))  # trigram-indexed on PostgreSQL
+            exact_key.append(C.phone_norm == digits)
+        rank = case((or_(*exact_key), 4), else_=m.rank(C.name))
+        results.customers = (
+            db.query(C).filter(or_(*conds, *exact_key)).order_by(rank.desc(), C.id.desc()).limit(limit).all()
+        )
+
+    if "items" in wanted:
+        I = models.Item
+        rank = case((func.lower(I.sku) == m.lower, 4), else_=m.rank(I.name))
+        results.items = (
+            db.query(I)
+            .filter(or_(m.matches(I.name), m.matches(I.sku), m.equals(I.category)))
+            .order_by(rank.desc(), I.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    if "orders" in wanted:
+        O = models.Order
+        conds = []
+        if q.strip().isdigit():
+            conds.append(O.id == int(q.strip()))
+        if m.lower in models.OrderStatus.__members__:
+            conds.append(O.status == models.OrderStatus(m.lower))
+        if conds:
+            rank = case((conds[0], 1), else_=0) if len(conds) > 1 else literal(1)
+            results.orders = (
+                db.query(O).options(selectinload(O.items))
+                .filter(or_(*conds)).order_by(rank.desc(), O.created_at.desc(), O.id.desc())
+                .limit(limit).all()
+            )
+
+    if "users" in wanted:
+        U = models.User
+        rank = case((func.lower(U.email) == m.lower, 4), else_=m.rank(U.name))
+        results.users = (
+            db.query(U)
+            .filter(or_(m.matches(U.name), m.prefix(U.email), m.equals(U.role)))
+            .order_by(rank.desc(), U.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    return results
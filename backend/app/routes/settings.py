@@ -1,33 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, schemas
+from .. import schemas
 from ..auth import get_current_user
+from ..http_cache import cached_json
+from ..settings_service import settings_service
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 @router.get("/", response_model=schemas.SettingsOut)
-def get_settings(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    s = db.query(models.Setting).order_by(models.Setting.id.asc()).first()
-    if not s:
-        s = models.Setting(currency="INR")
-        db.add(s)
-        db.flush()
-        db.refresh(s)
-    return s
+def get_settings(request: Request, user=Depends(get_current_user)):
+    # Served from the in-memory snapshot; no database session needed
+    snap = settings_service.snapshot()
+    return cached_json(request, snap.body, etag=snap.etag)
 
 @router.put("/", response_model=schemas.SettingsOut)
 def update_settings(payload: schemas.SettingsUpdate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    s = db.query(models.Setting).order_by(models.Setting.id.asc()).first()
-    if not s:
-        s = models.Setting(currency="INR")
-        db.add(s)
-        db.flush()
-        db.refresh(s)
-
-    for k, v in payload.dict(exclude_unset=True).items():
-        setattr(s, k, v)
-    db.add(s)
-    db.flush()
-    db.refresh(s)
-    return s
+    return settings_service.update(db, payload).settings
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from .. import models, schemas
-from ..auth import get_current_user, create_access_token, hash_password, verify_password
+from typing import List, Optional
+from ..database import get_async_db, get_db
+from .. import models, passwords, schemas
+from ..auth import get_current_user, create_access_token, invalidate_user
+from ..pagination import MAX_PAGE_SIZE, paginate
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/", response_model=List[schemas.UserOut])
-def list_users(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return db.query(models.User).order_by(models.User.created_at.desc()).all()
+def list_users(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return paginate(db.query(models.User), models.User, response, limit, cursor)
 
 @router.post("/", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(payload: schemas.UserCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    if db.query(models.User).filter(models.User.email == payload.email).first():
+async def create_user(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    if await db.scalar(select(models.User.id).where(models.User.email == payload.email)):
         raise HTTPException(status_code=400, detail="Email already in use")
-    password_hash = hash_password(payload.password) if payload.password else None
+    password_hash = await passwords.hasher.hash(payload.password) if payload.password else None
     u = models.User(
         name=payload.name,
         email=payload.email,
@@ -24,15 +33,60 @@ def create_user(payload: schemas.UserCreate, db: Session = Depends(get_db), user
         password_hash=password_hash,
     )
     db.add(u)
-    db.flush()
-    db.refresh(u)
+    await db.flush()
+    await db.refresh(u)
+    invalidate_user(db, u.email)
+    return u
+
+@router.get("/{user_id}", response_model=schemas.UserOut)
+def get_user(user_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    u = db.query(models.User).get(user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="User not found")
+    return u
+
+@router.patch("/{user_id}", response_model=schemas.UserOut)
+async def update_user(user_id: int, payload: schemas.UserUpdate, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    u = await db.get(models.User, user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="User not found")
+    previous_email = u.email
+    data = payload.dict(exclude_unset=True)
+    password = data.pop("password", None)
+    if password:
+        u.password_hash = await passwords.hasher.hash(password)
+    for k, v in data.items():
+        if v is not None:
+            setattr(u, k, v)
+    db.add(u)
+    await db.flush()
+    await db.refresh(u)
+    invalidate_user(db, previous_email, u.email)
     return u
 
+# Users are deactivated rather than deleted so their history stays intact
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def deactivate_user(user_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    u = db.query(models.User).get(user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="User not found")
+    u.is_active = False
+    db.add(u)
+    db.flush()
+    invalidate_user(db, u.email)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 # Minimal local login (for development)
 @router.post("/login", response_model=schemas.Token, tags=["Auth"])
-def login(email: str, password: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not user.password_hash or not verify_password(password, user.password_hash):
+async def login(email: str, password: str, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == email))
+    if not user or not user.password_hash:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    ok, new_hash = await passwords.hasher.verify_and_update(password, user.password_hash)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored at another BCRYPT_ROUNDS cost; committed with the request
+        user.password_hash = new_hash
     token = create_access_token(user.email, extra={"role": user.role})
     return {"access_token": token, "token_type": "bearer", "expires_in": 60*60}
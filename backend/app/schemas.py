@@ -14,6 +14,12 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: Optional[str] = None  # Optional if external auth
 
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    password: Optional[str] = None
+
 class UserOut(UserBase):
     # Relax email validation in responses to allow dev/test domains
     email: str
@@ -52,6 +58,12 @@ class CustomerOut(CustomerBase):
     class Config:
         from_attributes = True
 
+class CustomerDelta(BaseModel):
+    """GET /customers/?updated_since=: drop `deleted`, then upsert `changed`; pass `as_of` next time."""
+    changed: List[CustomerOut]
+    deleted: List[int]
+    as_of: datetime
+
 # ---------- Items ----------
 class ItemBase(BaseModel):
     name: str
@@ -77,14 +89,26 @@ class ItemUpdate(BaseModel):
     reorder_point: Optional[int] = None
     gst_rate: Optional[int] = None
 
+class ComboComponentIn(BaseModel):
+    item_id: int
+    qty: int = Field(gt=0)
+
 class ItemOut(ItemBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    # Combos only: how many units the components' stock can currently cover
+    combo_available: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class ItemDelta(BaseModel):
+    """GET /items/?updated_since=: drop `deleted`, then upsert `changed`; pass `as_of` next time."""
+    changed: List[ItemOut]
+    deleted: List[int]
+    as_of: datetime
+
 # ---------- Orders ----------
 class OrderStatus(str, Enum):
     pending = "pending"
@@ -119,6 +143,43 @@ class OrderOut(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderLineDetail(OrderItemOut):
+    name: str
+    sku: str
+    gst_rate: int
+    amount: Decimal
+    tax: Decimal
+
+class TaxBreakup(BaseModel):
+    rate: int
+    taxable: Decimal
+    cgst: Decimal
+    sgst: Decimal
+    igst: Decimal
+
+class OrderDetail(OrderOut):
+    """Receipt view of an order: customer, named lines and the GST split."""
+    customer: CustomerOut
+    items: List[OrderLineDetail] = Field(default_factory=list)
+    inter_state: bool
+    subtotal: Decimal
+    tax_total: Decimal
+    grand_total: Decimal
+    tax_breakup: List[TaxBreakup] = Field(default_factory=list)
+
+class BulkOrderEntry(OrderCreate):
+    idempotency_key: str = Field(min_length=1, max_length=100)
+
+class BulkOrderCreate(BaseModel):
+    orders: List[BulkOrderEntry]
+
+class BulkOrderResult(BaseModel):
+    idempotency_key: str
+    status: str  # "created", "duplicate" or "error"
+    order_id: Optional[int] = None
+    total: Optional[Decimal] = None
+    detail: Optional[str] = None
+
 # ---------- Settings ----------
 class SettingsUpdate(BaseModel):
     company_name: Optional[str] = None
@@ -139,6 +200,70 @@ class SettingsOut(SettingsUpdate):
     class Config:
         from_attributes = True
 
+# ---------- Bulk import ----------
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = Field(default_factory=list)
+
+# ---------- Reports ----------
+class SalesPoint(BaseModel):
+    period: str
+    orders: int
+    completed: int
+    canceled: int
+    revenue: Decimal
+    completed_revenue: Decimal
+
+class StatusBreakdown(BaseModel):
+    status: OrderStatus
+    orders: int
+    revenue: Decimal
+
+class TopItem(BaseModel):
+    item_id: int
+    name: str
+    sku: str
+    category: Optional[str] = None
+    qty: int
+    revenue: Decimal
+
+class CategorySales(BaseModel):
+    category: str
+    qty: int
+    revenue: Decimal
+
+class PeriodCount(BaseModel):
+    period: str
+    count: int
+
+class NewCustomers(BaseModel):
+    total: int
+    series: List[PeriodCount] = Field(default_factory=list)
+
+class LowStockItem(BaseModel):
+    id: int
+    name: str
+    sku: str
+    category: Optional[str] = None
+    stock: int
+    reorder_point: int
+
+    class Config:
+        from_attributes = True
+
+# ---------- Search ----------
+class SearchResults(BaseModel):
+    customers: List[CustomerOut] = Field(default_factory=list)
+    items: List[ItemOut] = Field(default_factory=list)
+    orders: List[OrderOut] = Field(default_factory=list)
+    users: List[UserOut] = Field(default_factory=list)
+
 # ---------- Auth ----------
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,213 @@
+"""Process-wide cache of the singleton store settings row.
+
+Reads are served from memory (with a pre-encoded JSON body and ETag) and cost no
+queries at steady state. `update` bumps `settings.version` and, once the
+transaction commits, installs the new snapshot locally and tells other workers:
+
+- PostgreSQL: `pg_notify('settings_changed', version)` inside the transaction, so
+  listeners only hear about committed changes (LISTEN on a dedicated connection)
+- Redis (`REDIS_URL`): PUBLISH on `SETTINGS_CHANNEL` after commit
+
+Workers that receive a newer version drop their snapshot and reload on next read.
+`SETTINGS_CACHE_TTL` bounds staleness when neither channel is available.
+"""
+import logging
+import os
+import select
+import threading
+import time
+from typing import Optional
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from . import models, schemas
+from .database import SessionLocal, get_engine
+from .http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_CHANNEL = os.getenv("SETTINGS_CHANNEL", "settings_changed")
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "300"))
+
+
+class SettingsSnapshot:
+    __slots__ = ("settings", "version", "body", "etag", "loaded_at")
+
+    def __init__(self, settings: schemas.SettingsOut, version: int):
+        self.settings = settings
+        self.version = version
+        self.body = settings.model_dump_json().encode()
+        self.etag = make_etag(self.body)
+        self.loaded_at = time.monotonic()
+
+
+class SettingsService:
+    def __init__(self, ttl: float = SETTINGS_CACHE_TTL, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.loads = 0
+        self.hits = 0
+        self.notifications = 0
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._lock = threading.Lock()
+        self._redis = None
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+            except Exception:
+                logger.exception("Redis settings notifications disabled")
+
+    # --- reads ---
+    def snapshot(self) -> SettingsSnapshot:
+        snap = self._snapshot
+        if snap is not None and (not self.ttl or time.monotonic() - snap.loaded_at < self.ttl):
+            self.hits += 1
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or (self.ttl and time.monotonic() - snap.loaded_at >= self.ttl):
+                snap = self._load()
+                self._snapshot = snap
+            return snap
+
+    def get(self) -> schemas.SettingsOut:
+        return self.snapshot().settings
+
+    def _load(self) -> SettingsSnapshot:
+        self.loads += 1
+        db = SessionLocal()
+        try:
+            row = _get_or_create(db)
+            db.commit()
+            return SettingsSnapshot(schemas.SettingsOut.model_validate(row), row.version)
+        finally:
+            db.close()
+
+    def invalidate(self, version: Optional[int] = None):
+        """Drop the snapshot (only if it is older than `version`, when given)."""
+        with self._lock:
+            if version is None or self._snapshot is None or self._snapshot.version < version:
+                self._snapshot = None
+
+    # --- writes ---
+    def update(self, db: Session, payload: schemas.SettingsUpdate) -> SettingsSnapshot:
+        """Apply `payload` within `db`'s transaction; caches switch over on commit."""
+        row = _get_or_create(db, for_update=True)
+        for k, v in payload.model_dump(exclude_unset=True).items():
+            setattr(row, k, v)
+        row.version = (row.version or 0) + 1
+        db.flush()
+        db.refresh(row)
+        snap = SettingsSnapshot(schemas.SettingsOut.model_validate(row), row.version)
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(func.pg_notify(SETTINGS_CHANNEL, str(snap.version)).select())
+
+        def _committed(session):
+            with self._lock:
+                if self._snapshot is None or self._snapshot.version < snap.version:
+                    self._snapshot = snap
+            self._publish(snap.version)
+
+        event.listen(db, "after_commit", _committed, once=True)
+        return snap
+
+    def _publish(self, version: int):
+        if self._redis is None:
+            return
+        try:
+            self._redis.publish(SETTINGS_CHANNEL, str(version))
+        except Exception:
+            logger.warning("Redis publish failed for settings", exc_info=True)
+
+    def _on_notify(self, payload):
+        self.notifications += 1
+        try:
+            version = int(payload)
+        except (TypeError, ValueError):
+            version = None
+        self.invalidate(version)
+
+    # --- cross-worker listeners ---
+    def start(self):
+        """Start a background listener for change notifications, if a channel exists."""
+        if self._listener is not None:
+            return
+        if self._redis is not None:
+            target = self._listen_redis
+        elif get_engine().dialect.name == "postgresql":
+            target = self._listen_postgres
+        else:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=target, name="settings-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        self._listener = None
+
+    def _listen_redis(self):
+        while not self._stop.is_set():
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(SETTINGS_CHANNEL)
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._on_notify(message.get("data"))
+            except Exception:
+                logger.warning("Redis settings listener failed; retrying", exc_info=True)
+                # Anything may have changed while disconnected
+                self.invalidate()
+                self._stop.wait(5)
+
+    def _listen_postgres(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = get_engine().raw_connection()
+                dbapi_conn = conn.driver_connection
+                dbapi_conn.autocommit = True
+                with dbapi_conn.cursor() as cur:
+                    cur.execute(f"LISTEN {SETTINGS_CHANNEL}")
+                while not self._stop.is_set():
+                    if select.select([dbapi_conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        self._on_notify(dbapi_conn.notifies.pop(0).payload)
+            except Exception:
+                logger.warning("Postgres settings listener failed; retrying", exc_info=True)
+                self.invalidate()
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.invalidate()
+                    except Exception:
+                        pass
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "hits": self.hits, "loads": self.loads, "notifications": self.notifications,
+            "version": snap.version if snap else None,
+            "listening": self._listener is not None,
+        }
+
+
+def _get_or_create(db: Session, for_update: bool = False) -> models.Setting:
+    q = db.query(models.Setting).order_by(models.Setting.id.asc())
+    if for_update:
+        q = q.with_for_update()
+    row = q.first()
+    if row is None:
+        row = models.Setting(currency="INR", version=1)
+        db.add(row)
+        db.flush()
+        db.refresh(row)
+    return row
+
+
+settings_service = SettingsService(redis_url=os.getenv("REDIS_URL"))
@@ -0,0 +1,175 @@
+"""Conditional GET and delta sync for the item catalogue and customer list.
+
+A collection's version is its `table_versions` counter, bumped just before COMMIT
+by every transaction that wrote the table (ORM flushes and insert/update/delete
+statements alike), so a row becomes visible together with the version that covers
+it. `updated_at` is stamped at flush and can't serve: a transaction that commits
+late publishes rows older than the newest one already seen. GET /items/ and
+/customers/ send the counter as a weak ETag (which also covers the query string)
+and the newest `updated_at` or tombstone (deleting a row leaves one in
+`tombstones`) as Last-Modified, and answer a matching If-None-Match (or, without
+one, If-Modified-Since) with 304.
+
+`?updated_since=<as_of>` returns `{"changed": [...], "deleted": [ids], "as_of": ...}`:
+rows updated after `updated_since`, ids deleted after it, and the value to pass
+next time. `as_of` is the read time less SYNC_OVERLAP_S, so rows stamped before
+it but committed after the read are still sent next time; rows changed within the
+overlap come back again, and clients upsert by id. Clients drop `deleted`, then
+upsert `changed`. Tombstones are kept for TOMBSTONE_RETENTION_DAYS; an older
+`updated_since` gets 410 and the client reloads the full list.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, NamedTuple, Optional
+from fastapi import HTTPException, Request
+from sqlalchemy import Engine, delete, event, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from . import models
+from .http_cache import etag_matches, make_etag
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+# Longest a writing transaction may take between flush and commit and still have
+# its rows picked up by the next delta
+SYNC_OVERLAP = timedelta(seconds=float(os.getenv("SYNC_OVERLAP_S", "60")))
+# Tables served with ETags and ?updated_since=
+VERSIONED_TABLES = ("customers", "items")
+# Connection.info key: versioned tables written in the current transaction
+_TOUCHED = "sync_touched_tables"
+# Session.info key: the connection its transaction runs on
+_CONNECTION = "sync_connection"
+
+
+class CollectionVersion(NamedTuple):
+    last_modified: Optional[datetime]
+    headers: Dict[str, str]
+    read_at: datetime
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@event.listens_for(Engine, "after_execute")
+def _track_write(conn, clauseelement, multiparams, params, execution_options, result):
+    # ORM flushes and insert/update/delete statements both arrive here
+    if isinstance(clauseelement, UpdateBase):
+        table_name = getattr(getattr(clauseelement, "table", None), "name", None)
+        if table_name in VERSIONED_TABLES:
+            conn.info.setdefault(_TOUCHED, set()).add(table_name)
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _forget_writes(conn):
+    conn.info.pop(_TOUCHED, None)
+
+
+@event.listens_for(Session, "after_begin")
+def _remember_connection(session, transaction, connection):
+    session.info[_CONNECTION] = connection
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    """Bump the counters of the versioned tables this transaction wrote."""
+    session.flush()
+    conn = session.info.pop(_CONNECTION, None)
+    touched = conn.info.pop(_TOUCHED, None) if conn is not None else None
+    if not touched:
+        return
+    V = models.TableVersion
+    dialect = conn.dialect.name
+    # Sorted, so concurrent writers lock the counter rows in the same order
+    for table_name in sorted(touched):
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            conn.execute(
+                dialect_insert(V).values(table_name=table_name, version=1)
+                .on_conflict_do_update(index_elements=[V.table_name], set_={"version": V.version + 1})
+            )
+        elif not conn.execute(
+            update(V).where(V.table_name == table_name).values(version=V.version + 1)
+        ).rowcount:
+            conn.execute(insert(V).values(table_name=table_name, version=1))
+
+
+def record_deletion(db: Session, model, row_id: int):
+    """Leave a tombstone for a deleted row and drop the table's expired ones."""
+    now = datetime.utcnow()
+    db.execute(delete(models.Tombstone).where(
+        models.Tombstone.table_name == model.__tablename__,
+        models.Tombstone.deleted_at < now - timedelta(days=TOMBSTONE_RETENTION_DAYS),
+    ))
+    db.add(models.Tombstone(table_name=model.__tablename__, row_id=row_id, deleted_at=now))
+
+
+def collection_version(db: Session, model, request: Request) -> CollectionVersion:
+    read_at = datetime.utcnow()
+    version, updated, deleted = db.execute(select(
+        select(models.TableVersion.version)
+        .where(models.TableVersion.table_name == model.__tablename__)
+        .scalar_subquery(),
+        select(func.max(model.updated_at)).scalar_subquery(),
+        select(func.max(models.Tombstone.deleted_at))
+        .where(models.Tombstone.table_name == model.__tablename__)
+        .scalar_subquery(),
+    )).one()
+    last_modified = max((t for t in (updated, deleted) if t is not None), default=None)
+    etag = "W/" + make_etag(f"{model.__tablename__}|{version or 0}|{request.url.query}".encode())
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return CollectionVersion(last_modified, headers, read_at)
+
+
+def not_modified(request: Request, version: CollectionVersion) -> bool:
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, version.headers["ETag"])
+    since = request.headers.get("if-modified-since")
+    if not since or version.last_modified is None:
+        return False
+    try:
+        since = _naive_utc(parsedate_to_datetime(since))
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return version.last_modified.replace(microsecond=0) <= since
+
+
+def delta(
+    db: Session,
+    query,
+    model,
+    since: datetime,
+    version: CollectionVersion,
+    also_changed: Optional[Callable[[datetime], object]] = None,
+) -> dict:
+    """Rows of the filtered `query` changed after `since`, plus ids deleted after it.
+
+    `also_changed(since)` may add a clause for rows whose output changed without
+    their own updated_at (e.g. combos whose components' stock moved).
+    """
+    since = _naive_utc(since)
+    if since < datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        raise HTTPException(
+            status_code=410,
+            detail=f"updated_since is older than the {TOMBSTONE_RETENTION_DAYS}-day tombstone retention; reload the full list",
+        )
+    changed = model.updated_at > since
+    if also_changed is not None:
+        changed = or_(changed, also_changed(since))
+    rows = query.filter(changed).order_by(model.updated_at, model.id).all()
+    deleted = db.scalars(
+        select(models.Tombstone.row_id)
+        .where(models.Tombstone.table_name == model.__tablename__, models.Tombstone.deleted_at > since)
+        .order_by(models.Tombstone.deleted_at)
+    ).all()
+    as_of = max(since, version.read_at - SYNC_OVERLAP)
+    return {"changed": rows, "deleted": list(dict.fromkeys(deleted)), "as_of": as_of}
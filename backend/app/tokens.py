@@ -0,0 +1,117 @@
+"""JWT verification with pre-built keys and memoized results.
+
+Keys are parsed once at startup into `jose` key objects, keyed by `kid`:
+- local mode: the HMAC `SECRET_KEY` with `ALGORITHM`
+- jwt mode (external provider): a JWKS document from `JWKS_PATH` or `JWKS_JSON`,
+  or a single PEM public key in `JWT_PUBLIC_KEY`, falling back to the shared secret
+
+Successful verifications are cached by token hash until the token expires, so a
+client re-sending the same bearer token skips signature checks entirely.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+from .cache import TTLCache
+
+# Default algorithm for JWKs that don't carry an "alg"
+_ALG_BY_KEY = {"RSA": "RS256", "oct": "HS256"}
+_ALG_BY_CURVE = {"P-256": "ES256", "P-384": "ES384", "P-521": "ES512"}
+
+
+def _jwk_algorithm(data: dict) -> str:
+    if data.get("alg"):
+        return data["alg"]
+    if data.get("kty") == "EC":
+        return _ALG_BY_CURVE.get(data.get("crv"), "ES256")
+    return _ALG_BY_KEY.get(data.get("kty"), "RS256")
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        keys: Dict[Optional[str], Key],
+        algorithms: Iterable[str],
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        cache_size: int = 4096,
+        max_cache_ttl: Optional[float] = None,
+    ):
+        self.keys = keys
+        self.algorithms = list(algorithms)
+        self.audience = audience
+        self.issuer = issuer
+        self.max_cache_ttl = max_cache_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=max_cache_ttl or 300)
+
+    @classmethod
+    def from_jwks(cls, jwks: dict, **kwargs) -> "TokenVerifier":
+        keys = {}
+        algorithms = set()
+        for data in jwks.get("keys", []):
+            alg = _jwk_algorithm(data)
+            keys[data.get("kid")] = jwk.construct(data, alg)
+            algorithms.add(alg)
+        return cls(keys, kwargs.pop("algorithms", None) or sorted(algorithms), **kwargs)
+
+    @classmethod
+    def from_env(cls, secret_key: str, algorithm: str, mode: str = "local") -> "TokenVerifier":
+        options = {
+            "audience": os.getenv("JWT_AUDIENCE") or None,
+            "issuer": os.getenv("JWT_ISSUER") or None,
+            "cache_size": int(os.getenv("JWT_CACHE_SIZE", "4096")),
+            "max_cache_ttl": float(os.getenv("JWT_CACHE_MAX_TTL", "0")) or None,
+        }
+        allowed = [a.strip() for a in os.getenv("JWT_ALGORITHMS", "").split(",") if a.strip()] or None
+        if mode == "jwt":
+            jwks_path = os.getenv("JWKS_PATH")
+            jwks_json = os.getenv("JWKS_JSON")
+            if jwks_path:
+                with open(jwks_path) as fh:
+                    return cls.from_jwks(json.load(fh), algorithms=allowed, **options)
+            if jwks_json:
+                return cls.from_jwks(json.loads(jwks_json), algorithms=allowed, **options)
+            public_key = os.getenv("JWT_PUBLIC_KEY")
+            if public_key:
+                return cls({None: jwk.construct(public_key, algorithm)}, allowed or [algorithm], **options)
+        return cls({None: jwk.construct(secret_key, algorithm)}, allowed or [algorithm], **options)
+
+    def _key_for(self, header: dict) -> Key:
+        kid = header.get("kid")
+        if kid in self.keys:
+            return self.keys[kid]
+        if len(self.keys) == 1 and (kid is None or None in self.keys):
+            # Single configured key (shared secret / PEM) matches any kid
+            return next(iter(self.keys.values()))
+        raise JWTError("Unknown signing key")
+
+    def verify(self, token: str) -> dict:
+        """Return the token's claims, raising JWTError if it is invalid or expired."""
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg not in self.algorithms:
+            raise JWTError("Disallowed signing algorithm")
+        claims = jwt.decode(
+            token,
+            self._key_for(header),
+            algorithms=[alg],
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"verify_aud": self.audience is not None},
+        )
+
+        exp = claims.get("exp")
+        ttl = (exp - time.time()) if exp else self.cache.ttl
+        if self.max_cache_ttl:
+            ttl = min(ttl, self.max_cache_ttl)
+        if ttl > 0:
+            self.cache.set(digest, claims, ttl=ttl)
+        return claims
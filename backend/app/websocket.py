@@ -1,41 +1,377 @@
+"""WebSocket fan-out for /ws/orders.
+
+Producers call `broadcast`, which serializes the message once and hands the text
+to the backbone without touching any socket. The backbone delivers it to every
+worker's manager (in-process by default, Redis pub/sub when REDIS_URL is set),
+and a fan-out task copies it onto each connection's bounded send queue. One
+writer task per connection drains its queue, so a slow client only ever delays
+itself. When a client's queue is full the WS_SLOW_CONSUMER_POLICY applies:
+"disconnect" (default) closes it with 1013 so it can reconnect and resync, and
+"drop_oldest" discards its oldest pending message.
+
+Typed events (see app.events) carry a sequence number assigned at publish time
+and go only to clients that subscribed to their topic:
+
+    -> {"action": "subscribe", "topics": ["orders", "stock"], "since": 41}
+    <- {"type": "subscribed", "topics": [...], "seq": 57}
+    <- {"seq": 42, "topic": "orders", "type": "order.created", "data": {...}}
+
+With `since`, missed events still in the bounded replay buffer (WS_REPLAY_BUFFER)
+are sent first; if some have already been evicted the server answers
+{"type": "resync", "seq": ...} and the client should reload its state. Clients
+that never subscribe keep receiving the legacy `order_update` messages.
+"""
+import asyncio
 import json
-from typing import Set
+import logging
+import os
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, Optional, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 
-class ConnectionManager:
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "disconnect")
+PUBSUB_CHANNEL = os.getenv("WS_PUBSUB_CHANNEL", "billfinity:ws:orders")
+REPLAY_BUFFER = int(os.getenv("WS_REPLAY_BUFFER", "1000"))
+
+# Close code for clients dropped by the slow-consumer policy ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, maxsize: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+        # Loop time the in-flight send started at (None when idle); see _reap_stuck
+        self.send_started: Optional[float] = None
+        # Subscribed event topics; None for legacy clients
+        self.topics: Optional[FrozenSet[str]] = None
+
+
+def _with_seq(seq: int, body: str) -> str:
+    """Insert `seq` as the first key of an already-encoded JSON object."""
+    return '{"seq":%d,%s' % (seq, body[1:])
+
+
+class LocalBackbone:
+    """Delivers published messages to this process only.
+
+    Backbones call `deliver(seq, topic, text)`; legacy messages have no seq or topic.
+    """
+
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        self.deliver = None
+        self.seq = 0
+
+    async def start(self, deliver):
+        self.deliver = deliver
 
-    async def connect(self, websocket: WebSocket):
+    async def stop(self):
+        pass
+
+    def publish(self, topic: Optional[str], body: str):
+        if topic is None:
+            self.deliver(None, None, body)
+            return
+        self.seq += 1
+        self.deliver(self.seq, topic, _with_seq(self.seq, body))
+
+    async def publish_now(self, topic: Optional[str], body: str):
+        self.publish(topic, body)
+
+
+# Number the event and publish it in one step, so sequence order is channel order
+_PUBLISH_EVENT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', KEYS[2], seq .. ' ' .. ARGV[1] .. '\\n{"seq":' .. seq .. ',' .. string.sub(ARGV[2], 2))
+return seq
+"""
+
+
+class RedisBackbone:
+    """Redis pub/sub: every worker subscribes and delivers what any worker publishes.
+
+    Messages on the channel are "<seq> <topic>\\n<json>" ("- -" for legacy ones);
+    event sequence numbers come from an INCR counter shared by all workers.
+    """
+
+    def __init__(self, url: str, channel: str = PUBSUB_CHANNEL):
+        self.url = url
+        self.channel = channel
+        self.seq_key = f"{channel}:seq"
+        self.deliver = None
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending = set()
+
+    async def start(self, deliver):
+        import redis.asyncio as aioredis
+        self.deliver = deliver
+        self._redis = aioredis.Redis.from_url(self.url)
+        self._task = asyncio.create_task(self._subscribe())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def publish(self, topic: Optional[str], body: str):
+        task = asyncio.create_task(self._publish(topic, body))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def publish_now(self, topic: Optional[str], body: str):
+        """Publish and wait for Redis to accept the message; raises if it didn't."""
+        if topic is None:
+            await self._redis.publish(self.channel, "- -\n" + body)
+        else:
+            await self._redis.eval(_PUBLISH_EVENT, 2, self.seq_key, self.channel, topic, body)
+
+    async def _publish(self, topic: Optional[str], body: str):
+        try:
+            await self.publish_now(topic, body)
+        except Exception:
+            # Keep local legacy clients current even when the backbone is down
+            logger.warning("Redis publish failed", exc_info=True)
+            if topic is None:
+                self.deliver(None, None, body)
+
+    async def _subscribe(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    header, _, text = data.partition("\n")
+                    seq, _, topic = header.partition(" ")
+                    if seq == "-":
+                        self.deliver(None, None, text)
+                    else:
+                        self.deliver(int(seq), topic, text)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Redis subscription failed; retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+
+class ConnectionManager:
+    def __init__(self, backbone=None, queue_size: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY):
+        self.backbone = backbone or LocalBackbone()
+        self.queue_size = queue_size
+        self.policy = policy
+        self.active_connections: Dict[WebSocket, Connection] = {}
+        self.stats = {"published": 0, "delivered": 0, "sent": 0, "dropped": 0, "slow_disconnects": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fanout: Optional[asyncio.Queue] = None
+        self._fanout_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self.last_seq = 0
+        self.replay: Deque[Tuple[int, str, str]] = deque(maxlen=REPLAY_BUFFER)
+
+    async def start(self):
+        """Bind to the running event loop (one per worker) and start the backbone."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and not self._loop.is_closed() and self._loop.is_running():
+            return
+        self._loop = loop
+        self._fanout = asyncio.Queue()
+        self._fanout_task = asyncio.create_task(self._run_fanout())
+        self._reaper_task = asyncio.create_task(self._reap_stuck())
+        await self.backbone.start(self._deliver)
+
+    async def stop(self):
+        if self._loop is not asyncio.get_running_loop():
+            return
+        await self.backbone.stop()
+        for task in (self._fanout_task, self._reaper_task):
+            if task:
+                task.cancel()
+        for conn in list(self.active_connections.values()):
+            if conn.writer:
+                conn.writer.cancel()
+        self.active_connections.clear()
+        self._loop = None
+
+    # --- connections ---
+    async def connect(self, websocket: WebSocket) -> Connection:
+        await self.start()
         await websocket.accept()
-        self.active_connections.add(websocket)
+        conn = Connection(websocket, self.queue_size)
+        conn.writer = asyncio.create_task(self._write(conn))
+        self.active_connections[websocket] = conn
+        return conn
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+        conn = self.active_connections.pop(websocket, None)
+        if conn is not None and conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
 
+    async def _write(self, conn: Connection):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                data = await conn.queue.get()
+                conn.send_started = loop.time()
+                await conn.websocket.send_text(data)
+                conn.send_started = None
+                self.stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Send failed: the client is gone
+            self.disconnect(conn.websocket)
+            await self._close(conn.websocket, SLOW_CONSUMER_CLOSE_CODE)
+
+    async def _reap_stuck(self):
+        """Drop clients whose current send has been blocked for over SEND_TIMEOUT.
+
+        One periodic sweep instead of a timeout per send keeps sends cheap.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SEND_TIMEOUT / 2)
+            now = loop.time()
+            for conn in list(self.active_connections.values()):
+                if conn.send_started is not None and now - conn.send_started > SEND_TIMEOUT:
+                    self.stats["slow_disconnects"] += 1
+                    self.disconnect(conn.websocket)
+                    asyncio.create_task(self._close(conn.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    # --- publishing ---
     async def broadcast(self, message: dict):
-        data = json.dumps(message, default=str)
-        to_remove = []
-        for ws in list(self.active_connections):
-            try:
-                await ws.send_text(data)
-            except Exception:
-                to_remove.append(ws)
-        for ws in to_remove:
-            self.disconnect(ws)
+        """Send a legacy (unsequenced) message to clients that haven't subscribed."""
+        await self.start()
+        self.publish_text(json.dumps(message, default=str))
 
-manager = ConnectionManager()
+    def publish_event(self, topic: str, type_: str, data: dict):
+        """Publish a typed event to `topic` subscribers; callable from any thread."""
+        self.publish_text(json.dumps({"topic": topic, "type": type_, "data": data}, default=str), topic)
+
+    async def publish_confirmed(self, data: str, topic: Optional[str] = None):
+        """Like publish_text, but waits until the backbone accepted the message (raises otherwise)."""
+        await self.start()
+        self.stats["published"] += 1
+        await self.backbone.publish_now(topic, data)
+
+    def publish_text(self, data: str, topic: Optional[str] = None):
+        """Hand an already-serialized message to the backbone (O(1) for the caller)."""
+        self.stats["published"] += 1
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or loop.is_closed():
+            return
+        if running is loop:
+            self.backbone.publish(topic, data)
+        else:
+            loop.call_soon_threadsafe(self.backbone.publish, topic, data)
+
+    def _deliver(self, seq: Optional[int], topic: Optional[str], text: str):
+        self._fanout.put_nowait((seq, topic, text))
+
+    async def _run_fanout(self):
+        while True:
+            seq, topic, text = await self._fanout.get()
+            self.stats["delivered"] += 1
+            if topic is None:
+                for conn in list(self.active_connections.values()):
+                    if conn.topics is None:
+                        self._offer(conn, text)
+            else:
+                self.last_seq = max(self.last_seq, seq)
+                self.replay.append((seq, topic, text))
+                for conn in list(self.active_connections.values()):
+                    if conn.topics is not None and topic in conn.topics:
+                        self._offer(conn, text)
+            # Let writers run between large fan-outs
+            await asyncio.sleep(0)
+
+    def subscribe(self, conn: Connection, topics: Iterable[str], since: Optional[int] = None):
+        """Switch `conn` to typed events for `topics`, replaying what it missed after `since`.
+
+        Runs without awaiting, so no event can fall between the replay and live delivery.
+        """
+        conn.topics = frozenset(topics)
+        self._offer(conn, json.dumps({"type": "subscribed", "topics": sorted(conn.topics), "seq": self.last_seq}))
+        if since is None or since >= self.last_seq:
+            return
+        oldest = self.replay[0][0] if self.replay else self.last_seq + 1
+        if since < oldest - 1:
+            self._offer(conn, json.dumps({"type": "resync", "seq": self.last_seq}))
+            return
+        for seq, topic, text in self.replay:
+            if seq > since and topic in conn.topics:
+                if not self._offer(conn, text):
+                    return
+
+    def _offer(self, conn: Connection, data: str) -> bool:
+        """Queue `data` for `conn`; False if the slow-consumer policy disconnected it."""
+        try:
+            conn.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            pass
+        self.stats["dropped"] += 1
+        conn.dropped += 1
+        if self.policy == "drop_oldest":
+            conn.queue.get_nowait()
+            conn.queue.put_nowait(data)
+            return True
+        self.stats["slow_disconnects"] += 1
+        self.disconnect(conn.websocket)
+        asyncio.create_task(self._close(conn.websocket, SLOW_CONSUMER_CLOSE_CODE))
+        return False
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "connections": len(self.active_connections),
+            "last_seq": self.last_seq,
+            "backbone": type(self.backbone).__name__,
+            "max_queue_depth": max((c.queue.qsize() for c in self.active_connections.values()), default=0),
+        }
+
+
+def _default_backbone():
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url and os.getenv("WS_BACKBONE", "redis") == "redis":
+        return RedisBackbone(redis_url)
+    return LocalBackbone()
+
+
+manager = ConnectionManager(_default_backbone())
 
 async def orders_ws(websocket: WebSocket):
-    await manager.connect(websocket)
+    conn = await manager.connect(websocket)
     try:
         while True:
-            # Optional: receive messages from client if needed
-            _ = await websocket.receive_text()
-            # Echo or ignore; we primarily push server-side updates.
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("action") == "subscribe":
+                topics = message.get("topics") or ["orders"]
+                since = message.get("since")
+                manager.subscribe(conn, [str(t) for t in topics], int(since) if since is not None else None)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
-
-# Helper used by routes to push updates
-async def broadcast_order_update(payload: dict):
-    await manager.broadcast({"type": "order_update", "data": payload})
@@ -0,0 +1,65 @@
+"""Per-request JWT verification cost: plain jwt.decode vs TokenVerifier.
+
+    python benchmarks/bench_auth.py [--iterations 2000]
+
+Prints one JSON object with microseconds per verification for HS256 and RS256.
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jose import jwk, jwt  # noqa: E402
+from app.tokens import TokenVerifier  # noqa: E402
+
+
+def _per_call_us(fn, iterations):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter() - started) / iterations * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    n = args.iterations
+    claims = {"sub": "bench@example.com", "exp": int(time.time()) + 3600}
+    results = {"iterations": n}
+
+    secret = "bench-secret"
+    hs_token = jwt.encode(claims, secret, algorithm="HS256")
+    hs_verifier = TokenVerifier({None: jwk.construct(secret, "HS256")}, ["HS256"])
+    results["hs256"] = {
+        "jwt_decode_us": _per_call_us(lambda: jwt.decode(hs_token, secret, algorithms=["HS256"]), n),
+        "verifier_cached_us": _per_call_us(lambda: hs_verifier.verify(hs_token), n),
+    }
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    rs_token = jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": "bench"})
+    public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": "bench"}
+    rs_verifier = TokenVerifier.from_jwks({"keys": [public_jwk]})
+    uncached = TokenVerifier.from_jwks({"keys": [public_jwk]}, cache_size=0)
+    results["rs256"] = {
+        "jwt_decode_pem_us": _per_call_us(lambda: jwt.decode(rs_token, public_pem, algorithms=["RS256"]), n),
+        "verifier_precomputed_key_us": _per_call_us(lambda: uncached.verify(rs_token), n),
+        "verifier_cached_us": _per_call_us(lambda: rs_verifier.verify(rs_token), n),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Worker cold start: DDL at every boot vs the migrated-schema check.
+
+    python benchmarks/bench_cold_start.py [--runs 5] [--latency-ms 20] [--database-url URL]
+
+Each run is a fresh interpreter that imports app.main, runs the startup hooks
+and serves its first request (GET /items/?limit=50) in-process. Modes:
+
+* legacy: what startup did before migrations. It ran create_all, the
+  idempotent ALTER TABLE patches and the CREATE INDEX IF NOT EXISTS loop
+  (app.migrate's adoption step), then the rest of startup.
+* checked: startup's single alembic_version query (DB_SCHEMA_CHECK=error).
+
+Both run against the same database, migrated once beforehand. On SQLite (a
+temporary file unless --database-url is given), every statement is delayed by
+--latency-ms inside the driver to stand in for a remote database round trip.
+Prints one JSON object with the median seconds per phase and the statements
+executed during startup, for each mode.
+"""
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+class _SlowCursor(sqlite3.Cursor):
+    latency = 0.0
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().executemany(*args, **kwargs)
+
+
+class _SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=_SlowCursor):
+        return super().cursor(factory)
+
+
+def _child(args):
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    import asyncio
+    import httpx
+    from sqlalchemy import create_engine, event
+    from app import database, migrate
+
+    url = database.database_url()
+    if url.startswith("sqlite"):
+        _SlowCursor.latency = args.latency_ms / 1000
+        database.set_engine(create_engine(url, connect_args={"factory": _SlowConnection, "check_same_thread": False}))
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(database.get_engine(), "before_cursor_execute", count)
+
+    async def boot():
+        if args.child == "legacy":
+            with database.get_engine().begin() as conn:
+                migrate._adopt(conn)
+        await app.router.startup()
+        booted = time.perf_counter()
+        startup_statements = statements[0]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            r = await client.get("/items/", params={"limit": 50})
+        assert r.status_code == 200, r.text
+        served = time.perf_counter()
+        await app.router.shutdown()
+        return booted, served, startup_statements
+
+    booted, served, startup_statements = asyncio.run(boot())
+    print(json.dumps({
+        "import_s": imported - started,
+        "startup_s": booted - imported,
+        "first_request_s": served - booted,
+        "total_s": served - started,
+        "startup_statements": startup_statements,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--child", choices=["legacy", "checked"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.path.append(str(BACKEND_DIR))
+    if args.child:
+        _child(args)
+        return
+
+    url = args.database_url or f"sqlite:///{pathlib.Path(tempfile.mkdtemp()) / 'bench_cold_start.db'}"
+    env = {**os.environ, "DATABASE_URL": url, "AUTH_DISABLED": "true", "PYTHONWARNINGS": "ignore"}
+    env.pop("DB_PROFILE", None)
+    subprocess.run([sys.executable, "-m", "app.migrate", "upgrade"], cwd=BACKEND_DIR, env=env, check=True,
+                   capture_output=True)
+
+    result = {"runs": args.runs, "latency_ms": args.latency_ms, "database": url.split(":", 1)[0]}
+    for mode, check in (("legacy", "off"), ("checked", "error")):
+        samples = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--latency-ms", str(args.latency_ms)],
+                cwd=BACKEND_DIR, env={**env, "DB_SCHEMA_CHECK": check}, check=True, capture_output=True, text=True,
+            )
+            samples.append({**json.loads(out.stdout.strip().splitlines()[-1]), "process_s": time.perf_counter() - started})
+        result[mode] = {
+            key: round(statistics.median(s[key] for s in samples), 3 if key.endswith("_s") else None)
+            for key in samples[0]
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Stock reservation for orders full of nested combos: per-component walk vs flattened BOM.
+
+    python benchmarks/bench_combos.py [--orders 300] [--lines 5] [--depth 3] [--fanout 4] [--latency-ms 0.5]
+
+The catalogue holds combos nested --depth levels deep, each with --fanout
+components. "walk" expands every order line through the ORM relationships
+(lazy-loading components level by level) and reserves each stock-keeping item
+with its own conditional UPDATE; "flattened" is what create_order does now:
+one item_combo_leaves query for all combos and one set-based UPDATE. Every
+statement is delayed by --latency-ms (pass --database-url for a real server).
+Prints one JSON object with orders/s and statements per order for each.
+"""
+import argparse
+import json
+import os
+import pathlib
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+
+class _SlowCursor(sqlite3.Cursor):
+    latency = 0.0
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().executemany(*args, **kwargs)
+
+
+class _SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=_SlowCursor):
+        return super().cursor(factory)
+
+
+def _configure(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = pathlib.Path(tempfile.mkdtemp()) / "bench_combos.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    _SlowCursor.latency = args.latency_ms / 1000
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    _configure(args)
+
+    from decimal import Decimal
+    from sqlalchemy import event, update
+    from app import combos, database, models
+    from app.routes.orders import reserve_stock
+
+    if not args.database_url:
+        database.set_engine(database.create_engine(
+            os.environ["DATABASE_URL"], connect_args={"factory": _SlowConnection, "check_same_thread": False},
+        ))
+    database.init_db()
+
+    db = database.SessionLocal()
+    serial = iter(range(10 ** 9))
+
+    def new_item(**kwargs):
+        n = next(serial)
+        item = models.Item(name=f"Item {n}", sku=f"BENCH-{n}", price=Decimal("10.00"), **kwargs)
+        db.add(item)
+        return item
+
+    # Level 0 are stock-keeping items; each higher level combines `fanout` items below it
+    levels = [[new_item(stock=10 ** 9) for _ in range(args.fanout * 4)]]
+    for _ in range(args.depth):
+        levels.append([new_item(stock=0) for _ in range(args.fanout * 2)])
+    db.flush()
+    for below, level in zip(levels, levels[1:]):
+        for combo in level:
+            combos.set_components(db, combo.id, {c.id: random.randint(1, 3) for c in random.sample(below, args.fanout)})
+    db.commit()
+    sellable = [it.id for level in levels[1:] for it in level]
+    orders = [{i: random.randint(1, 2) for i in random.sample(sellable, args.lines)} for _ in range(args.orders)]
+
+    def walk(session, quantities):
+        items_map = {it.id: it for it in session.query(models.Item).filter(models.Item.id.in_(quantities))}
+        needed = {}
+
+        def expand(item, qty):
+            if not item.components:
+                needed[item.id] = needed.get(item.id, 0) + qty
+                return
+            for comp in item.components:
+                expand(comp.component_item, qty * comp.qty)
+
+        for item_id, qty in quantities.items():
+            expand(items_map[item_id], qty)
+        for item_id in sorted(needed):
+            session.execute(
+                update(models.Item)
+                .where(models.Item.id == item_id, models.Item.stock >= needed[item_id])
+                .values(stock=models.Item.stock - needed[item_id])
+                .execution_options(synchronize_session=False)
+            )
+
+    def flattened(session, quantities):
+        items_map = {it.id: it for it in session.query(models.Item).filter(models.Item.id.in_(quantities))}
+        bom, leaves = combos.load(session, quantities)
+        reserve_stock(session, combos.demand(bom, quantities), {**leaves, **items_map})
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count)
+    result = {"orders": args.orders, "lines": args.lines, "depth": args.depth, "fanout": args.fanout}
+    for name, reserve in (("walk", walk), ("flattened", flattened)):
+        statements[0] = 0
+        started = time.perf_counter()
+        for quantities in orders:
+            session = database.SessionLocal()
+            reserve(session, quantities)
+            session.commit()
+            session.close()
+        elapsed = time.perf_counter() - started
+        result[name] = {
+            "orders_per_s": round(args.orders / elapsed, 1),
+            "statements_per_order": round(statements[0] / args.orders, 1),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
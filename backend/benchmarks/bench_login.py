@@ -0,0 +1,136 @@
+"""Login throughput and threadpool stalls: inline bcrypt vs the password hashing pool.
+
+    python benchmarks/bench_login.py [--logins 200] [--concurrency 64] [--rounds 10]
+                                     [--workers N] [--queue 64] [--probe-ms 20]
+
+Drives a burst of --logins POST /users/login calls (--concurrency at a time)
+through the in-process app, while a probe calls the sync GET /health every
+--probe-ms. The probe measures how long other sync endpoints wait for a
+threadpool thread. Modes:
+
+* inline: the old sync route, passlib verify on a Starlette threadpool thread
+* threads: passwords.hasher with PASSWORD_HASH_WORKERS=0
+* processes: passwords.hasher with --workers processes (default: min(4, CPUs))
+
+Uses a temporary SQLite database. Prints one JSON object with logins/s,
+p50/p95 login latency, status counts, probe p95 and rejections for each mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from collections import Counter
+
+EMAIL, PASSWORD = "bench@example.com", "bench-password"
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else None
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 1)
+
+
+def _configure(args):
+    path = pathlib.Path(tempfile.mkdtemp()) / "bench_login.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+async def _burst(client, path, args):
+    latencies, statuses, probes = [], Counter(), []
+    remaining = [args.logins]
+    done = asyncio.Event()
+
+    async def login():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            r = await client.post(path, params={"email": EMAIL, "password": PASSWORD})
+            latencies.append(time.perf_counter() - started)
+            statuses[str(r.status_code)] += 1
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/health")
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(args.probe_ms / 1000)
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    return {
+        "logins_per_s": round(statuses["200"] / elapsed, 1),
+        "p50_ms": _ms(_percentile(latencies, 50)),
+        "p95_ms": _ms(_percentile(latencies, 95)),
+        "statuses": dict(statuses),
+        "probe_p95_ms": _ms(_percentile(probes, 95)),
+    }
+
+
+async def _run(args):
+    import httpx
+    from fastapi import Depends, HTTPException
+    from sqlalchemy.orm import Session
+    from app import database, models, passwords
+    from app.main import app
+
+    database.init_db()
+    db = database.SessionLocal()
+    db.add(models.User(name="Bench", email=EMAIL, role="admin", is_active=True,
+                       password_hash=passwords.hash_password(PASSWORD)))
+    db.commit()
+    db.close()
+
+    # The login route as it was: sync, bcrypt inline on the threadpool thread
+    @app.post("/bench/login-inline")
+    def login_inline(email: str, password: str, db: Session = Depends(database.get_db)):
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if not user or not passwords.verify_and_update(password, user.password_hash)[0]:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"ok": True}
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+    workers = args.workers if args.workers is not None else passwords.WORKERS
+    result = {"logins": args.logins, "concurrency": args.concurrency, "rounds": args.rounds,
+              "cpus": os.cpu_count(), "workers": workers}
+    try:
+        result["inline"] = await _burst(client, "/bench/login-inline", args)
+        for mode, count in (("threads", 0), ("processes", workers)):
+            passwords.hasher = passwords.PasswordHasher(workers=count, queue_limit=args.queue, rounds=args.rounds)
+            # Start the pool outside the measurement
+            await passwords.hasher.verify_and_update(PASSWORD, passwords.hash_password(PASSWORD))
+            result[mode] = {**await _burst(client, "/users/login", args),
+                            "rejected": passwords.hasher.metrics()["rejected"]}
+            passwords.hasher.shutdown()
+    finally:
+        await client.aclose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue", type=int, default=64)
+    parser.add_argument("--probe-ms", type=float, default=20)
+    args = parser.parse_args()
+    _configure(args)
+    print(json.dumps(asyncio.run(_run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
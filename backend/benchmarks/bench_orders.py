@@ -0,0 +1,176 @@
+"""Concurrent POST /orders throughput on one worker: sync Session vs AsyncSession.
+
+    python benchmarks/bench_orders.py [--orders 400] [--concurrency 32] [--latency-ms 2]
+
+"before" replays the previous handler (an `async def` route driving the blocking
+Session from get_db on the event loop); "after" is the real route on get_async_db.
+Requests run in-process through httpx's ASGI transport. On SQLite every statement
+is delayed by --latency-ms inside the driver to stand in for a remote database
+round trip (SQLite still serializes writers, so this mostly shows the event-loop
+effect); pass --database-url to run against a real PostgreSQL instead.
+
+Prints one JSON object with orders/s, latency percentiles and the worst event-loop
+stall (how long a 10 ms heartbeat was held up) for each variant.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+class _SlowCursor(sqlite3.Cursor):
+    latency = 0.0
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().executemany(*args, **kwargs)
+
+
+class _SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=_SlowCursor):
+        return super().cursor(factory)
+
+
+def _configure(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = pathlib.Path(tempfile.mkdtemp()) / "bench_orders.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["AUTH_DISABLED"] = "true"
+    _SlowCursor.latency = args.latency_ms / 1000
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(app, path, payload, orders, concurrency):
+    import httpx
+
+    latencies, stalls = [], [0.0]
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - started - 0.01)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        queue = asyncio.Queue()
+        for _ in range(orders):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                r = await client.post(path, json=payload)
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+
+    return {
+        "orders_per_s": round(orders / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "max_loop_stall_ms": round(max(stalls) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    _configure(args)
+
+    from decimal import Decimal
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+    from app import database, models, rollup, schemas
+    from app.main import app
+    from app.routes.orders import reserve_stock
+
+    if not args.database_url:
+        database.set_engine(database.create_engine(
+            os.environ["DATABASE_URL"], pool_size=args.concurrency, max_overflow=args.concurrency,
+            connect_args={"factory": _SlowConnection, "check_same_thread": False, "timeout": 60},
+        ))
+        database._async_engine = database.create_async_engine(
+            database.async_database_url(), connect_args={"factory": _SlowConnection, "timeout": 60}, poolclass=database.NullPool,
+        )
+        database._AsyncSessionLocal = database.async_sessionmaker(
+            database._async_engine, autoflush=False, expire_on_commit=False,
+        )
+    database.init_db()
+
+    @app.post("/bench/orders-sync", response_model=schemas.OrderOut, status_code=201)
+    async def legacy_create_order(payload: schemas.OrderCreate, db: Session = Depends(database.get_db)):
+        # The handler as it was before the async port: blocking calls on the event loop
+        if not db.query(models.Customer).filter(models.Customer.id == payload.customer_id).first():
+            raise RuntimeError("customer missing")
+        items_map = {
+            it.id: it for it in db.query(models.Item).filter(
+                models.Item.id.in_([e.item_id for e in payload.items])).all()
+        }
+        quantities = {e.item_id: e.qty for e in payload.items}
+        reserve_stock(db, quantities, items_map)
+        order = models.Order(customer_id=payload.customer_id, status=models.OrderStatus.pending, items=[])
+        db.add(order)
+        db.flush()
+        total = Decimal("0.00")
+        for item_id, qty in quantities.items():
+            total += items_map[item_id].price * qty
+            it = items_map[item_id]
+            order.items.append(models.OrderItem.line(item_id, qty, it.price, it.gst_rate, order_id=order.id))
+        order.total = total
+        rollup.record_order(db, order)
+        db.commit()
+        db.refresh(order)
+        return order
+
+    db = database.SessionLocal()
+    # AUTH_DISABLED resolves requests to the first active user; create it up front
+    db.add(models.User(name="Dev User", email="dev@example.com", role="admin", is_active=True))
+    customer = models.Customer(name="Bench")
+    items = [models.Item(name=f"Item {n}", sku=f"BENCH-{n}", price=Decimal("10.00"), stock=10 ** 9)
+             for n in range(3)]
+    db.add_all([customer, *items])
+    db.commit()
+    payload = {"customer_id": customer.id, "items": [{"item_id": it.id, "qty": 1} for it in items]}
+    db.close()
+
+    result = {
+        "orders": args.orders,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms if not args.database_url else None,
+        "sync_session": asyncio.run(_run(app, "/bench/orders-sync", payload, args.orders, args.concurrency)),
+        "async_session": asyncio.run(_run(app, "/orders/", payload, args.orders, args.concurrency)),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""CPU cost of list responses: validated ORM objects vs the FAST_LIST_JSON row path.
+
+    python benchmarks/bench_serialization.py [--rows 10000] [--repeat 5] [--database-url URL]
+
+Seeds --rows customers, items and orders (through seed.py, in a temporary SQLite
+file unless --database-url is given) and fetches each unpaginated list in-process
+--repeat times, first with per-row pydantic validation and the stdlib encoder
+("validated"), then with column tuples encoded by orjson ("fast"). Reports the
+process CPU time (query, serialization and framework overhead together) per 10k
+rows returned, the best of the repeats, and checks both bodies are equal.
+Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+
+
+def _configure(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = pathlib.Path(tempfile.mkdtemp()) / "bench_serialization.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["AUTH_DISABLED"] = "true"
+    sys.path.append(str(BENCH_DIR.parent))
+    sys.path.append(str(BENCH_DIR))
+
+
+def _cpu_per_10k(client, path, repeat):
+    best, body = None, None
+    for _ in range(repeat):
+        started = time.process_time()
+        r = client.get(path)
+        spent = time.process_time() - started
+        body = r.json()
+        best = spent if best is None else min(best, spent)
+    return round(best * 1000 * 10000 / max(1, len(body)), 1), body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    _configure(args)
+
+    from fastapi.testclient import TestClient
+    from app import database, fast_json
+    from app.main import app
+    import seed
+
+    database.init_db()
+    db = database.SessionLocal()
+    seed.seed(db, argparse.Namespace(
+        customers=args.rows, items=args.rows, combos=0, orders=args.rows, max_lines=3, days=180, seed=7,
+    ))
+    db.commit()
+    db.close()
+
+    result = {"rows": args.rows, "encoder": "orjson" if fast_json.orjson else "json", "cpu_ms_per_10k_rows": {}}
+    client = TestClient(app)
+    for path in ("/items/", "/customers/", "/orders/"):
+        fast_json.ENABLED = False
+        validated, expected = _cpu_per_10k(client, path, args.repeat)
+        fast_json.ENABLED = True
+        fast, body = _cpu_per_10k(client, path, args.repeat)
+        result["cpu_ms_per_10k_rows"][path] = {
+            "validated": validated, "fast": fast, "speedup": round(validated / fast, 1), "identical": body == expected,
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""WebSocket fan-out to thousands of simulated clients: sequential sends vs send queues.
+
+    python benchmarks/bench_ws.py [--clients 5000] [--messages 20] [--slow 10] [--slow-delay-ms 50]
+
+Clients are in-memory sockets whose send_text yields to the loop (and sleeps for
+--slow-delay-ms on the --slow stuck clients). "sequential" is the previous
+broadcast, which awaited every send in turn inside the producing request;
+"queued" is ConnectionManager. Prints one JSON object with producer time per
+broadcast and the time until every healthy client had every message.
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from app.websocket import SEND_QUEUE_SIZE, ConnectionManager  # noqa: E402
+
+
+class _Client:
+    def __init__(self, delay: float, expected: int, done: asyncio.Event, counter: list):
+        self.delay = delay
+        self.expected = expected
+        self.received = 0
+        self.done = done
+        self.counter = counter
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        # A disconnected client is finished too (it would reconnect and resync)
+        if self.received < self.expected:
+            self._finish()
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+        if self.received == self.expected:
+            self._finish()
+
+    def _finish(self):
+        if self.delay:
+            return
+        self.counter[0] -= 1
+        if self.counter[0] == 0:
+            self.done.set()
+
+
+def _clients(args, done, counter):
+    slow = args.slow_delay_ms / 1000
+    return [_Client(slow if n < args.slow else 0, args.messages, done, counter) for n in range(args.clients)]
+
+
+async def _sequential(args):
+    done, counter = asyncio.Event(), [args.clients - args.slow]
+    clients = _clients(args, done, counter)
+    producer = []
+    started = time.perf_counter()
+    for n in range(args.messages):
+        t = time.perf_counter()
+        data = json.dumps({"type": "order_update", "data": {"order_id": n}})
+        for ws in clients:
+            await ws.send_text(data)
+        producer.append(time.perf_counter() - t)
+    await done.wait()
+    return producer, time.perf_counter() - started
+
+
+async def _queued(args):
+    done, counter = asyncio.Event(), [args.clients - args.slow]
+    clients = _clients(args, done, counter)
+    manager = ConnectionManager(queue_size=args.queue_size, policy=args.policy)
+    for ws in clients:
+        await manager.connect(ws)
+    producer = []
+    started = time.perf_counter()
+    for n in range(args.messages):
+        t = time.perf_counter()
+        await manager.broadcast({"type": "order_update", "data": {"order_id": n}})
+        producer.append(time.perf_counter() - t)
+        await asyncio.sleep(0)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    stats = manager.metrics()
+    await manager.stop()
+    return producer, elapsed, stats
+
+
+def _summary(producer, elapsed):
+    return {
+        "producer_us_per_broadcast": round(statistics.mean(producer) * 1e6, 1),
+        "all_healthy_clients_done_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=10)
+    parser.add_argument("--slow-delay-ms", type=float, default=50)
+    parser.add_argument("--queue-size", type=int, default=SEND_QUEUE_SIZE)
+    parser.add_argument("--policy", default="disconnect")
+    args = parser.parse_args()
+
+    seq_producer, seq_elapsed = asyncio.run(_sequential(args))
+    q_producer, q_elapsed, stats = asyncio.run(_queued(args))
+    print(json.dumps({
+        "clients": args.clients,
+        "messages": args.messages,
+        "slow_clients": args.slow,
+        "sequential": _summary(seq_producer, seq_elapsed),
+        "queued": {**_summary(q_producer, q_elapsed), "slow_disconnects": stats["slow_disconnects"],
+                   "dropped": stats["dropped"]},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
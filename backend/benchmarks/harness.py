@@ -0,0 +1,295 @@
+"""Load harness for the API hot paths, reporting machine-readable JSON.
+
+    python benchmarks/harness.py [--base-url http://127.0.0.1:8000] [--database-url URL]
+        [--scenarios create_order,list_orders,list_items,list_customers,login,ws_fanout]
+        [--requests 500] [--concurrency 16] [--login-requests 50] [--ws-clients 200] [--ws-orders 20]
+        [--output run.json] [--compare baseline.json]
+
+Without --base-url the app runs in-process (httpx ASGI transport, startup hooks
+run) on DATABASE_URL or --database-url, normally a database filled by seed.py.
+With --base-url, requests go to a running server instead. Requests authenticate
+as seed.py's bench user.
+
+Each HTTP scenario reports throughput, p50/p95/p99 latency, status counts and
+queries per request. The query count comes from the X-DB-Queries header, so a
+remote server needs DB_PROFILE and DB_DEBUG_HEADERS; in-process runs enable
+both. ws_fanout subscribes --ws-clients sockets to the orders topic and places
+--ws-orders orders one at a time. It measures the time until every socket has
+each order.created event. Remote ws_fanout needs the `websockets` package.
+
+The output records the git commit. --compare adds each metric's % change
+against an earlier run's output.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+HTTP_SCENARIOS = ("create_order", "list_orders", "list_items", "list_customers", "login")
+ALL_SCENARIOS = HTTP_SCENARIOS + ("ws_fanout",)
+COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _latency_summary(latencies):
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def _drive(client, make_request, total, concurrency):
+    latencies, statuses, queries = [], Counter(), []
+    remaining = [total]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            method, url, kwargs = make_request()
+            started = time.perf_counter()
+            try:
+                r = await client.request(method, url, **kwargs)
+            except Exception as exc:
+                statuses[type(exc).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[str(r.status_code)] += 1
+            if "x-db-queries" in r.headers:
+                queries.append(int(r.headers["x-db-queries"]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "throughput_rps": round(total / elapsed, 1),
+        **_latency_summary(latencies),
+        "statuses": dict(statuses),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+async def _catalogue(client, headers):
+    customers = (await client.get("/customers/", params={"limit": 200}, headers=headers)).json()
+    items = (await client.get("/items/", params={"limit": 500}, headers=headers)).json()
+    # Anything with plenty of stock (or combo availability), so orders rarely hit 409
+    sellable = [i["id"] for i in items if (i["combo_available"] if i["combo_available"] is not None else i["stock"]) > 200]
+    if not customers or not sellable:
+        raise SystemExit("No customers/items to order; seed the database first (benchmarks/seed.py)")
+    return [c["id"] for c in customers], sellable
+
+
+def _order_payload(rng, customers, items):
+    return {
+        "customer_id": rng.choice(customers),
+        "items": [{"item_id": i, "qty": rng.randint(1, 2)} for i in rng.sample(items, min(len(items), rng.randint(1, 3)))],
+    }
+
+
+class _InProcessSocket:
+    """Stand-in WebSocket handed straight to the app's ConnectionManager."""
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.on_event(json.loads(data))
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _ws_fanout(args, client, headers, customers, items, rng):
+    seen, finished, waiting = Counter(), {}, {}
+
+    def on_event(message):
+        if message.get("type") != "order.created":
+            return
+        order_id = message["data"]["order_id"]
+        seen[order_id] += 1
+        if seen[order_id] == args.ws_clients:
+            finished[order_id] = time.perf_counter()
+            if order_id in waiting:
+                waiting[order_id].set()
+
+    sockets, readers = [], []
+    if args.base_url:
+        import websockets
+
+        url = args.base_url.replace("http", "ws", 1) + "/ws/orders"
+
+        async def read(ws):
+            async for data in ws:
+                on_event(json.loads(data))
+
+        for _ in range(args.ws_clients):
+            ws = await websockets.connect(url)
+            await ws.send(json.dumps({"action": "subscribe", "topics": ["orders"]}))
+            sockets.append(ws)
+            readers.append(asyncio.create_task(read(ws)))
+    else:
+        from app.websocket import manager
+
+        for _ in range(args.ws_clients):
+            conn = await manager.connect(_InProcessSocket(on_event))
+            manager.subscribe(conn, ["orders"])
+            sockets.append(conn)
+    await asyncio.sleep(0.2)
+
+    producer, fanout, lost = [], [], 0
+    for _ in range(args.ws_orders):
+        started = time.perf_counter()
+        r = await client.post("/orders/", json=_order_payload(rng, customers, items), headers=headers)
+        producer.append(time.perf_counter() - started)
+        if r.status_code != 201:
+            continue
+        # Every client may already have it by the time the POST returns
+        order_id = r.json()["id"]
+        waiting[order_id] = asyncio.Event()
+        if order_id not in finished:
+            try:
+                await asyncio.wait_for(waiting[order_id].wait(), 10)
+            except asyncio.TimeoutError:
+                lost += 1
+                continue
+        fanout.append(finished[order_id] - started)
+
+    for task in readers:
+        task.cancel()
+    for ws in sockets:
+        if args.base_url:
+            await ws.close()
+        else:
+            manager.disconnect(ws.websocket)
+    return {
+        "clients": args.ws_clients,
+        "orders": args.ws_orders,
+        "post_order": _latency_summary(producer),
+        "all_clients_received": _latency_summary(fanout),
+        "timed_out": lost,
+    }
+
+
+async def _run(args, app=None):
+    import httpx
+
+    rng = random.Random(args.seed)
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://harness", timeout=60)
+        await app.router.startup()
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+
+    credentials = {"email": args.email, "password": args.password}
+    r = await client.post("/users/login", params=credentials)
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"} if r.status_code == 200 else {}
+    customers, items = await _catalogue(client, headers)
+
+    requests = {
+        "create_order": lambda: ("POST", "/orders/", {"json": _order_payload(rng, customers, items), "headers": headers}),
+        "list_orders": lambda: ("GET", "/orders/", {"params": {"limit": 50}, "headers": headers}),
+        "list_items": lambda: ("GET", "/items/", {"params": {"limit": 50}, "headers": headers}),
+        "list_customers": lambda: ("GET", "/customers/", {"params": {"limit": 50}, "headers": headers}),
+        "login": lambda: ("POST", "/users/login", {"params": credentials}),
+    }
+    results = {}
+    try:
+        for name in args.scenarios:
+            if name == "ws_fanout":
+                results[name] = await _ws_fanout(args, client, headers, customers, items, rng)
+                continue
+            total = args.login_requests if name == "login" else args.requests
+            results[name] = await _drive(client, requests[name], total, args.concurrency)
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+    return results
+
+
+def _compare(results, baseline):
+    for name, metrics in results.items():
+        before = baseline.get("scenarios", {}).get(name, {})
+        changes = {}
+        for key in COMPARED:
+            if metrics.get(key) and before.get(key):
+                changes[key] = round((metrics[key] - before[key]) / before[key] * 100, 1)
+        if changes:
+            metrics["vs_baseline_pct"] = changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--scenarios", default=",".join(ALL_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ws-clients", type=int, default=200)
+    parser.add_argument("--ws-orders", type=int, default=20)
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(ALL_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    app = None
+    if not args.base_url:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        os.environ["DB_PROFILE"] = "true"
+        os.environ["DB_DEBUG_HEADERS"] = "true"
+        sys.path.append(str(BACKEND_DIR))
+        from app.main import app
+
+    results = asyncio.run(_run(args, app))
+    if args.compare:
+        _compare(results, json.loads(pathlib.Path(args.compare).read_text()))
+    report = {
+        "commit": _git_commit(),
+        "target": args.base_url or "in-process",
+        "database": None if args.base_url else os.environ.get("DATABASE_URL", "").split(":", 1)[0],
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
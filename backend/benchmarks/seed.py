@@ -0,0 +1,205 @@
+"""Seed a database with a synthetic, reproducible store for load tests and benchmarks.
+
+    python benchmarks/seed.py [--database-url URL] [--reset] [--customers 5000] [--items 1000]
+                              [--combos 50] [--orders 20000] [--max-lines 6] [--days 180] [--seed 42]
+
+Targets DATABASE_URL (SQLite or PostgreSQL) unless --database-url is given, and
+migrates it to the current schema first (app.migrate). The same --seed always
+produces the same data:
+
+* items: log-normal prices, GST slabs weighted like a general store, stock and
+  reorder points spread so a few percent start low
+* combos: 2-4 plain components (optionally one nested combo) priced ~10% under
+  the parts, with item_combo_leaves filled through app.combos
+* orders: customers and items drawn from Zipf-like popularity, 1..--max-lines
+  lines, evening-heavy timestamps over the last --days, ~80% completed,
+  ~15% pending and ~5% canceled; daily rollups are rebuilt afterwards
+* users: bench@example.com / bench-password (admin), used by harness.py --login
+
+Rows go in with batched executemany INSERTs; history does not move item stock.
+Prints one JSON object with row counts and elapsed seconds.
+"""
+import argparse
+import json
+import os
+import pathlib
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+BATCH = 1000
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+_FIRST = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Meera",
+          "Karan", "Divya", "Aditya", "Pooja", "Nikhil", "Isha", "Sanjay", "Neha", "Manoj", "Lakshmi"]
+_LAST = ["Sharma", "Patel", "Reddy", "Iyer", "Singh", "Nair", "Gupta", "Das", "Menon", "Rao", "Joshi", "Khan"]
+_CATEGORIES = ["Grocery", "Beverages", "Snacks", "Dairy", "Personal Care", "Household", "Stationery", "Frozen"]
+_GST = [(0, 10), (5, 35), (12, 20), (18, 30), (28, 5)]
+_STATUSES = [("completed", 80), ("pending", 15), ("canceled", 5)]
+
+
+def _weighted(rng, pairs):
+    return rng.choices([v for v, _ in pairs], weights=[w for _, w in pairs])[0]
+
+
+def _zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _timestamp(rng, now, days):
+    day = now - timedelta(days=rng.randrange(days))
+    # Evening-heavy trading hours
+    hour = min(22, max(8, int(rng.gauss(18, 3))))
+    return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+
+def _insert(db, model, rows, returning=None):
+    from sqlalchemy import insert
+
+    ids = []
+    for start in range(0, len(rows), BATCH):
+        chunk = rows[start:start + BATCH]
+        if returning is None:
+            db.execute(insert(model), chunk)
+        else:
+            stmt = insert(model).returning(returning, sort_by_parameter_order=True)
+            ids.extend(db.scalars(stmt, chunk).all())
+    return ids
+
+
+def seed(db, args):
+    from app import combos, models, rollup
+    from app.passwords import hash_password
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    tag = f"S{args.seed}"
+
+    if not db.query(models.User).filter(models.User.email == BENCH_EMAIL).first():
+        db.add(models.User(name="Bench Admin", email=BENCH_EMAIL, role="admin", is_active=True,
+                           password_hash=hash_password(BENCH_PASSWORD)))
+
+    customers = []
+    for n in range(args.customers):
+        first, last = rng.choice(_FIRST), rng.choice(_LAST)
+        created = _timestamp(rng, now, args.days * 2)
+        data = {
+            "name": f"{first} {last}",
+            "phone": f"+91 {rng.randrange(6, 10)}{rng.randrange(10 ** 8, 10 ** 9)}",
+            "email": f"{first}.{last}.{tag}.{n}@example.com".lower() if rng.random() < 0.6 else None,
+            "gstin": f"{rng.randrange(1, 37):02d}{tag}{n:06d}Z{rng.randrange(10)}" if rng.random() < 0.1 else None,
+            "created_at": created, "updated_at": created,
+        }
+        customers.append({**data, **models.Customer.lookup_keys(data)})
+    customer_ids = _insert(db, models.Customer, customers, models.Customer.id)
+
+    items = []
+    for n in range(args.items):
+        reorder = rng.randrange(5, 50)
+        created = _timestamp(rng, now, args.days * 2)
+        items.append({
+            "name": f"{rng.choice(_CATEGORIES)} item {n}", "sku": f"{tag}-{n:06d}",
+            "category": rng.choice(_CATEGORIES),
+            "price": Decimal(str(round(min(5000.0, max(10.0, rng.lognormvariate(4.5, 1.0))), 2))),
+            "stock": rng.randrange(reorder + 1, reorder + 2000) if rng.random() < 0.95 else rng.randrange(reorder + 1),
+            "reorder_point": reorder, "gst_rate": _weighted(rng, _GST),
+            "created_at": created, "updated_at": created,
+        })
+    item_ids = _insert(db, models.Item, items, models.Item.id)
+    prices = {item_id: row["price"] for item_id, row in zip(item_ids, items)}
+    gst_rates = {item_id: row["gst_rate"] for item_id, row in zip(item_ids, items)}
+
+    combo_ids = []
+    for n in range(args.combos):
+        parts = {i: rng.randint(1, 2) for i in rng.sample(item_ids, rng.randint(2, 4))}
+        if combo_ids and rng.random() < 0.2:
+            parts[rng.choice(combo_ids)] = 1
+        price = sum((prices[i] * q for i, q in parts.items()), Decimal("0.00")) * Decimal("0.9")
+        combo = models.Item(name=f"Combo {n}", sku=f"{tag}-C{n:05d}", category="Combos",
+                            price=price.quantize(Decimal("0.01")), stock=0, reorder_point=0, gst_rate=18)
+        db.add(combo)
+        db.flush()
+        combos.set_components(db, combo.id, parts)
+        combo_ids.append(combo.id)
+        prices[combo.id] = combo.price
+        gst_rates[combo.id] = combo.gst_rate
+    sellable = item_ids + combo_ids
+
+    rng.shuffle(customer_ids)
+    rng.shuffle(sellable)
+    customer_weights = _zipf_weights(len(customer_ids), 0.8)
+    item_weights = _zipf_weights(len(sellable))
+    lines_total = 0
+    for start in range(0, args.orders, BATCH):
+        n = min(BATCH, args.orders - start)
+        orders, order_lines = [], []
+        for customer_id in rng.choices(customer_ids, weights=customer_weights, k=n):
+            count = min(args.max_lines, 1 + int(rng.expovariate(0.7)))
+            lines = {}
+            for item_id in rng.choices(sellable, weights=item_weights, k=count):
+                lines[item_id] = lines.get(item_id, 0) + rng.randint(1, 3)
+            created = _timestamp(rng, now, args.days)
+            orders.append({
+                "customer_id": customer_id, "status": models.OrderStatus(_weighted(rng, _STATUSES)),
+                "total": sum((prices[i] * q for i, q in lines.items()), Decimal("0.00")),
+                "created_at": created, "updated_at": created,
+            })
+            order_lines.append(lines)
+        order_ids = _insert(db, models.Order, orders, models.Order.id)
+        rows = [
+            {"order_id": order_id, "item_id": item_id, "qty": qty, "price": prices[item_id],
+             "gst_rate": gst_rates[item_id], "gst": models.line_gst(prices[item_id], qty, gst_rates[item_id])}
+            for order_id, lines in zip(order_ids, order_lines) for item_id, qty in lines.items()
+        ]
+        _insert(db, models.OrderItem, rows)
+        lines_total += len(rows)
+    db.flush()
+    rollup.rebuild(db)
+    return {
+        "customers": len(customer_ids), "items": len(item_ids), "combos": len(combo_ids),
+        "orders": args.orders, "order_items": lines_total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--reset", action="store_true", help="Drop all tables and migrate from scratch first")
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--combos", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--max-lines", type=int, default=6)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+    from sqlalchemy import text
+    from app import database, migrate, models  # noqa: F401
+
+    if args.reset:
+        database.Base.metadata.drop_all(bind=database.engine)
+        with database.engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    migrate.upgrade()
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        counts = seed(db, args)
+        db.commit()
+    finally:
+        db.close()
+    print(json.dumps({
+        "database": database.engine.dialect.name, "seed": args.seed, **counts,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
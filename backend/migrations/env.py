@@ -0,0 +1,53 @@
+"""Alembic environment: DATABASE_URL and the app's models.
+
+app.migrate passes its open connection in `config.attributes["connection"]`;
+the `alembic` command line connects through app.database itself.
+"""
+from logging.config import fileConfig
+from alembic import context
+from app import models  # noqa: F401
+from app.database import Base, database_url, get_engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite can't ALTER most things; batch mode rebuilds the table instead
+        render_as_batch=kwargs.pop("dialect_name", None) == "sqlite",
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _configure(url=database_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection):
+    _configure(connection=connection, dialect_name=connection.dialect.name)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with get_engine().connect() as connection:
+        _run(connection)
+        connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
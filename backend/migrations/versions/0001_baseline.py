@@ -0,0 +1,236 @@
+"""Baseline: the schema as create_all and init_db's patches left it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created before migrations existed are stamped with this revision by
+`python -m app.migrate upgrade` after their missing columns and indexes are
+added, instead of running it.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Created once up front on PostgreSQL; create_table would try once per table
+_STATUSES = ("pending", "completed", "canceled")
+order_status = sa.Enum(*_STATUSES, name="orderstatus").with_variant(
+    postgresql.ENUM(*_STATUSES, name="orderstatus", create_type=False), "postgresql",
+)
+
+# (table, column) pairs searched with ILIKE / similarity by routes/search.py
+TRIGRAM_INDEXES = [
+    ("customers", "name"),
+    ("customers", "phone_norm"),
+    ("items", "name"),
+    ("items", "sku"),
+    ("users", "name"),
+]
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(*_STATUSES, name="orderstatus").create(bind, checkfirst=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"])
+
+    op.create_table(
+        "customers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=True),
+        sa.Column("phone", sa.String(length=50), nullable=True),
+        sa.Column("gstin", sa.String(length=32), nullable=True),
+        sa.Column("company_name", sa.String(length=255), nullable=True),
+        sa.Column("address", sa.String(length=500), nullable=True),
+        sa.Column("phone_norm", sa.String(length=20), nullable=True),
+        sa.Column("email_norm", sa.String(length=255), nullable=True),
+        sa.Column("gstin_norm", sa.String(length=32), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_customers_id", "customers", ["id"])
+    op.create_index("ix_customers_email", "customers", ["email"])
+    op.create_index("ix_customers_phone_norm", "customers", ["phone_norm"])
+    op.create_index("ix_customers_email_norm", "customers", ["email_norm"])
+    op.create_index("ix_customers_gstin_norm", "customers", ["gstin_norm"])
+    op.create_index("ix_customers_created_at_id", "customers", ["created_at", "id"])
+    op.create_index("ix_customers_updated_at_id", "customers", ["updated_at", "id"])
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("sku", sa.String(length=100), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=True),
+        sa.Column("price", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("stock", sa.Integer(), nullable=False),
+        sa.Column("reorder_point", sa.Integer(), nullable=False),
+        sa.Column("gst_rate", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("sku", name="uq_item_sku"),
+    )
+    op.create_index("ix_items_id", "items", ["id"])
+    op.create_index("ix_items_created_at_id", "items", ["created_at", "id"])
+    op.create_index("ix_items_category_created_at_id", "items", ["category", "created_at", "id"])
+    op.create_index("ix_items_updated_at_id", "items", ["updated_at", "id"])
+    op.create_index(
+        "ix_items_low_stock", "items", [sa.text("(stock - reorder_point)"), "id"],
+        postgresql_where=sa.text("stock <= reorder_point"), sqlite_where=sa.text("stock <= reorder_point"),
+    )
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("status", order_status, nullable=False),
+        sa.Column("idempotency_key", sa.String(length=100), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["customer_id"], ["customers.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("idempotency_key"),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+    op.create_index("ix_orders_created_at_id", "orders", ["created_at", "id"])
+    op.create_index("ix_orders_status_created_at_id", "orders", ["status", "created_at", "id"])
+    op.create_index("ix_orders_customer_created_at_id", "orders", ["customer_id", "created_at", "id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], ondelete="RESTRICT"),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("order_id", "item_id"),
+    )
+
+    op.create_table(
+        "settings",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("company_name", sa.String(length=255), nullable=True),
+        sa.Column("address", sa.String(length=1000), nullable=True),
+        sa.Column("phone", sa.String(length=64), nullable=True),
+        sa.Column("email", sa.String(length=255), nullable=True),
+        sa.Column("gstin", sa.String(length=64), nullable=True),
+        sa.Column("currency", sa.String(length=10), nullable=False),
+        sa.Column("email_updates", sa.Boolean(), nullable=False),
+        sa.Column("sms_alerts", sa.Boolean(), nullable=False),
+        sa.Column("low_stock_reminders", sa.Boolean(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "item_combo_components",
+        sa.Column("combo_item_id", sa.Integer(), nullable=False),
+        sa.Column("component_item_id", sa.Integer(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["combo_item_id"], ["items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["component_item_id"], ["items.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("combo_item_id", "component_item_id"),
+    )
+    op.create_table(
+        "item_combo_leaves",
+        sa.Column("combo_item_id", sa.Integer(), nullable=False),
+        sa.Column("leaf_item_id", sa.Integer(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["combo_item_id"], ["items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["leaf_item_id"], ["items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("combo_item_id", "leaf_item_id"),
+    )
+    op.create_index("ix_item_combo_leaves_leaf", "item_combo_leaves", ["leaf_item_id"])
+
+    op.create_table(
+        "order_events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("topic", sa.String(length=32), nullable=False),
+        sa.Column("type", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("dispatched_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_order_events_pending", "order_events", ["id"],
+        postgresql_where=sa.text("dispatched_at IS NULL"), sqlite_where=sa.text("dispatched_at IS NULL"),
+    )
+    op.create_index("ix_order_events_dispatched_at", "order_events", ["dispatched_at"])
+
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("table_name", sa.String(length=64), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tombstones_table_deleted_at", "tombstones", ["table_name", "deleted_at"])
+
+    op.create_table(
+        "daily_sales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("status", order_status, nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("gst", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("day", "item_id", "status"),
+    )
+    op.create_table(
+        "daily_order_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", order_status, nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("gst", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint("day", "status"),
+    )
+
+    # Trigram indexes for fuzzy /search matching (SQLite uses LIKE scans)
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, column in TRIGRAM_INDEXES:
+            op.execute(f"CREATE INDEX ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)")
+
+
+def downgrade():
+    for table in (
+        "daily_order_stats", "daily_sales", "tombstones", "order_events", "item_combo_leaves",
+        "item_combo_components", "settings", "order_items", "orders", "items", "customers", "users",
+    ):
+        op.drop_table(table)
+    if op.get_bind().dialect.name == "postgresql":
+        postgresql.ENUM(name="orderstatus").drop(op.get_bind(), checkfirst=True)
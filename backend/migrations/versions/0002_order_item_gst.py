@@ -0,0 +1,36 @@
+"""Store the GST rate and amount on order lines.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Existing lines are backfilled from the item's current rate, the best record
+there is; run `python -m app.rollup rebuild` afterwards so the rollups sum the
+stored amounts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("order_items") as batch:
+        batch.add_column(sa.Column("gst_rate", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("gst", sa.Numeric(precision=12, scale=2), nullable=True))
+    op.execute(
+        "UPDATE order_items SET gst_rate = (SELECT items.gst_rate FROM items WHERE items.id = order_items.item_id)"
+    )
+    op.execute("UPDATE order_items SET gst = ROUND(ROUND(price * qty, 2) * gst_rate / 100.0, 2)")
+    with op.batch_alter_table("order_items") as batch:
+        batch.alter_column("gst_rate", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("gst", existing_type=sa.Numeric(precision=12, scale=2), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table("order_items") as batch:
+        batch.drop_column("gst")
+        batch.drop_column("gst_rate")
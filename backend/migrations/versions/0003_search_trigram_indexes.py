@@ -0,0 +1,38 @@
+"""Trigram indexes for the remaining /search predicates.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Every predicate OR'd into a search query needs an index for PostgreSQL to
+combine them with a BitmapOr. Until now the email prefix, category and role
+predicates had none, so each search scanned the whole table. SQLite has no
+trigram indexes and is left alone.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ("customers", "email_norm"),
+    ("items", "category"),
+    ("users", "email"),
+    ("users", "role"),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_{column}_trgm")
@@ -0,0 +1,23 @@
+"""Tag outbox events with the worker that wrote them.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("order_events") as batch:
+        batch.add_column(sa.Column("worker_id", sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("order_events") as batch:
+        batch.drop_column("worker_id")
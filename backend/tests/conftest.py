@@ -0,0 +1,68 @@
+import contextlib
+import os
+import sys
+import pathlib
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+# Configure test environment before the app is imported
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("AUTH_DISABLED", "true")
+os.environ.setdefault("DB_PROFILE", "true")
+os.environ.setdefault("DB_DEBUG_HEADERS", "true")
+# Cheap bcrypt, hashed in threads; test_passwords covers the process pool
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+# Each test builds its tables with create_all; test_migrations covers Alembic
+os.environ.setdefault("DB_SCHEMA_CHECK", "off")
+
+# Ensure the backend package is importable
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from app.main import app  # noqa: E402
+from app.database import Base, engine, get_async_engine  # noqa: E402
+from app.settings_service import settings_service  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(bind=engine)
+    settings_service.invalidate()
+    yield
+    Base.metadata.drop_all(bind=engine)
+    # Release pooled connections so the next test doesn't write to an unlinked file
+    engine.dispose()
+    db_file = pathlib.Path("test.db")
+    if db_file.exists():
+        db_file.unlink()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@contextlib.contextmanager
+def _count_queries():
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [engine, get_async_engine().sync_engine]
+    for e in engines:
+        event.listen(e, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", _record)
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting the SQL statements executed inside it."""
+    return _count_queries
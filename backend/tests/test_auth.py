@@ -0,0 +1,94 @@
+import pytest
+from app import auth
+
+
+@pytest.fixture
+def token(client, monkeypatch):
+    auth.user_cache.clear()
+    r = client.post("/users/", json={"name": "Cashier", "email": "cashier@example.com", "password": "s3cret"})
+    assert r.status_code == 201
+    monkeypatch.setattr(auth, "AUTH_DISABLED", False)
+    r = client.post("/users/login", params={"email": "cashier@example.com", "password": "s3cret"})
+    assert r.status_code == 200
+    yield r.json()["access_token"]
+    auth.user_cache.clear()
+
+
+def _users_lookups(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_authenticated_requests_hit_user_cache(client, token, count_queries):
+    headers = {"Authorization": f"Bearer {token}"}
+    with count_queries() as first:
+        assert client.get("/items/", headers=headers).status_code == 200
+    with count_queries() as second:
+        assert client.get("/items/", headers=headers).status_code == 200
+    assert len(_users_lookups(first)) == 1
+    assert _users_lookups(second) == []
+    assert auth.user_cache.stats()["hits"] >= 1
+
+
+def test_deactivating_user_invalidates_cache(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    me = client.get("/users/", headers=headers).json()[0]
+    assert client.delete(f"/users/{me['id']}", headers=headers).status_code == 204
+    assert client.get("/items/", headers=headers).status_code == 401
+
+
+def test_patching_user_inactive_invalidates_cache(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    me = client.get("/users/", headers=headers).json()[0]
+    assert client.patch(f"/users/{me['id']}", json={"is_active": False}, headers=headers).status_code == 200
+    assert client.get("/items/", headers=headers).status_code == 401
+
+
+def test_user_cache_invalidated_only_on_commit(client, token):
+    from sqlalchemy import text
+    from app.database import SessionLocal
+
+    assert client.get("/items/", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        auth.invalidate_user(db, "cashier@example.com")
+        assert auth.user_cache.get("cashier@example.com") is not None
+        db.commit()
+        assert auth.user_cache.get("cashier@example.com") is None
+    finally:
+        db.close()
+
+
+def _rsa_jwk(kid):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives import serialization
+    from jose import jwk
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    return pem, {**public, "kid": kid}
+
+
+def test_verifier_accepts_rs256_by_kid_and_memoizes():
+    import time
+    from jose import JWTError, jwt
+    from app.tokens import TokenVerifier
+
+    pem, public = _rsa_jwk("k1")
+    verifier = TokenVerifier.from_jwks({"keys": [public]})
+    assert verifier.algorithms == ["RS256"]
+
+    token = jwt.encode({"sub": "a@example.com", "exp": int(time.time()) + 60}, pem, algorithm="RS256", headers={"kid": "k1"})
+    assert verifier.verify(token)["sub"] == "a@example.com"
+    assert verifier.verify(token)["sub"] == "a@example.com"
+    assert verifier.cache.stats()["hits"] == 1
+
+    unknown = jwt.encode({"sub": "a@example.com"}, pem, algorithm="RS256", headers={"kid": "other"})
+    expired = jwt.encode({"sub": "a@example.com", "exp": int(time.time()) - 1}, pem, algorithm="RS256", headers={"kid": "k1"})
+    forged = jwt.encode({"sub": "a@example.com"}, "guess", algorithm="HS256", headers={"kid": "k1"})
+    for bad in (unknown, expired, forged):
+        with pytest.raises(JWTError):
+            verifier.verify(bad)
@@ -0,0 +1,62 @@
+def _item(client, sku, stock=0, price="10.00"):
+    return client.post("/items/", json={"name": sku.title(), "sku": sku, "price": price, "stock": stock}).json()["id"]
+
+
+def _combo(client, sku, components, price="100.00"):
+    combo = _item(client, sku, price=price)
+    r = client.put(f"/items/{combo}/components", json=[{"item_id": i, "qty": q} for i, q in components])
+    assert r.status_code == 200
+    return combo, r.json()
+
+
+def _stock(client):
+    return {i["sku"]: i["stock"] for i in client.get("/items/").json()}
+
+
+def test_nested_combos_reserve_components_across_lines(client, count_queries):
+    customer = client.post("/customers/", json={"name": "Kiran"}).json()
+    bun, patty, fries = _item(client, "BUN", 10), _item(client, "PATTY", 10), _item(client, "FRIES", 10)
+    burger, burger_out = _combo(client, "BURGER", [(bun, 2), (patty, 1)])
+    meal, meal_out = _combo(client, "MEAL", [(burger, 1), (fries, 1)])
+    assert burger_out["combo_available"] == 5 and meal_out["combo_available"] == 5
+
+    payload = {"customer_id": customer["id"], "items": [
+        {"item_id": meal, "qty": 2}, {"item_id": burger, "qty": 1}, {"item_id": fries, "qty": 1},
+    ]}
+    with count_queries() as statements:
+        r = client.post("/orders/", json=payload)
+    assert r.status_code == 201
+    assert r.json()["total"] == "310.00"
+    # One query for the flattened components of every combo, one set-based reservation
+    assert len([s for s in statements if "FROM item_combo_leaves JOIN" in s]) == 1
+    assert len([s for s in statements if s.startswith("UPDATE items")]) == 1
+
+    assert _stock(client) == {"BUN": 4, "PATTY": 7, "FRIES": 7, "BURGER": 0, "MEAL": 0}
+    available = {i["sku"]: i["combo_available"] for i in client.get("/items/").json()}
+    assert available == {"BUN": None, "PATTY": None, "FRIES": None, "BURGER": 2, "MEAL": 2}
+
+
+def test_component_shortage_rejects_whole_order(client):
+    customer = client.post("/customers/", json={"name": "Kiran"}).json()
+    tea, biscuit = _item(client, "TEA", 10), _item(client, "BISCUIT", 3)
+    snack, _ = _combo(client, "SNACK", [(tea, 1), (biscuit, 2)])
+    payload = {"customer_id": customer["id"], "items": [{"item_id": snack, "qty": 2}, {"item_id": tea, "qty": 1}]}
+    r = client.post("/orders/", json=payload)
+    assert r.status_code == 409
+    assert "BISCUIT" in r.json()["detail"]
+    assert _stock(client)["TEA"] == 10
+
+    bulk = client.post("/orders/bulk", json={"orders": [
+        {"idempotency_key": "a", "customer_id": customer["id"], "items": [{"item_id": snack, "qty": 1}]},
+        {"idempotency_key": "b", "customer_id": customer["id"], "items": [{"item_id": snack, "qty": 1}]},
+    ]}).json()
+    assert [o["status"] for o in bulk] == ["created", "error"]
+    assert _stock(client) == {"TEA": 9, "BISCUIT": 1, "SNACK": 0}
+
+
+def test_combo_cannot_contain_itself(client):
+    a, b = _item(client, "A"), _item(client, "B")
+    _combo(client, "AB", [(a, 1), (b, 1)])
+    ab = next(i["id"] for i in client.get("/items/").json() if i["sku"] == "AB")
+    r = client.put(f"/items/{a}/components", json=[{"item_id": ab, "qty": 1}])
+    assert r.status_code == 400
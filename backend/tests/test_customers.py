@@ -0,0 +1,35 @@
+import json
+
+
+def test_import_customers_csv_with_multiline_address(client):
+    body = (
+        "name,phone,address\n"
+        'Asha,98450 00001,"12 MG Road\nBengaluru"\n'
+        'Ravi,,"Flat 4, ""Lotus""\r\n2nd Cross\n\nMysuru"\n'
+        "Meena,98450 00003,\n"
+    )
+    r = client.post("/customers/import", content=body, headers={"Content-Type": "text/csv"})
+    assert r.json() == {"created": 3, "updated": 0, "failed": 0, "errors": []}
+
+    customers = {c["name"]: c for c in client.get("/customers/").json()}
+    assert customers["Asha"]["address"] == "12 MG Road\nBengaluru"
+    assert customers["Ravi"]["address"] == 'Flat 4, "Lotus"\n2nd Cross\n\nMysuru'
+    assert customers["Ravi"]["phone"] is None and customers["Meena"]["address"] is None
+
+
+def test_import_and_export_customers(client):
+    body = "\n".join([
+        json.dumps({"name": "Asha", "phone": "98450 00001"}),
+        json.dumps({"name": "Bad", "email": "not-an-email"}),
+        "not json",
+        json.dumps({"name": "Ravi", "gstin": "29ABCDE1234F1Z5"}),
+    ])
+    r = client.post("/customers/import", params={"format": "jsonl"}, content=body)
+    result = r.json()
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [e["row"] for e in result["errors"]] == [2, 3]
+
+    r = client.get("/customers/export", params={"format": "csv"})
+    assert r.status_code == 200
+    rows = r.text.strip().splitlines()
+    assert len(rows) == 3 and "Asha" in rows[1]
@@ -0,0 +1,30 @@
+import logging
+from sqlalchemy import text
+from app import db_profiling
+from app.database import SessionLocal
+
+
+def test_debug_headers_report_queries_per_request(client):
+    client.post("/customers/", json={"name": "Asha"})
+    r = client.get("/customers/", params={"limit": 10})
+    assert int(r.headers["x-db-queries"]) >= 1
+    assert float(r.headers["x-db-time-ms"]) >= 0
+    assert "x-db-pool-wait-ms" in r.headers
+
+    db = client.get("/metrics").json()["db"]
+    assert db["requests"] >= 2 and db["queries"] >= db["requests"]
+    assert db["pool_checkouts"] >= 1
+    assert "Pool size" in db["pool"]
+
+
+def test_slow_queries_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(db_profiling, "SLOW_QUERY_MS", 0)
+    before = db_profiling.totals.slow_queries
+    with caplog.at_level(logging.WARNING, logger="app.db_profiling"):
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+    assert db_profiling.totals.slow_queries > before
+    assert any("SELECT 1" in rec.getMessage() for rec in caplog.records)
@@ -0,0 +1,58 @@
+import pytest
+from app import fast_json
+from app.main import app
+
+
+def _seed(client):
+    customer = client.post("/customers/", json={"name": "Asha", "email": "asha@example.com"}).json()
+    items = [
+        client.post("/items/", json={"name": f"Item {i}", "sku": f"SKU-{i}", "price": "12.50", "stock": 50}).json()
+        for i in range(3)
+    ]
+    combo = client.post("/items/", json={"name": "Combo", "sku": "COMBO", "price": "30.00"}).json()
+    client.put(f"/items/{combo['id']}/components", json=[{"item_id": items[0]["id"], "qty": 2}])
+    for n in range(4):
+        payload = {"customer_id": customer["id"], "items": [{"item_id": it["id"], "qty": n + 1} for it in items[:n + 1]]}
+        assert client.post("/orders/", json=payload).status_code == 201
+
+
+def _pages(client, path, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = client.get(path, params=params)
+        assert r.status_code == 200
+        pages.append(r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("path", ["/items/", "/customers/", "/orders/"])
+def test_fast_path_matches_validated_response(client, monkeypatch, path):
+    _seed(client)
+    monkeypatch.setattr(fast_json, "ENABLED", False)
+    expected, expected_pages = client.get(path).json(), _pages(client, path, 2)
+    monkeypatch.setattr(fast_json, "ENABLED", True)
+    r = client.get(path)
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == expected
+    assert _pages(client, path, 2) == expected_pages
+
+
+def test_fast_path_keeps_openapi_schema(monkeypatch):
+    monkeypatch.setattr(app, "openapi_schema", None)
+    monkeypatch.setattr(fast_json, "ENABLED", True)
+    assert app.openapi()["paths"]["/orders/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "type": "array", "items": {"$ref": "#/components/schemas/OrderOut"}, "title": "Response List Orders Orders  Get",
+    }
+
+
+def test_dumps_encodes_db_values():
+    from datetime import datetime
+    from decimal import Decimal
+    from app.models import OrderStatus
+
+    assert fast_json.dumps([{"total": Decimal("10.50"), "status": OrderStatus.pending, "at": datetime(2024, 1, 2, 3, 4, 5, 6)}]) == (
+        b'[{"total":"10.50","status":"pending","at":"2024-01-02T03:04:05.000006"}]'
+    )
@@ -1,34 +1,4 @@
-import os
-import sys
-import pathlib
-import pytest
-from fastapi.testclient import TestClient
-
-# Configure test database
-os.environ["DATABASE_URL"] = "sqlite:///./test.db"
-
-# Ensure the backend package is importable
-BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
-sys.path.append(str(BACKEND_DIR))
-
-from app.main import app  # noqa: E402
-from app.database import Base, engine  # noqa: E402
-
-
-@pytest.fixture(autouse=True)
-def setup_db():
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
-    db_file = pathlib.Path("test.db")
-    if db_file.exists():
-        db_file.unlink()
-
-
-@pytest.fixture
-def client():
-    with TestClient(app) as c:
-        yield c
+import json
 
 
 def test_create_item_default_gst_rate(client):
@@ -36,3 +6,40 @@ def test_create_item_default_gst_rate(client):
     assert response.status_code == 201
     data = response.json()
     assert data["gst_rate"] == 18
+
+
+def test_import_items_csv_upserts_and_reports_row_errors(client):
+    client.post("/items/", json={"name": "Old name", "sku": "A-1", "price": "1.00"})
+    body = (
+        "name,sku,category,price,stock,reorder_point,gst_rate\n"
+        "Alpha,A-1,Tools,12.50,4,1,\n"
+        "Beta,B-2,Tools,3.00,10,2,5\n"
+        "Broken,C-3,Tools,not-a-price,1,0,\n"
+        "Gamma,,Tools,1.00,1,0,\n"
+        "Delta,D-4,,,,,\n"
+    )
+    r = client.post("/items/import", content=body, headers={"Content-Type": "text/csv"})
+    assert r.status_code == 200
+    result = r.json()
+    assert (result["created"], result["updated"], result["failed"]) == (2, 1, 2)
+    assert [e["row"] for e in result["errors"]] == [3, 4]
+
+    items = {i["sku"]: i for i in client.get("/items/").json()}
+    assert items["A-1"]["name"] == "Alpha" and items["A-1"]["gst_rate"] == 18
+    assert items["B-2"]["gst_rate"] == 5
+    # Blank cells take the schema defaults
+    assert (items["D-4"]["price"], items["D-4"]["stock"], items["D-4"]["gst_rate"]) == ("0.00", 0, 18)
+
+
+def test_export_items_streams_csv_and_jsonl(client):
+    client.post("/items/import", content='{"name": "Alpha", "sku": "A-1", "price": "2.00"}\n{"name": "Beta", "sku": "B-2"}\n',
+                headers={"Content-Type": "application/x-ndjson"})
+    r = client.get("/items/export", params={"format": "csv"})
+    assert r.status_code == 200
+    lines = r.text.strip().splitlines()
+    assert lines[0].startswith("name,sku,")
+    assert len(lines) == 3
+
+    r = client.get("/items/export", params={"format": "jsonl"})
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["sku"] for line in r.text.splitlines()] == ["A-1", "B-2"]
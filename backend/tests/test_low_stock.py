@@ -0,0 +1,68 @@
+import asyncio
+import json
+from sqlalchemy import text
+from app.alerts import LowStockAlerter
+from app.outbox import dispatcher
+from app.database import engine
+
+
+def _item(client, sku, stock, reorder_point):
+    return client.post("/items/", json={"name": sku.title(), "sku": sku, "price": "5.00", "stock": stock,
+                                        "reorder_point": reorder_point}).json()["id"]
+
+
+def test_low_stock_endpoint_reads_partial_index(client):
+    _item(client, "OK", 50, 5)
+    _item(client, "EDGE", 5, 5)
+    _item(client, "OUT", 0, 10)
+    r = client.get("/items/low-stock")
+    assert [i["sku"] for i in r.json()] == ["OUT", "EDGE"]
+
+    with engine.connect() as conn:
+        plan = " ".join(str(row[-1]) for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM items WHERE stock <= reorder_point "
+            "ORDER BY stock - reorder_point, id LIMIT 100"
+        )))
+    assert "ix_items_low_stock" in plan and "TEMP B-TREE" not in plan
+
+
+def _dispatch_pending():
+    # Publish whatever the app's dispatcher hasn't got to yet, instead of waiting for it
+    while asyncio.run(dispatcher.dispatch_batch()):
+        pass
+
+
+def test_reorder_crossings_are_batched_into_one_alert(client):
+    notified = []
+
+    async def notifier(items):
+        notified.append(items)
+
+    alerts = LowStockAlerter(interval=0, notifier=notifier)
+    customer = client.post("/customers/", json={"name": "Sana"}).json()
+    salt, sugar, oil = _item(client, "SALT", 6, 5), _item(client, "SUGAR", 20, 5), _item(client, "OIL", 8, 5)
+
+    with client.websocket_connect("/ws/orders") as ws:
+        ws.send_text(json.dumps({"action": "subscribe", "topics": ["stock"]}))
+        ws.receive_text()
+        client.post("/orders/", json={"customer_id": customer["id"], "items": [{"item_id": salt, "qty": 2}]})
+        client.patch(f"/items/{sugar}", json={"reorder_point": 25})
+        client.patch(f"/items/{oil}/stock", json={"stock": 1})
+        client.patch(f"/items/{oil}/stock", json={"stock": 30})
+        _dispatch_pending()
+        # Read from the outbox, so crossings dispatched by any worker count
+        assert alerts.collect_crossings()
+        asyncio.run(alerts.flush())
+        while True:
+            message = json.loads(ws.receive_text())
+            if message["type"] == "stock.reorder_alert":
+                break
+
+    # OIL was restocked within the window; the rest come most short first
+    alerted = [(i["sku"], i["stock"]) for i in message["data"]["items"]]
+    assert alerted == [("SUGAR", 20), ("SALT", 4)]
+    assert [[i["sku"] for i in items] for items in notified] == [["SUGAR", "SALT"]]
+
+    # Each crossing is alerted once
+    asyncio.run(alerts.flush())
+    assert len(notified) == 1 and alerts.metrics()["alerts"] == 1
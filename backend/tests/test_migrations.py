@@ -0,0 +1,72 @@
+import logging
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from app import database, migrate, models
+
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """Point app.database at an empty SQLite file for the test."""
+    original = database.get_engine()
+    scratch = create_engine(f"sqlite:///{tmp_path / 'scratch.db'}")
+    database.set_engine(scratch)
+    yield scratch
+    database.set_engine(original)
+    scratch.dispose()
+
+
+def test_schema_revision_is_migrations_head():
+    assert migrate.head() == database.SCHEMA_REVISION
+
+
+def test_migrations_build_the_models_schema(scratch_db):
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    migrate.upgrade()
+    with scratch_db.connect() as conn:
+        diffs = compare_metadata(MigrationContext.configure(conn, opts={"compare_type": True}), database.Base.metadata)
+    assert diffs == []
+    database.check_schema("error")
+
+
+def test_boot_check_refuses_unmigrated_database(scratch_db, caplog):
+    with pytest.raises(database.SchemaOutOfDate, match="python -m app.migrate upgrade"):
+        database.check_schema("error")
+    with caplog.at_level(logging.ERROR):
+        database.check_schema("warn")
+    assert "(none)" in caplog.text
+    database.check_schema("migrate")
+    with scratch_db.connect() as conn:
+        assert database.schema_revision(conn) == database.SCHEMA_REVISION
+
+
+def test_upgrade_adopts_create_all_database(scratch_db):
+    from alembic import command
+
+    # What the old create_all startup left behind: the baseline schema, unstamped
+    with scratch_db.begin() as conn:
+        command.upgrade(migrate._config(conn), migrate.BASELINE)
+        conn.execute(text("DROP TABLE alembic_version"))
+    with scratch_db.begin() as conn:
+        conn.execute(insert(models.Item.__table__).values(
+            name="Tea", sku="TEA", price=10, stock=5, reorder_point=1, gst_rate=5,
+            created_at=models.datetime.utcnow(), updated_at=models.datetime.utcnow(),
+        ))
+    migrate.upgrade()
+    with scratch_db.connect() as conn:
+        assert database.schema_revision(conn) == database.SCHEMA_REVISION
+        assert conn.execute(select(models.Item.sku)).scalars().all() == ["TEA"]
+
+
+def test_app_imports_without_database_url():
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main, app.database as d; assert d._engine is None"],
+        cwd=backend, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
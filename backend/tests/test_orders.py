@@ -0,0 +1,209 @@
+import json
+
+
+def _seed_catalogue(client):
+    customer = client.post("/customers/", json={"name": "Asha"}).json()
+    items = [
+        client.post("/items/", json={"name": f"Item {i}", "sku": f"SKU-{i}", "price": "10.00", "stock": 100}).json()
+        for i in range(2)
+    ]
+    return customer, items
+
+
+def _place_orders(client, customer, items, n):
+    for _ in range(n):
+        payload = {"customer_id": customer["id"], "items": [{"item_id": it["id"], "qty": 1} for it in items]}
+        assert client.post("/orders/", json=payload).status_code == 201
+
+
+def _list_orders_query_count(client, count_queries):
+    with count_queries() as statements:
+        r = client.get("/orders/")
+    assert r.status_code == 200
+    return len(r.json()), len(statements)
+
+
+def test_list_orders_query_count_is_constant(client, count_queries):
+    customer, items = _seed_catalogue(client)
+    _place_orders(client, customer, items, 1)
+    n_small, q_small = _list_orders_query_count(client, count_queries)
+    _place_orders(client, customer, items, 5)
+    n_large, q_large = _list_orders_query_count(client, count_queries)
+    assert (n_small, n_large) == (1, 6)
+    assert q_small == q_large
+
+
+def test_get_and_complete_order_embed_items(client):
+    customer, items = _seed_catalogue(client)
+    _place_orders(client, customer, items, 1)
+    order_id = client.get("/orders/").json()[0]["id"]
+
+    r = client.get(f"/orders/{order_id}")
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 2
+
+    r = client.post(f"/orders/{order_id}/complete")
+    assert r.status_code == 200
+    assert r.json()["status"] == "completed"
+    assert len(r.json()["items"]) == 2
+
+    assert client.get("/orders/999").status_code == 404
+
+
+def test_order_receipt_gst_split_and_etag(client, count_queries):
+    client.put("/settings/", json={"gstin": "29AAAAA0000A1Z5"})
+    local = client.post("/customers/", json={"name": "Local", "gstin": "29BBBBB1111B1Z5"}).json()
+    remote = client.post("/customers/", json={"name": "Remote", "gstin": "27CCCCC2222C1Z5"}).json()
+    tea = client.post("/items/", json={"name": "Tea", "sku": "TEA", "price": "100.00", "stock": 10, "gst_rate": 5}).json()
+    cup = client.post("/items/", json={"name": "Cup", "sku": "CUP", "price": "50.00", "stock": 10, "gst_rate": 18}).json()
+    lines = [{"item_id": tea["id"], "qty": 2}, {"item_id": cup["id"], "qty": 1}]
+    local_id = client.post("/orders/", json={"customer_id": local["id"], "items": lines}).json()["id"]
+    remote_id = client.post("/orders/", json={"customer_id": remote["id"], "items": lines}).json()["id"]
+
+    with count_queries() as statements:
+        r = client.get(f"/orders/{local_id}")
+    assert len([s for s in statements if "FROM orders" in s]) == 1
+    body = r.json()
+    assert body["customer"]["name"] == "Local" and not body["inter_state"]
+    assert [(l["sku"], l["amount"], l["tax"]) for l in body["items"]] == [("TEA", "200.00", "10.00"), ("CUP", "50.00", "9.00")]
+    assert [(b["rate"], b["cgst"], b["sgst"], b["igst"]) for b in body["tax_breakup"]] == [
+        (5, "5.00", "5.00", "0.00"), (18, "4.50", "4.50", "0.00"),
+    ]
+    assert (body["subtotal"], body["tax_total"], body["grand_total"]) == ("250.00", "19.00", "269.00")
+
+    remote_body = client.get(f"/orders/{remote_id}").json()
+    assert remote_body["inter_state"]
+    assert [b["igst"] for b in remote_body["tax_breakup"]] == ["10.00", "9.00"]
+
+    etag = r.headers["etag"]
+    r = client.get(f"/orders/{local_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+    client.post(f"/orders/{local_id}/complete")
+    assert client.get(f"/orders/{local_id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_insufficient_stock_is_conflict(client):
+    customer = client.post("/customers/", json={"name": "Ravi"}).json()
+    item = client.post("/items/", json={"name": "Lamp", "sku": "LAMP", "price": "5.00", "stock": 2}).json()
+    r = client.post("/orders/", json={"customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 3}]})
+    assert r.status_code == 409
+    # Repeated lines for one item are merged before the stock check
+    lines = [{"item_id": item["id"], "qty": 1}, {"item_id": item["id"], "qty": 2}]
+    assert client.post("/orders/", json={"customer_id": customer["id"], "items": lines}).status_code == 409
+    lines = [{"item_id": item["id"], "qty": 1}, {"item_id": item["id"], "qty": 1}]
+    r = client.post("/orders/", json={"customer_id": customer["id"], "items": lines})
+    assert r.status_code == 201
+    assert r.json()["items"] == [{"item_id": item["id"], "qty": 2, "price": "5.00"}]
+    assert client.get("/items/").json()[0]["stock"] == 0
+
+
+def test_parallel_orders_never_oversell(client):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    stock, attempts, workers = 20, 64, 8
+    customer = client.post("/customers/", json={"name": "Rush"}).json()
+    item = client.post("/items/", json={"name": "Hot SKU", "sku": "HOT", "price": "1.00", "stock": stock}).json()
+    payload = {"customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 1}]}
+
+    def worker(n):
+        codes = []
+        with TestClient(app) as c:
+            for _ in range(n):
+                codes.append(c.post("/orders/", json=payload).status_code)
+        return codes
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [code for codes in pool.map(worker, [attempts // workers] * workers) for code in codes]
+    elapsed = time.perf_counter() - started
+
+    assert set(results) <= {201, 409}
+    assert results.count(201) == stock
+    remaining = next(i for i in client.get("/items/").json() if i["id"] == item["id"])["stock"]
+    assert remaining == 0
+    print(f"\n{len(results)} parallel orders in {elapsed:.2f}s ({len(results) / elapsed:.1f} orders/s)")
+
+
+def test_bulk_orders_idempotent_with_per_order_results(client, count_queries):
+    customer = client.post("/customers/", json={"name": "Counter 1"}).json()
+    item = client.post("/items/", json={"name": "Bun", "sku": "BUN", "price": "2.50", "stock": 5}).json()
+    line = lambda qty: [{"item_id": item["id"], "qty": qty}]  # noqa: E731
+    batch = {"orders": [
+        {"idempotency_key": "pos-1", "customer_id": customer["id"], "items": line(2)},
+        {"idempotency_key": "pos-2", "customer_id": 999, "items": line(1)},
+        {"idempotency_key": "pos-3", "customer_id": customer["id"], "items": [{"item_id": 999, "qty": 1}]},
+        {"idempotency_key": "pos-4", "customer_id": customer["id"], "items": line(3)},
+        {"idempotency_key": "pos-5", "customer_id": customer["id"], "items": line(1)},
+        {"idempotency_key": "pos-1", "customer_id": customer["id"], "items": line(2)},
+    ]}
+
+    with count_queries() as statements:
+        r = client.post("/orders/bulk", params={"chunk_size": 2}, json=batch)
+    assert r.status_code == 200
+    results = r.json()
+    assert [res["status"] for res in results] == ["created", "error", "error", "created", "error", "duplicate"]
+    assert results[0]["total"] == "5.00"
+    assert results[5]["order_id"] == results[0]["order_id"]
+    assert "Insufficient stock" in results[4]["detail"]
+    # Inserts are batched: statement count doesn't grow per order
+    assert len(statements) < 25
+
+    # Replaying the same batch creates nothing new
+    replay = client.post("/orders/bulk", json=batch).json()
+    assert [res["status"] for res in replay][0] == "duplicate"
+    assert replay[3]["order_id"] == results[3]["order_id"]
+    assert len(client.get("/orders/").json()) == 2
+    assert client.get("/items/").json()[0]["stock"] == 0
+
+
+def test_bulk_orders_concurrent_replay_reports_duplicate(client, monkeypatch):
+    from app import models
+    from app.database import SessionLocal
+    from app.routes import orders
+
+    customer = client.post("/customers/", json={"name": "Counter 1"}).json()
+    item = client.post("/items/", json={"name": "Bun", "sku": "BUN", "price": "2.50", "stock": 5}).json()
+    insert_chunk = orders._insert_order_chunk
+
+    def racing_replay(db, chunk, *args):
+        # Another request commits pos-2 after this one looked up the known keys
+        other = SessionLocal()
+        other.add(models.Order(customer_id=customer["id"], total=0, idempotency_key="pos-2"))
+        other.commit()
+        other.close()
+        monkeypatch.setattr(orders, "_insert_order_chunk", insert_chunk)
+        return insert_chunk(db, chunk, *args)
+
+    monkeypatch.setattr(orders, "_insert_order_chunk", racing_replay)
+    batch = {"orders": [
+        {"idempotency_key": key, "customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 1}]}
+        for key in ("pos-1", "pos-2")
+    ]}
+    r = client.post("/orders/bulk", json=batch)
+    assert r.status_code == 200
+    assert [res["status"] for res in r.json()] == ["created", "duplicate"]
+    assert client.get("/items/").json()[0]["stock"] == 4
+
+
+def test_list_orders_streams_ndjson_and_csv(client):
+    customer, items = _seed_catalogue(client)
+    _place_orders(client, customer, items, 3)
+    expected = client.get("/orders/").json()
+
+    r = client.get("/orders/", headers={"Accept": "application/x-ndjson"})
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in r.text.splitlines()] == expected
+
+    r = client.get("/orders/", params={"format": "csv", "limit": 2})
+    lines = r.text.strip().splitlines()
+    assert lines[0] == "id,customer_id,total,status,created_at,updated_at"
+    assert len(lines) == 3
+
+    # Limited streams resume from X-Next-Cursor like paginated lists
+    r = client.get("/orders/", params={"format": "jsonl", "limit": 2})
+    rest = client.get("/orders/", params={"format": "jsonl", "limit": 2, "cursor": r.headers["X-Next-Cursor"]})
+    assert "X-Next-Cursor" not in rest.headers
+    assert [json.loads(line) for line in (r.text + rest.text).splitlines()] == expected
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app import models
+from app.main import app
+from app.database import SessionLocal
+from app.outbox import OutboxDispatcher
+from app.websocket import manager
+
+
+def _outbox():
+    db = SessionLocal()
+    try:
+        return [(e.type, e.dispatched_at is not None) for e in db.query(models.OrderEvent).order_by(models.OrderEvent.id)]
+    finally:
+        db.close()
+
+
+def _seed(client):
+    customer = client.post("/customers/", json={"name": "Meera"}).json()
+    item = client.post("/items/", json={"name": "Dal", "sku": "DAL", "price": "80.00", "stock": 2}).json()
+    return {"customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 2}]}
+
+
+def test_events_are_written_with_the_order_and_dispatched(client):
+    payload = _seed(client)
+    with client.websocket_connect("/ws/orders") as ws:
+        assert client.post("/orders/", json=payload).status_code == 201
+        # Rejected orders roll back their events along with everything else
+        assert client.post("/orders/", json=payload).status_code == 409
+        legacy = json.loads(ws.receive_text())
+    assert legacy["type"] == "order_update" and legacy["data"]["total"] == "160.00"
+    # Rows are marked right after publishing
+    for _ in range(100):
+        if all(done for _, done in _outbox()):
+            break
+        time.sleep(0.01)
+    assert _outbox() == [("order.created", True), ("stock.changed", True), ("stock.low", True)]
+    assert client.get("/metrics").json()["outbox"]["pending"] == 0
+
+
+def test_failed_publish_leaves_events_pending_for_retry(monkeypatch):
+    # No lifespan: the app's own dispatcher stays stopped
+    client = TestClient(app)
+    client.post("/orders/", json=_seed(client))
+    published = []
+
+    async def failing(data, topic=None):
+        raise ConnectionError("backbone down")
+
+    async def recording(data, topic=None):
+        published.append(json.loads(data))
+
+    async def scenario():
+        dispatcher = OutboxDispatcher()
+        monkeypatch.setattr(manager, "publish_confirmed", failing)
+        with pytest.raises(ConnectionError):
+            await dispatcher.dispatch_batch()
+        pending = _outbox()
+        monkeypatch.setattr(manager, "publish_confirmed", recording)
+        return pending, await dispatcher.dispatch_batch()
+
+    pending, dispatched = asyncio.run(scenario())
+    assert all(not done for _, done in pending)
+    assert dispatched == 3
+    assert [m["type"] for m in published] == ["order.created", "stock.changed", "stock.low", "order_update"]
+    assert published[0]["data"]["event_id"] < published[1]["data"]["event_id"]
+
+
+def test_local_backbone_dispatches_only_this_workers_events(monkeypatch):
+    from datetime import datetime, timedelta
+    from app import outbox
+
+    db = SessionLocal()
+    stale = datetime.utcnow() - timedelta(seconds=outbox.ORPHAN_AFTER_S + 1)
+    db.add_all([
+        models.OrderEvent(topic="stock", type="mine", payload="{}", worker_id=outbox.WORKER_ID),
+        models.OrderEvent(topic="stock", type="cli", payload="{}"),
+        models.OrderEvent(topic="stock", type="other", payload="{}", worker_id="other-host:1"),
+        models.OrderEvent(topic="stock", type="orphaned", payload="{}", worker_id="gone-host:1", created_at=stale),
+    ])
+    db.commit()
+    db.close()
+    published = []
+
+    async def recording(data, topic=None):
+        published.append(json.loads(data)["type"])
+
+    monkeypatch.setattr(manager, "publish_confirmed", recording)
+    assert asyncio.run(OutboxDispatcher().dispatch_batch()) == 3
+    assert published == ["mine", "cli", "orphaned"]
+    assert [t for t, done in _outbox() if not done] == ["other"]
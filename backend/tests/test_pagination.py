@@ -0,0 +1,47 @@
+def _create_items(client, n, category="Tea"):
+    for i in range(n):
+        r = client.post("/items/", json={"name": f"Item {i}", "sku": f"SKU-{category}-{i}", "category": category, "stock": i})
+        assert r.status_code == 201
+
+
+def test_list_items_unpaginated_by_default(client):
+    _create_items(client, 3)
+    r = client.get("/items/")
+    assert r.status_code == 200
+    assert len(r.json()) == 3
+    assert "x-next-cursor" not in r.headers
+
+
+def test_list_items_keyset_pages(client):
+    _create_items(client, 5)
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/items/", params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page) <= 2
+        seen.extend(row["id"] for row in page)
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(set(seen))
+    assert len(seen) == 5
+
+
+def test_list_items_filters(client):
+    _create_items(client, 3, category="Tea")
+    _create_items(client, 2, category="Coffee")
+    r = client.get("/items/", params={"category": "Coffee"})
+    assert {row["category"] for row in r.json()} == {"Coffee"}
+    # stock 0 <= reorder_point 0 for the first item of each category
+    r = client.get("/items/", params={"low_stock": True})
+    assert len(r.json()) == 2
+
+
+def test_invalid_cursor_rejected(client):
+    r = client.get("/items/", params={"limit": 1, "cursor": "not-a-cursor"})
+    assert r.status_code == 400
@@ -0,0 +1,50 @@
+import asyncio
+from app import models, passwords
+from app.database import SessionLocal
+
+
+def test_process_pool_hashes_and_verifies():
+    hasher = passwords.PasswordHasher(workers=1, queue_limit=4, rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("s3cret")
+        return hashed, await hasher.verify_and_update("s3cret", hashed), await hasher.verify_and_update("nope", hashed)
+
+    try:
+        hashed, good, bad = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert good == (True, None) and bad == (False, None)
+    assert hasher.metrics()["in_flight"] == 0
+
+
+def _add_user(client):
+    r = client.post("/users/", json={"name": "Cashier", "email": "cashier@example.com", "password": "s3cret"})
+    assert r.status_code == 201
+
+
+def test_saturated_pool_rejects_login_fast(client, monkeypatch):
+    _add_user(client)
+    hasher = passwords.PasswordHasher(workers=0, queue_limit=0, rounds=4)
+    monkeypatch.setattr(passwords, "hasher", hasher)
+    hasher._in_flight = 1  # the one slot is busy
+    r = client.post("/users/login", params={"email": "cashier@example.com", "password": "s3cret"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+    assert hasher.metrics()["rejected"] == 1
+
+
+def test_login_rehashes_at_configured_cost(client, monkeypatch):
+    _add_user(client)
+    monkeypatch.setattr(passwords.hasher, "rounds", 5)
+    for _ in range(2):
+        r = client.post("/users/login", params={"email": "cashier@example.com", "password": "s3cret"})
+        assert r.status_code == 200
+    db = SessionLocal()
+    try:
+        stored = db.query(models.User).filter(models.User.email == "cashier@example.com").one().password_hash
+    finally:
+        db.close()
+    assert stored.startswith("$2b$05$")
+    assert passwords.hasher.metrics()["rehashed"] >= 1
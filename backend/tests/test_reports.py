@@ -0,0 +1,100 @@
+def _seed(client):
+    alice = client.post("/customers/", json={"name": "Alice"}).json()
+    tea = client.post("/items/", json={"name": "Tea", "sku": "TEA", "category": "Drinks", "price": "10.00", "stock": 50, "reorder_point": 5}).json()
+    cup = client.post("/items/", json={"name": "Cup", "sku": "CUP", "category": "Ware", "price": "25.00", "stock": 3, "reorder_point": 5}).json()
+
+    def order(lines):
+        payload = {"customer_id": alice["id"], "items": [{"item_id": i["id"], "qty": q} for i, q in lines]}
+        return client.post("/orders/", json=payload).json()
+
+    first = order([(tea, 3), (cup, 1)])   # 55.00
+    order([(tea, 2)])                     # 20.00, left pending
+    client.post(f"/orders/{first['id']}/complete")
+    return tea, cup
+
+
+def test_sales_and_status_breakdown(client):
+    _seed(client)
+    sales = client.get("/reports/sales", params={"period": "day"}).json()
+    assert len(sales) == 1
+    day = sales[0]
+    assert (day["orders"], day["completed"], day["canceled"]) == (2, 1, 0)
+    assert day["revenue"] == "75.00"
+    assert day["completed_revenue"] == "55.00"
+
+    breakdown = {row["status"]: row for row in client.get("/reports/status-breakdown").json()}
+    assert breakdown["completed"]["orders"] == 1
+    assert breakdown["pending"]["revenue"] == "20.00"
+
+
+def test_top_items_categories_and_low_stock(client):
+    tea, cup = _seed(client)
+    top = client.get("/reports/top-items", params={"limit": 1}).json()
+    assert [(t["item_id"], t["qty"]) for t in top] == [(tea["id"], 5)]
+
+    cats = {c["category"]: c["qty"] for c in client.get("/reports/categories").json()}
+    assert cats == {"Drinks": 5, "Ware": 1}
+
+    low = client.get("/reports/low-stock").json()
+    assert [i["sku"] for i in low] == ["CUP"]
+
+
+def test_new_customers_and_date_range(client):
+    _seed(client)
+    r = client.get("/reports/new-customers", params={"period": "month"}).json()
+    assert r["total"] == 1 and len(r["series"]) == 1
+
+    empty = client.get("/reports/sales", params={"date_to": "2000-01-01T00:00:00"}).json()
+    assert empty == []
+
+
+def test_rollup_rebuild_matches_incremental(client):
+    from app import models, rollup
+    from app.database import SessionLocal
+
+    _seed(client)
+
+    def snapshot(db):
+        sales = sorted(
+            (r.day, r.item_id, r.status.value, r.orders, r.qty, str(r.revenue), str(r.gst))
+            for r in db.query(models.DailySales).filter(models.DailySales.orders != 0)
+        )
+        stats = sorted(
+            (r.day, r.status.value, r.orders, str(r.revenue), str(r.gst))
+            for r in db.query(models.DailyOrderStats).filter(models.DailyOrderStats.orders != 0)
+        )
+        return sales, stats
+
+    db = SessionLocal()
+    try:
+        incremental = snapshot(db)
+        rollup.rebuild(db)
+        db.commit()
+        assert snapshot(db) == incremental
+        assert len(incremental[0]) == 3  # tea pending, tea completed, cup completed
+    finally:
+        db.close()
+
+
+def test_rollup_keeps_gst_charged_at_order_time(client):
+    from app import models, rollup
+    from app.database import SessionLocal
+
+    alice = client.post("/customers/", json={"name": "Alice"}).json()
+    tea = client.post("/items/", json={"name": "Tea", "sku": "TEA", "price": "10.05", "stock": 10, "gst_rate": 5}).json()
+    order = client.post("/orders/", json={"customer_id": alice["id"], "items": [{"item_id": tea["id"], "qty": 1}]}).json()
+    assert client.patch(f"/items/{tea['id']}", json={"gst_rate": 12}).json()["gst_rate"] == 12
+    client.post(f"/orders/{order['id']}/complete")
+
+    db = SessionLocal()
+    try:
+        def gst_by_status():
+            return {r.status.value: str(r.gst) for r in db.query(models.DailyOrderStats)}
+
+        # 5% of 10.05 is 0.5025: charged as 0.50, and taken off pending at that amount
+        assert gst_by_status() == {"pending": "0.00", "completed": "0.50"}
+        rollup.rebuild(db)
+        db.commit()
+        assert gst_by_status() == {"completed": "0.50"}
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+def _seed(client):
+    client.post("/customers", json={"name": "Asha Rao", "phone": "+91 98450-00001", "email": "Asha@Example.com"})
+    client.post("/customers", json={"name": "Ravi Kumar", "phone": "98450 00002", "gstin": "29abcde1234f1z5"})
+    client.post("/items", json={"name": "Masala Chai", "sku": "CHAI-1", "price": 20, "stock": 10})
+    client.post("/items", json={"name": "Chai Latte", "sku": "LAT-1", "price": 90, "stock": 10})
+
+
+def test_customer_lookup_normalizes_keys(client):
+    _seed(client)
+    r = client.get("/customers/lookup", params={"phone": "9845000001"})
+    assert [c["name"] for c in r.json()] == ["Asha Rao"]
+    r = client.get("/customers/lookup", params={"email": " asha@example.COM "})
+    assert [c["name"] for c in r.json()] == ["Asha Rao"]
+    r = client.get("/customers/lookup", params={"gstin": "29ABCDE1234F1Z5"})
+    assert [c["name"] for c in r.json()] == ["Ravi Kumar"]
+    assert client.get("/customers/lookup").status_code == 400
+
+
+def test_search_ranks_and_groups(client):
+    _seed(client)
+    body = client.get("/search", params={"q": "chai"}).json()
+    assert [i["name"] for i in body["items"]] == ["Chai Latte", "Masala Chai"]
+    assert body["customers"] == [] and body["orders"] == []
+
+    body = client.get("/search", params={"q": "00002", "types": "customers"}).json()
+    assert [c["name"] for c in body["customers"]] == ["Ravi Kumar"]
+    assert body["items"] == []
+
+    # LIKE wildcards are matched literally
+    assert client.get("/search", params={"q": "%"}).json()["items"] == []
+
+
+def test_postgres_search_predicates_use_trigram_indexed_columns():
+    # No PostgreSQL here to EXPLAIN against: check the predicates the planner gets
+    # instead. A GIN trigram index serves ILIKE / % only on the bare column.
+    import re
+    from sqlalchemy import create_mock_engine, or_, select
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.orm import Session
+    from app import database, models
+    from app.routes.search import _Matcher
+
+    m = _Matcher(Session(bind=create_mock_engine("postgresql://", None)), "Chai")
+    C, I, U = models.Customer, models.Item, models.User
+    predicates = [
+        m.matches(C.name), m.prefix(C.email_norm), m.matches(I.name), m.matches(I.sku), m.equals(I.category),
+        m.matches(U.name), m.prefix(U.email), m.equals(U.role),
+    ]
+    sql = str(select(C.id).where(or_(*predicates)).compile(dialect=postgresql.dialect()))
+    assert "lower(" not in sql
+    matched = set(re.findall(r"(\w+)\.(\w+) (?:ILIKE|%%)", sql))
+    assert matched and matched <= set(database.TRIGRAM_INDEXES)
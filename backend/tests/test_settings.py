@@ -0,0 +1,31 @@
+from app.settings_service import settings_service
+
+
+def test_settings_reads_are_cached_with_etag(client, count_queries):
+    first = client.get("/settings/")
+    assert first.status_code == 200 and first.json()["currency"] == "INR"
+    etag = first.headers["etag"]
+
+    with count_queries() as statements:
+        again = client.get("/settings/")
+        cached = client.get("/settings/", headers={"If-None-Match": etag})
+    assert not [s for s in statements if "settings" in s]
+    assert again.json() == first.json()
+    assert cached.status_code == 304
+
+    r = client.put("/settings/", json={"company_name": "Chai Point", "gstin": "29AAAAA0000A1Z5"})
+    assert r.json()["company_name"] == "Chai Point"
+    with count_queries() as statements:
+        updated = client.get("/settings/", headers={"If-None-Match": etag})
+    assert not [s for s in statements if "settings" in s]
+    assert updated.status_code == 200 and updated.json()["gstin"] == "29AAAAA0000A1Z5"
+    assert updated.headers["etag"] != etag
+
+
+def test_change_notification_invalidates_older_snapshot(client):
+    version = settings_service.snapshot().version
+    settings_service._on_notify(str(version))  # echo of our own version: keep
+    assert settings_service.stats()["version"] == version
+    settings_service._on_notify(str(version + 1))
+    assert settings_service.stats()["version"] is None
+    assert settings_service.get().currency == "INR"
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import models, sync
+from app.database import SessionLocal, engine
+
+
+def _item(client, sku, stock=10):
+    return client.post("/items/", json={"name": sku.title(), "sku": sku, "price": "4.00", "stock": stock}).json()
+
+
+def test_unchanged_catalogue_returns_304(client):
+    _item(client, "TEA")
+    r = client.get("/items/")
+    etag, last_modified = r.headers["etag"], r.headers["last-modified"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/items/", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert client.get("/items/", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # The validator covers the query string
+    assert client.get("/items/", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 200
+
+    _item(client, "COFFEE")
+    r = client.get("/items/", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and len(r.json()) == 2
+    etag = r.headers["etag"]
+    client.delete(f"/items/{r.json()[0]['id']}")
+    assert client.get("/items/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_updated_since_returns_changes_and_tombstones(client):
+    customer = client.post("/customers/", json={"name": "Ravi"}).json()
+    gone = client.post("/customers/", json={"name": "Gone"}).json()
+    as_of = client.get("/customers/", params={"updated_since": "2000-01-01T00:00:00"})
+    assert as_of.status_code == 410
+
+    as_of = client.get("/customers/", params={"updated_since": (datetime.utcnow() - timedelta(days=1)).isoformat()}).json()
+    assert [c["name"] for c in as_of["changed"]] == ["Ravi", "Gone"] and as_of["deleted"] == []
+
+    client.patch(f"/customers/{customer['id']}", json={"phone": "98450 12345"})
+    client.delete(f"/customers/{gone['id']}")
+    delta = client.get("/customers/", params={"updated_since": as_of["as_of"]}).json()
+    assert [c["phone"] for c in delta["changed"]] == ["98450 12345"]
+    assert delta["deleted"] == [gone["id"]]
+
+    # Rows changed within the overlap come back; clients upsert them by id
+    again = client.get("/customers/", params={"updated_since": delta["as_of"]}).json()
+    assert [c["id"] for c in again["changed"]] == [customer["id"]] and again["deleted"] == [gone["id"]]
+
+
+def test_late_commit_changes_etag_and_reaches_next_delta(client):
+    _item(client, "TEA")
+    r = client.get("/items/")
+    etag = r.headers["etag"]
+    since = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    as_of = client.get("/items/", params={"updated_since": since}).json()["as_of"]
+
+    # Flushed (and stamped) before the reads above, committed after them
+    stamped = datetime.utcnow() - timedelta(seconds=10)
+    db = SessionLocal()
+    try:
+        db.add(models.Item(name="Late", sku="LATE", price=4, stock=1, created_at=stamped, updated_at=stamped))
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.get("/items/", headers={"If-None-Match": etag}).status_code == 200
+    delta = client.get("/items/", params={"updated_since": as_of}).json()
+    assert "LATE" in {i["sku"] for i in delta["changed"]}
+
+
+def test_updated_since_includes_combos_whose_components_moved(client, monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_OVERLAP", timedelta(0))
+    rice, dal = _item(client, "RICE", 50), _item(client, "DAL", 50)
+    combo = _item(client, "THALI", 0)
+    client.put(f"/items/{combo['id']}/components", json=[{"item_id": rice["id"], "qty": 1}])
+    as_of = client.get("/items/", params={"updated_since": "2020-01-01T00:00:00Z"})
+    assert as_of.status_code == 410
+    as_of = client.get("/items/", params={"updated_since": rice["created_at"]}).json()["as_of"]
+
+    customer = client.post("/customers/", json={"name": "Mira"}).json()
+    client.post("/orders/", json={"customer_id": customer["id"], "items": [{"item_id": combo["id"], "qty": 5}]})
+    delta = client.get("/items/", params={"updated_since": as_of}).json()
+    assert {(i["sku"], i["stock"], i["combo_available"]) for i in delta["changed"]} == {("RICE", 45, None), ("THALI", 0, 45)}
+    assert dal["sku"] not in {i["sku"] for i in delta["changed"]}
+
+
+def test_delta_reads_updated_at_index(client):
+    with engine.connect() as conn:
+        plan = " ".join(str(row[-1]) for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM items WHERE updated_at > '2024-01-01' ORDER BY updated_at, id"
+        )))
+    assert "ix_items_updated_at_id" in plan
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from app.websocket import ConnectionManager
+
+
+def test_order_created_reaches_websocket_client(client):
+    customer = client.post("/customers/", json={"name": "Asha"}).json()
+    item = client.post("/items/", json={"name": "Tea", "sku": "TEA", "price": "10.00", "stock": 5}).json()
+    with client.websocket_connect("/ws/orders") as ws:
+        client.post("/orders/", json={"customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 1}]})
+        message = json.loads(ws.receive_text())
+    assert message["type"] == "order_update"
+    assert message["data"]["total"] == "10.00"
+
+
+class _FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.received.append(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _fan_out(policy):
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, policy=policy)
+        fast, slow = _FakeSocket(), _FakeSocket(delay=10)
+        await manager.connect(fast)
+        await manager.connect(slow)
+        for n in range(5):
+            await manager.broadcast({"n": n})
+            await asyncio.sleep(0.01)
+        stats = manager.metrics()
+        await manager.stop()
+        return fast, slow, stats
+
+    return asyncio.run(scenario())
+
+
+def test_slow_consumer_is_disconnected_without_delaying_others():
+    fast, slow, stats = _fan_out("disconnect")
+    assert [json.loads(m)["n"] for m in fast.received] == [0, 1, 2, 3, 4]
+    assert slow.closed_with == 1013
+    assert stats["slow_disconnects"] == 1 and stats["connections"] == 1
+
+
+def test_drop_oldest_policy_keeps_slow_consumer_connected():
+    fast, slow, stats = _fan_out("drop_oldest")
+    assert len(fast.received) == 5
+    assert slow.closed_with is None
+    assert stats["dropped"] >= 1 and stats["connections"] == 2
+
+
+def test_subscribed_client_receives_sequenced_order_and_stock_events(client):
+    customer = client.post("/customers/", json={"name": "Ravi"}).json()
+    item = client.post("/items/", json={"name": "Rice", "sku": "RICE", "price": "50.00", "stock": 12,
+                                        "reorder_point": 10}).json()
+    with client.websocket_connect("/ws/orders") as ws:
+        ws.send_text(json.dumps({"action": "subscribe", "topics": ["orders", "stock"]}))
+        assert json.loads(ws.receive_text())["type"] == "subscribed"
+        client.post("/orders/", json={"customer_id": customer["id"], "items": [{"item_id": item["id"], "qty": 3}]})
+        messages = [json.loads(ws.receive_text()) for _ in range(3)]
+    assert [m["type"] for m in messages] == ["order.created", "stock.changed", "stock.low"]
+    assert messages[0]["data"]["items"] == [{"item_id": item["id"], "qty": 3, "price": "50.00"}]
+    assert messages[2]["data"]["stock"] == 9
+    seqs = [m["seq"] for m in messages]
+    assert seqs == sorted(seqs) and len(set(seqs)) == 3
+
+
+def test_resume_replays_missed_events_or_asks_for_resync():
+    async def scenario():
+        manager = ConnectionManager()
+        manager.replay = type(manager.replay)(maxlen=3)
+        await manager.start()
+        for n in range(5):
+            manager.publish_event("orders" if n % 2 else "stock", "x", {"n": n})
+        await asyncio.sleep(0.01)
+        resumed, stale = _FakeSocket(), _FakeSocket()
+        manager.subscribe(await manager.connect(resumed), ["orders"], since=3)
+        manager.subscribe(await manager.connect(stale), ["orders"], since=0)
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        return [json.loads(m) for m in resumed.received], [json.loads(m) for m in stale.received]
+
+    resumed, stale = asyncio.run(scenario())
+    assert resumed[0] == {"type": "subscribed", "topics": ["orders"], "seq": 5}
+    assert [m["seq"] for m in resumed[1:]] == [4]
+    assert stale[1] == {"type": "resync", "seq": 5}
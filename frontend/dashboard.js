@@ -5,57 +5,59 @@ const totalCustomersEl = document.getElementById('total-customers');
 const ordersCompletedEl = document.getElementById('orders-completed');
 const ordersCancelledEl = document.getElementById('orders-cancelled');
 
+// Last rendered totals, kept current from /ws/orders delta events between full fetches
+const totals = { sales: 0, completed: 0, cancelled: 0 };
+
+function renderTotals() {
+  if (totalSalesEl) totalSalesEl.textContent = '\u20b9' + totals.sales.toFixed(2);
+  if (ordersCompletedEl) ordersCompletedEl.textContent = totals.completed;
+  if (ordersCancelledEl) ordersCancelledEl.textContent = totals.cancelled;
+}
+
 async function fetchAndUpdateMetrics() {
   try {
     const token = localStorage.IF_TOKEN;
-    // Fetch orders and customers in parallel
-    const [ordersRes, customersRes] = await Promise.all([
-      fetch(baseUrl + '/orders', { headers: { 'Authorization': token } }),
-      fetch(baseUrl + '/customers', { headers: { 'Authorization': token } })
+    // Aggregates come pre-computed from the /reports API
+    const [statusRes, customersRes, topRes] = await Promise.all([
+      fetch(baseUrl + '/reports/status-breakdown', { headers: { 'Authorization': token } }),
+      fetch(baseUrl + '/reports/new-customers', { headers: { 'Authorization': token } }),
+      fetch(baseUrl + '/reports/top-items?limit=3', { headers: { 'Authorization': token } })
     ]);
 
-    if (!ordersRes.ok) throw new Error('Orders fetch failed: ' + await ordersRes.text());
-    if (!customersRes.ok) throw new Error('Customers fetch failed: ' + await customersRes.text());
+    if (!statusRes.ok) throw new Error('Status breakdown fetch failed: ' + await statusRes.text());
+    if (!customersRes.ok) throw new Error('Customers report fetch failed: ' + await customersRes.text());
+    if (!topRes.ok) throw new Error('Top items fetch failed: ' + await topRes.text());
 
-    const orders = await ordersRes.json();
+    const breakdown = await statusRes.json();
     const customers = await customersRes.json();
+    const topItems = await topRes.json();
 
     // Compute totals
     let totalSales = 0;
     let completed = 0;
     let cancelled = 0;
 
-    if (Array.isArray(orders)) {
-      for (const o of orders) {
-        const t = parseFloat(o.total || o.amount || 0);
+    if (Array.isArray(breakdown)) {
+      for (const row of breakdown) {
+        const t = parseFloat(row.revenue || 0);
         if (!Number.isNaN(t)) totalSales += t;
-        const st = (o.status || '').toString().toLowerCase();
-        if (st.includes('complete')) completed += 1;
-        if (st.includes('cancel')) cancelled += 1;
+        if (row.status === 'completed') completed += Number(row.orders || 0);
+        if (row.status === 'canceled') cancelled += Number(row.orders || 0);
       }
     }
 
     // Update DOM (format rupee)
-    if (totalSalesEl) totalSalesEl.textContent = '\u20b9' + totalSales.toFixed(2);
-    if (totalCustomersEl) totalCustomersEl.textContent = (Array.isArray(customers) ? customers.length : '0');
-    if (ordersCompletedEl) ordersCompletedEl.textContent = completed;
-    if (ordersCancelledEl) ordersCancelledEl.textContent = cancelled;
+    totals.sales = totalSales;
+    totals.completed = completed;
+    totals.cancelled = cancelled;
+    renderTotals();
+    if (totalCustomersEl) totalCustomersEl.textContent = String(customers && customers.total || 0);
 
-    // Top selling: compute simple counts from order.items
+    // Top selling: top 3 items by quantity
     try {
       const topListEl = document.getElementById('top-selling-list');
-      if (topListEl && Array.isArray(orders)) {
-        const counts = new Map();
-        for (const o of orders) {
-          if (!Array.isArray(o.items)) continue;
-          for (const it of o.items) {
-            const name = (it.name || it.title || it.item_name || it.sku || 'Unknown');
-            const qty = Number(it.quantity || it.qty || it.count || 1) || 1;
-            counts.set(name, (counts.get(name) || 0) + qty);
-          }
-        }
-        const sorted = Array.from(counts.entries()).sort((a, b) => b[1] - a[1]);
-        const top3 = sorted.slice(0, 3);
+      if (topListEl && Array.isArray(topItems)) {
+        const top3 = topItems.map(t => [t.name || t.sku || 'Unknown', Number(t.qty || 0)]);
         if (top3.length === 0) {
           topListEl.innerHTML = '<div class="text-sm text-slate-500">No product data</div>';
         } else {
@@ -86,19 +88,61 @@ async function fetchAndUpdateMetrics() {
 
 fetchAndUpdateMetrics();
 
-// Refresh when orders websocket sends updates
-try {
-  const ws = new WebSocket('ws://127.0.0.1:8000/ws/orders');
+// Apply order delta events in place; only the top-items ranking is refetched (debounced)
+let lastSeq = null;
+let topItemsTimer = null;
+
+function refreshTopItemsSoon() {
+  clearTimeout(topItemsTimer);
+  topItemsTimer = setTimeout(fetchAndUpdateMetrics, 5000);
+}
+
+function applyOrderEvent(msg) {
+  const d = msg.data || {};
+  if (msg.type === 'order.created') {
+    const t = parseFloat(d.total || 0);
+    if (!Number.isNaN(t)) totals.sales += t;
+    refreshTopItemsSoon();
+  } else if (msg.type === 'order.completed') {
+    totals.completed += 1;
+  } else if (msg.type === 'order.canceled') {
+    totals.cancelled += 1;
+  }
+  renderTotals();
+}
+
+function connectOrdersSocket() {
+  let ws;
+  try {
+    ws = new WebSocket('ws://127.0.0.1:8000/ws/orders');
+  } catch (e) { return; }
+  ws.addEventListener('open', () => {
+    const sub = { action: 'subscribe', topics: ['orders'] };
+    if (lastSeq !== null) sub.since = lastSeq;
+    ws.send(JSON.stringify(sub));
+  });
   ws.addEventListener('message', ev => {
     try {
       const msg = JSON.parse(ev.data);
-      if (msg && msg.type === 'order_update') {
+      if (!msg) return;
+      if (msg.type === 'subscribed') {
+        if (lastSeq === null) lastSeq = msg.seq;
+      } else if (msg.type === 'resync') {
+        // Missed more than the server buffers: reload everything
+        lastSeq = msg.seq;
         fetchAndUpdateMetrics();
+      } else if (typeof msg.seq === 'number') {
+        if (msg.seq <= lastSeq) return;
+        lastSeq = msg.seq;
+        applyOrderEvent(msg);
       }
     } catch (e) { }
   });
-  ws.addEventListener('error', () => { /* ignore */ });
-} catch (e) { /* ignore */ }
+  ws.addEventListener('close', () => setTimeout(connectOrdersSocket, 3000));
+  ws.addEventListener('error', () => { /* ignore; close follows */ });
+}
+
+connectOrdersSocket();
 
 // Optional: refresh every 60s as fallback
 setInterval(fetchAndUpdateMetrics, 60000);
@@ -104,50 +104,16 @@
     if (abortCtrl) { try { abortCtrl.abort(); } catch(_){} }
     abortCtrl = new AbortController();
     try {
-      const now = Date.now();
-      async function tryListCached(url, key){
-        const ent = CACHE[key] || { ts: 0, data: [] };
-        if (now - ent.ts < CACHE_TTL && ent.data && ent.data.length) return ent.data;
-        try {
-          const res = await fetch(url, { headers: authHeaders(), signal: abortCtrl.signal });
-          if (!res.ok) return ent.data || [];
-          const data = await res.json();
-          const arr = Array.isArray(data) ? data : [];
-          CACHE[key] = { ts: Date.now(), data: arr };
-          return arr;
-        } catch (_) { return ent.data || []; }
+      const key = 'q:' + q.toLowerCase();
+      const ent = CACHE[key];
+      let data = ent && (Date.now() - ent.ts < CACHE_TTL) ? ent.data : null;
+      if (!data){
+        const res = await fetch(`${baseUrl}/search?q=${encodeURIComponent(q)}&limit=5`, { headers: authHeaders(), signal: abortCtrl.signal });
+        if (!res.ok) return;
+        data = await res.json();
+        CACHE[key] = { ts: Date.now(), data };
       }
-      const [customers, items, ordersAll, usersAll] = await Promise.all([
-        tryListCached(`${baseUrl}/customers`, 'customers'),
-        tryListCached(`${baseUrl}/items`, 'items'),
-        tryListCached(`${baseUrl}/orders`, 'orders'),
-        tryListCached(`${baseUrl}/users`, 'users')
-      ]);
-      const ql = q.toLowerCase(); const qd = digits(q);
-      const custMatches = (customers||[]).filter(c => {
-        const name = (c.name||'').toLowerCase();
-        const phone = digits(c.phone);
-        const email = (c.email||'').toLowerCase();
-        return name.includes(ql) || (!!qd && phone.includes(qd)) || email.includes(ql);
-      });
-      const itemMatches = (items||[]).filter(i => {
-        const name = (i.name||'').toLowerCase();
-        const sku = (i.sku||'').toLowerCase();
-        const cat = (i.category||'').toLowerCase();
-        return name.includes(ql) || sku.includes(ql) || cat.includes(ql);
-      });
-      const orderMatches = (ordersAll||[]).filter(o => {
-        const idStr = String(o.id || o.order_id || '');
-        const status = (o.status||'').toLowerCase();
-        return (qd && idStr.includes(qd)) || status.includes(ql);
-      });
-      const userMatches = (usersAll||[]).filter(u => {
-        const name = (u.name||'').toLowerCase();
-        const email = (u.email||'').toLowerCase();
-        const role = (u.role||'').toLowerCase();
-        return name.includes(ql) || email.includes(ql) || role.includes(ql);
-      });
-      renderResults({customers: custMatches, items: itemMatches, orders: orderMatches, users: userMatches}, q);
+      renderResults({customers: data.customers || [], items: data.items || [], orders: data.orders || [], users: data.users || []}, q);
       showDropdown();
     } catch (e) {
       // silent
@@ -135,14 +135,13 @@ async function proceedToItems(){
   if (!name || phone.length < 8){ if (custErr){ custErr.textContent = 'Please provide name and a valid WhatsApp number'; custErr.classList.remove('hidden'); } return; }
   try {
     const token = localStorage.IF_TOKEN;
-    // Try find by phone in cache, else fetch
+    // Indexed lookup by normalized phone, else create
     let cid=null; let meta=null;
     try {
-      const res = await fetch(baseUrl + '/customers', { headers: { 'Authorization': token } });
+      const res = await fetch(baseUrl + '/customers/lookup?phone=' + encodeURIComponent(phone), { headers: { 'Authorization': token } });
       if (res.ok){
         const arr = await res.json();
-        window._customersCache = Array.isArray(arr) ? arr : [];
-        const found = (Array.isArray(arr)?arr:[]).find(c => digits(c.phone) === phone);
+        const found = Array.isArray(arr) ? arr[0] : null;
         if (found){ cid = found.id; meta = { id: found.id, name: found.name, phone: found.phone, gstin: found.gstin }; }
       }
     } catch(_){}
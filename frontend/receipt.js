@@ -72,7 +72,9 @@
       // Resolve GST percentage
       let gstVal = null;
       try {
-        if (it.gst != null && !Number.isNaN(parseInt(it.gst, 10))) {
+        if (it.gst_rate != null && !Number.isNaN(parseInt(it.gst_rate, 10))) {
+          gstVal = parseInt(it.gst_rate, 10);
+        } else if (it.gst != null && !Number.isNaN(parseInt(it.gst, 10))) {
           gstVal = parseInt(it.gst, 10);
         } else {
           const id = it.item_id || it.id || (it.item && it.item.id);
@@ -98,9 +100,14 @@
       return `<div class="rc-row"><div class="rc-col item">${nameCell}</div><div class="rc-col qty">${q}</div><div class="rc-col amt">${INR(line)}</div></div>`;
     }).join('');
     el('rc-items').innerHTML = rows || '<div class="rc-row"><div class="rc-col item">—</div><div class="rc-col qty">0</div><div class="rc-col amt">₹0</div></div>';
-    // If we calculated tax, derive total accordingly; else fall back to server total
+    // Prefer the server-computed GST split (GET /orders/{id}); else derive it locally
+    const server = Array.isArray(data.tax_breakup);
     let total;
-    if (taxTotal > 0) {
+    if (server) {
+      subtotal = parseFloat(data.subtotal || subtotal);
+      taxTotal = parseFloat(data.tax_total || 0);
+      total = parseFloat(data.grand_total || (subtotal + taxTotal));
+    } else if (taxTotal > 0) {
       total = subtotal + taxTotal;
     } else {
       total = parseFloat(data.total || subtotal);
@@ -115,6 +122,14 @@
       const host = el('rc-tax-breakup');
       if (host) {
         host.innerHTML = '';
+        if (server) {
+          host.innerHTML = data.tax_breakup.filter(b => b.rate > 0).map(b => data.inter_state
+            ? `<div class="rc-row"><div class="rc-col label">IGST ${b.rate}%</div><div class="rc-col value">${INR(parseFloat(b.igst))}</div></div>`
+            : `<div class="rc-row"><div class="rc-col label">CGST ${b.rate / 2}%</div><div class="rc-col value">${INR(parseFloat(b.cgst))}</div></div>` +
+              `<div class="rc-row"><div class="rc-col label">SGST ${b.rate / 2}%</div><div class="rc-col value">${INR(parseFloat(b.sgst))}</div></div>`
+          ).join('');
+          return;
+        }
         const rates = Object.keys(breakup).map(r => parseInt(r, 10)).filter(n => !Number.isNaN(n) && n > 0).sort((a,b)=>a-b);
         const parts = [];
         for (const r of rates) {
@@ -204,9 +219,9 @@
     const qid = getParam('id') || getParam('order_id');
     let currentOrderData = null;
     const orderReady = (async () => {
-      if (payload) return payload;
-      const fetched = await fetchOrderById(qid);
-      return fetched || null;
+      // Server copy carries names, GST rates and the CGST/SGST/IGST split
+      const fetched = await fetchOrderById(qid || (payload && (payload.id || payload.order_id)));
+      return fetched || payload || null;
     })();
     orderReady.then((data)=>{ currentOrderData = data; render(data || payload); }).catch(()=> render(payload));
     // Mark order complete after printing once (auto or manual)
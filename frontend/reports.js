@@ -59,50 +59,32 @@ tailwind.config = {
     return { now, curStart, prevStart, prevEnd };
   }
 
-  function sumCompleted(orders, from, to) {
-    const f = startOfDay(from); const t = startOfDay(to || new Date());
-    let total = 0;
-    for (const o of orders) {
-      if ((o.status||'').toLowerCase() !== 'completed') continue;
-      const d = new Date(o.created_at);
-      if (d >= f && d < t) total += parseFloat(o.total || 0);
+  function qs(params){
+    const q = new URLSearchParams();
+    for (const [k, v] of Object.entries(params)) {
+      if (v === undefined || v === null) continue;
+      q.set(k, v instanceof Date ? v.toISOString() : String(v));
     }
-    return total;
+    const str = q.toString();
+    return str ? `?${str}` : '';
   }
 
-  function ratioCanceled(orders, from, to){
-    const f = startOfDay(from); const t = startOfDay(to || new Date());
-    let canceled = 0, total = 0;
-    for (const o of orders) {
-      const d = new Date(o.created_at);
-      if (d >= f && d < t) {
-        total += 1;
-        if ((o.status||'').toLowerCase() === 'canceled') canceled += 1;
-      }
-    }
-    return total ? (canceled/total) : 0;
-  }
+  // Aggregates are computed server-side by the /reports API
+  function fetchReport(name, params){ return fetchJSON(`/reports/${name}${qs(params||{})}`); }
 
-  function topItemByQty(orders, items, from, to){
-    const f = startOfDay(from); const t = startOfDay(to || new Date());
-    const qtyById = new Map();
-    for (const o of orders) {
-      const d = new Date(o.created_at);
-      if (d < f || d >= t) continue;
-      if ((o.items||[]).length) {
-        for (const it of o.items) {
-          const id = it.item_id; const q = Number(it.qty||0);
-          qtyById.set(id, (qtyById.get(id)||0) + q);
-        }
-      }
+  function totals(points){
+    const acc = { orders: 0, completed: 0, canceled: 0, revenue: 0, completedRevenue: 0 };
+    for (const p of points) {
+      acc.orders += Number(p.orders||0);
+      acc.completed += Number(p.completed||0);
+      acc.canceled += Number(p.canceled||0);
+      acc.revenue += parseFloat(p.revenue||0);
+      acc.completedRevenue += parseFloat(p.completed_revenue||0);
     }
-    let bestId=null, bestQty=0;
-    for (const [id, q] of qtyById.entries()) if (q>bestQty){bestQty=q; bestId=id;}
-    const name = (items.find(i => i.id === bestId)?.name) || (bestId ? `Item ${bestId}` : '—');
-    return { name, qty: bestQty };
+    return acc;
   }
 
-  function monthlyRevenueSeries(orders){
+  function monthlyRevenueSeries(points){
     const now = new Date();
     const months = [];
     const map = new Map();
@@ -112,10 +94,8 @@ tailwind.config = {
       months.push(k);
       map.set(k, 0);
     }
-    for (const o of orders){
-      if ((o.status||'').toLowerCase() !== 'completed') continue;
-      const k = monthKey(o.created_at || o.updated_at || new Date());
-      if (map.has(k)) map.set(k, map.get(k) + parseFloat(o.total||0));
+    for (const p of points){
+      if (map.has(p.period)) map.set(p.period, parseFloat(p.completed_revenue||0));
     }
     return { months, values: months.map(k => Math.round(map.get(k)||0)) };
   }
@@ -163,55 +143,48 @@ tailwind.config = {
   async function loadReports(){
     try {
       try { window.showLoader && window.showLoader(); } catch(_){}
-      const [orders, customers, items] = await Promise.all([
-        fetchJSON('/orders'),
-        fetchJSON('/customers'),
-        fetchJSON('/items')
-      ]);
       const { now, curStart, prevStart, prevEnd } = computeQuarterRanges();
+      const nowDay = startOfDay(now);
+      const woStart = addDays(nowDay, -7), woPrevStart = addDays(nowDay, -14);
+      const yearStart = new Date(now.getFullYear(), now.getMonth()-11, 1);
+      const [curDays, prevDays, monthly, topItems, curCust, prevCust, curCats, prevCats, lowStock] = await Promise.all([
+        fetchReport('sales', { period: 'day', date_from: startOfDay(curStart), date_to: nowDay }),
+        fetchReport('sales', { period: 'day', date_from: startOfDay(prevStart), date_to: startOfDay(prevEnd) }),
+        fetchReport('sales', { period: 'month', date_from: yearStart }),
+        fetchReport('top-items', { limit: 5, date_from: startOfDay(curStart), date_to: nowDay }),
+        fetchReport('new-customers', { date_from: curStart }),
+        fetchReport('new-customers', { date_from: prevStart, date_to: prevEnd }),
+        fetchReport('categories', { date_from: woStart, date_to: nowDay }),
+        fetchReport('categories', { date_from: woPrevStart, date_to: woStart }),
+        fetchReport('low-stock'),
+      ]);
 
-      const curSales = sumCompleted(orders, curStart, now);
-      const prevSales = sumCompleted(orders, prevStart, prevEnd);
-      const salesGrowth = prevSales ? ((curSales - prevSales) / prevSales) * 100 : (curSales>0?100:0);
+      const cur = totals(curDays), prev = totals(prevDays);
+      const salesGrowth = prev.completedRevenue ? ((cur.completedRevenue - prev.completedRevenue) / prev.completedRevenue) * 100 : (cur.completedRevenue>0?100:0);
       setText('rep-sales-growth', `${salesGrowth.toFixed(1)}%`);
       setDir('rep-sales-growth-dir', salesGrowth >= 0);
 
-      const curRefund = ratioCanceled(orders, curStart, now) * 100;
-      const prevRefund = ratioCanceled(orders, prevStart, prevEnd) * 100;
+      const curRefund = (cur.orders ? cur.canceled / cur.orders : 0) * 100;
+      const prevRefund = (prev.orders ? prev.canceled / prev.orders : 0) * 100;
       const refundDelta = curRefund - prevRefund;
       setText('rep-refund-rate', `${curRefund.toFixed(1)}%`);
       setDir('rep-refund-dir', refundDelta <= 0); // green when going down
 
-      const top = topItemByQty(orders, items, curStart, now);
-      setText('rep-top-performer', top.name);
-      setText('rep-top-performer-units', `${top.qty} units`);
+      const top = topItems[0];
+      setText('rep-top-performer', top ? top.name : '—');
+      setText('rep-top-performer-units', `${top ? top.qty : 0} units`);
 
-      const curNewCust = customers.filter(c => new Date(c.created_at) >= curStart).length;
-      const prevNewCust = customers.filter(c => new Date(c.created_at) >= prevStart && new Date(c.created_at) < prevEnd).length;
+      const curNewCust = curCust.total, prevNewCust = prevCust.total;
       const custChange = prevNewCust ? ((curNewCust - prevNewCust)/prevNewCust)*100 : (curNewCust>0?100:0);
       setText('rep-new-customers', String(curNewCust));
       setText('rep-new-customers-change', `${custChange>=0?'↑':'↓'} ${Math.abs(custChange).toFixed(1)}%`);
 
       // Charts
-      renderRevenueChart(monthlyRevenueSeries(orders));
-
-      // Top 5 items (qty) in current quarter
-      const qtyBy = new Map();
-      const f = startOfDay(curStart); const t = startOfDay(now);
-      for (const o of orders){
-        const d = new Date(o.created_at); if (d<f || d>=t) continue;
-        for (const it of (o.items||[])){
-          qtyBy.set(it.item_id, (qtyBy.get(it.item_id)||0) + Number(it.qty||0));
-        }
-      }
-      const topList = Array.from(qtyBy.entries()).map(([id, qty])=>({
-        name: items.find(i=>i.id===id)?.name || `Item ${id}`,
-        qty
-      })).sort((a,b)=>b.qty-a.qty).slice(0,5);
-      renderTopItemsChart(topList);
+      renderRevenueChart(monthlyRevenueSeries(monthly));
+      renderTopItemsChart(topItems.map(t => ({ name: t.name, qty: t.qty })));
 
       // Insights & Annotations
-      renderInsights({ orders, customers, items, curStart, now, prevStart, prevEnd });
+      renderInsights({ curDays, curCats, prevCats, lowStock, nowDay });
 
     } catch (err) {
       console.error('Reports load failed:', err);
@@ -221,13 +194,18 @@ tailwind.config = {
   }
 
   function renderInsights(ctx){
-    const { orders, items, curStart, now, prevStart, prevEnd } = ctx;
+    const { curDays, curCats, prevCats, lowStock, nowDay } = ctx;
     const list = [];
+    const byDay = new Map(curDays.map(p => [p.period, p]));
+    const dayKey = (d) => `${d.getFullYear()}-${String(d.getMonth()+1).padStart(2,'0')}-${String(d.getDate()).padStart(2,'0')}`;
+    const countIn = (from, to) => {
+      let n = 0;
+      for (let d = new Date(from); d < to; d = addDays(d, 1)) n += Number(byDay.get(dayKey(d))?.orders || 0);
+      return n;
+    };
 
     // Insight 1: WoW orders change
-    const nowDay = startOfDay(now);
     const woStart = addDays(nowDay, -7), woPrevStart = addDays(nowDay, -14), woPrevEnd = addDays(nowDay, -7);
-    const countIn = (from, to) => orders.filter(o => { const d=new Date(o.created_at); return d>=from && d<to; }).length;
     const curCnt = countIn(woStart, nowDay), prevCnt = countIn(woPrevStart, woPrevEnd);
     if (prevCnt || curCnt) {
       const pct = prevCnt ? ((curCnt - prevCnt)/prevCnt)*100 : (curCnt>0?100:0);
@@ -235,34 +213,23 @@ tailwind.config = {
     }
 
     // Insight 2: Category surge (qty)
-    const catMap = new Map();
-    const catPrev = new Map();
-    const itemById = new Map(items.map(i=>[i.id,i]));
-    for (const o of orders){
-      const d = new Date(o.created_at);
-      const target = (d>=woStart && d<nowDay) ? catMap : (d>=woPrevStart && d<woPrevEnd) ? catPrev : null;
-      if (!target) continue;
-      for (const it of (o.items||[])){
-        const cat = (itemById.get(it.item_id)?.category || 'Uncategorized');
-        target.set(cat, (target.get(cat)||0) + Number(it.qty||0));
-      }
-    }
+    const catPrev = new Map(prevCats.map(c => [c.category, Number(c.qty||0)]));
     let bestCat=null, bestDelta=0;
-    for (const [cat, q] of catMap.entries()){
-      const prev = catPrev.get(cat)||0;
+    for (const c of curCats){
+      const q = Number(c.qty||0);
+      const prev = catPrev.get(c.category)||0;
       const delta = prev? ((q-prev)/prev)*100 : (q>0?100:0);
-      if (delta>bestDelta){ bestDelta=delta; bestCat=cat; }
+      if (delta>bestDelta){ bestDelta=delta; bestCat=c.category; }
     }
     if (bestCat){ list.push({ type: 'Automated Insight', text: `${bestCat} category grew the most WoW (+${bestDelta.toFixed(1)}%).`}); }
 
     // Insight 3: Refund spike alert (daily >2%)
     const days = 14;
     for (let i=days;i>=1;i--){
-      const d0 = addDays(nowDay, -i), d1 = addDays(nowDay, -i+1);
-      const inDay = orders.filter(o => { const d=new Date(o.created_at); return d>=d0 && d<d1; });
-      if (!inDay.length) continue;
-      const canc = inDay.filter(o => (o.status||'').toLowerCase()==='canceled').length;
-      const ratio = canc / inDay.length;
+      const d0 = addDays(nowDay, -i);
+      const p = byDay.get(dayKey(d0));
+      if (!p || !p.orders) continue;
+      const ratio = p.canceled / p.orders;
       if (ratio > 0.02) {
         list.push({ type: 'Alert', text: `Refund rate ${Math.round(ratio*1000)/10}% on ${d0.toLocaleDateString('en-IN')}.`});
         break;
@@ -270,9 +237,8 @@ tailwind.config = {
     }
 
     // Insight 4: Low stock notes
-    const low = items.filter(i => (i.stock||0) <= (i.reorder_point||0));
-    if (low.length){
-      list.push({ type: 'Note', text: `${low.length} item(s) at or below reorder point.`});
+    if (lowStock.length){
+      list.push({ type: 'Note', text: `${lowStock.length} item(s) at or below reorder point.`});
     }
 
     // User notes from localStorage